@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from flask import Flask, render_template, request, jsonify, session, send_file
+from flask import Flask, render_template, request, jsonify, session, send_file, Response, stream_with_context
 from flask_socketio import SocketIO, emit
 import os
 import json
@@ -75,7 +75,8 @@ class WebAnalyzer:
             if not api_key:
                 raise ValueError("OPENAI_API_KEY가 .env 파일에 설정되지 않음")
             
-            self.gpt_summarizer = GPTSummarizer(api_key=api_key)
+            self.gpt_summarizer = GPTSummarizer.get(api_key=api_key)
+            GPTSummarizer.prewarm((self.gpt_summarizer.model,))  # 첫 요청의 토큰 계산 지연 제거
             self.gpt_available = True
             logger.info("✅ GPT API 초기화 성공")
         except Exception as e:
@@ -378,6 +379,48 @@ def analyze_individual():
         logger.error(f"개별 분석 오류: {e}")
         return jsonify({'success': False, 'error': f'분석 중 오류가 발생했습니다: {str(e)}'})
 
+@app.route('/api/analyze/individual/stream', methods=['POST'])
+def analyze_individual_stream():
+    """개별 상품 분석 API (스트리밍) - GPT 분석 결과를 생성되는 대로 text/plain으로 전송"""
+    try:
+        data = request.get_json()
+        source_type = data.get('source_type')  # 'file' or 'url'
+        source = data.get('source')
+        product_name = data.get('product_name', '상품')
+        
+        if not source:
+            return jsonify({'success': False, 'error': '분석할 소스가 제공되지 않았습니다.'})
+        
+        if not analyzer.gpt_available:
+            return jsonify({'success': False, 'error': 'GPT API를 사용할 수 없습니다.'})
+        
+        # PDF 텍스트 추출
+        result = analyzer.extract_pdf_content(source, is_url=(source_type == 'url'))
+        if not result['success']:
+            return jsonify(result)
+        
+        user_id = analyzer.get_user_id(request)
+        
+        def generate():
+            parts = []
+            for chunk in analyzer.gpt_summarizer.analyze_for_detail_stream(result['pages'], product_name):
+                parts.append(chunk)
+                yield chunk
+            
+            # 스트림이 끝나면 메모리에 분석 결과 저장 (챗봇용)
+            analyzer.save_analysis_result(user_id, {
+                'name': product_name,
+                'content': result['content'],
+                'analysis': "".join(parts),
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        return Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8')
+        
+    except Exception as e:
+        logger.error(f"개별 분석 스트리밍 오류: {e}")
+        return jsonify({'success': False, 'error': f'분석 중 오류가 발생했습니다: {str(e)}'})
+
 @app.route('/api/get_raw_text', methods=['POST'])
 def get_raw_text():
     """원본 텍스트 추출 API (디버깅용)"""
@@ -481,27 +524,27 @@ def analyze_compare():
                 logger.warning("⚠️ GPT 종합 비교 분석 실패, 기본 텍스트 사용")
                 
             # 개별 분석도 메모리 저장용으로 수행 (성공한 경우에만)
+            # 종합 비교 결과는 비교 표만 담으므로 상품별 분석은 따로 받음 - 두 상품은 동시에 처리 (Rate Limit은 공용 리미터가 조절)
             if gpt_comparison_success:
                 logger.info("🔄 개별 분석 시작 (메모리 저장용)...")
-                analysis1 = analyzer.analyze_product_comparison(result1['pages'], product1_name)
-                time.sleep(1)  # Rate Limit 방지
-                analysis2 = analyzer.analyze_product_comparison(result2['pages'], product2_name)
-            else:
-                analysis1 = ""
-                analysis2 = ""
+                analysis1, analysis2 = analyzer.gpt_summarizer.process_documents_parallel(
+                    [(result1['pages'], product1_name), (result2['pages'], product2_name)],
+                    method='analyze_for_comparison',
+                    max_workers=2
+                )
         
         # 메모리에 분석 결과 저장
         user_id = analyzer.get_user_id(request)
         analyzer.save_analysis_result(user_id, {
             'name': product1_name,
             'content': result1['content'],
-            'analysis': analysis1 if analyzer.gpt_available else "",
+            'analysis': analysis1,
             'timestamp': datetime.now().isoformat()
         })
         analyzer.save_analysis_result(user_id, {
             'name': product2_name,
             'content': result2['content'],
-            'analysis': analysis2 if analyzer.gpt_available else "",
+            'analysis': analysis2,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -578,11 +621,13 @@ def handle_chat_message(data):
         def generate_response():
             try:
                 logger.info(f"챗봇 질문: {question}")
-                logger.info(f"컨텍스트 미리보기: {context[:500]}...")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("컨텍스트 미리보기: %s...", context[:500])
                 
                 response = analyzer.generate_chatbot_response(question, context)
                 
-                logger.info(f"챗봇 응답: {response[:200]}...")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("챗봇 응답: %s...", response[:200])
                 
                 socketio.emit('chat_response', {
                     'response': response,
@@ -631,6 +676,181 @@ def start_app():
         # 프로덕션 환경
         socketio.run(app, host='0.0.0.0', port=8080, debug=False, allow_unsafe_werkzeug=True)
 
+# PDF 출력용 스타일시트 (요청마다 다시 만들지 않도록 모듈 로드 시 한 번만 생성)
+PDF_STYLESHEET = """
+    @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;500;700&display=swap');
+
+    body {
+        font-family: 'Noto Sans KR', sans-serif;
+        line-height: 1.4;
+        color: #333;
+        margin: 0;
+        padding: 10mm;
+        font-size: 9pt;
+    }
+
+    h1 {
+        color: #2c3e50;
+        text-align: center;
+        margin: 10mm 0 5mm 0;
+        font-size: 18pt;
+        font-weight: 700;
+    }
+
+    h2 {
+        color: #34495e;
+        border-bottom: 2px solid #95a5a6;
+        padding-bottom: 8px;
+        margin-top: 15px;
+        margin-bottom: 10px;
+        font-size: 18pt;
+        font-weight: 600;
+        page-break-after: avoid;
+        page-break-before: auto;
+    }
+
+    h3 {
+        color: #7f8c8d;
+        margin-top: 20px;
+        font-size: 14pt;
+        font-weight: 500;
+    }
+
+    table {
+        width: 100%;
+        border-collapse: collapse;
+        margin: 5mm 0;
+        font-size: 7pt;
+    }
+
+    /* 보장 항목 컬럼 (첫 번째 컬럼) */
+    th:first-child, td:first-child {
+        width: 25%;
+        text-align: left;
+        padding-left: 8px;
+        font-weight: 600;
+        background-color: #f8f9fa !important;
+    }
+
+    /* 나머지 컬럼 */
+    th, td {
+        border: 1px solid #d0d0d0;
+        padding: 6px 4px;
+        text-align: center;
+        vertical-align: middle;
+    }
+
+    /* 4번째와 5번째 컬럼 사이 굵은 줄 */
+    th:nth-child(5), td:nth-child(5) {
+        border-left: 3px solid #8B9FE8;
+    }
+
+    /* 메인 헤더 */
+    thead th {
+        background: linear-gradient(135deg, #6B7FD7 0%, #8B9FE8 100%);
+        color: white;
+        font-weight: 700;
+        font-size: 8pt;
+        padding: 8px;
+    }
+
+    /* 보장 항목 컬럼 헤더 */
+    thead th:first-child {
+        background: linear-gradient(135deg, #6B7FD7 0%, #8B9FE8 100%);
+        color: white;
+        font-weight: 700;
+    }
+
+    /* 교차 행 배경색 (노란색/파란색) */
+    /* 홀수 행 - 전체 노란색 */
+    tbody tr:nth-child(odd) td:nth-child(2),
+    tbody tr:nth-child(odd) td:nth-child(3),
+    tbody tr:nth-child(odd) td:nth-child(4),
+    tbody tr:nth-child(odd) td:nth-child(5),
+    tbody tr:nth-child(odd) td:nth-child(6),
+    tbody tr:nth-child(odd) td:nth-child(7) {
+        background-color: #FFF9E6;
+    }
+
+    /* 짝수 행 - 전체 파란색 */
+    tbody tr:nth-child(even) td:nth-child(2),
+    tbody tr:nth-child(even) td:nth-child(3),
+    tbody tr:nth-child(even) td:nth-child(4),
+    tbody tr:nth-child(even) td:nth-child(5),
+    tbody tr:nth-child(even) td:nth-child(6),
+    tbody tr:nth-child(even) td:nth-child(7) {
+        background-color: #E8F4FD;
+    }
+
+    /* 신규 담보 강조 */
+    .new-coverage {
+        background-color: #d4edda !important;
+        border-left: 3px solid #28a745 !important;
+    }
+
+    hr {
+        border: none;
+        border-top: 1px solid #ecf0f1;
+        margin: 25px 0;
+    }
+
+    ul, ol {
+        margin: 10px 0;
+        padding-left: 25px;
+    }
+
+    li {
+        margin: 5px 0;
+    }
+
+    strong {
+        color: #2c3e50;
+        font-weight: 600;
+    }
+
+    code {
+        background-color: #f4f4f4;
+        padding: 2px 5px;
+        border-radius: 3px;
+        font-family: 'Courier New', monospace;
+    }
+
+    @page {
+        size: A4;
+        margin: 15mm;
+        @bottom-center {
+            content: counter(page) " / " counter(pages);
+            font-size: 9pt;
+            color: #7f8c8d;
+        }
+    }
+"""
+
+def render_pdf_bytes(markdown_content, filename):
+    """마크다운 분석 결과를 PDF 바이트로 렌더링"""
+    # 마크다운을 HTML로 변환
+    html_content = markdown(markdown_content, extras=['tables', 'fenced-code-blocks'])
+    
+    # HTML 템플릿
+    html_template = f"""
+    <!DOCTYPE html>
+    <html lang="ko">
+    <head>
+        <meta charset="UTF-8">
+        <title>{filename}</title>
+        <style>
+{PDF_STYLESHEET}
+        </style>
+    </head>
+    <body>
+        {html_content}
+    </body>
+    </html>
+    """
+    
+    # HTML을 PDF로 변환
+    return HTML(string=html_template, base_url='.').write_pdf()
+
 @app.route('/api/generate_pdf', methods=['POST'])
 def generate_pdf():
     """분석 결과를 PDF로 생성하여 다운로드"""
@@ -652,173 +872,8 @@ def generate_pdf():
                 'error': 'PDF 생성 기능이 사용 불가능합니다. weasyprint와 markdown2를 설치해주세요.'
             }), 500
         
-        # 마크다운을 HTML로 변환
-        html_content = markdown(markdown_content, extras=['tables', 'fenced-code-blocks'])
-        
-        # HTML 템플릿
-        html_template = f"""
-        <!DOCTYPE html>
-        <html lang="ko">
-        <head>
-            <meta charset="UTF-8">
-            <title>{filename}</title>
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;500;700&display=swap');
-                
-                body {{
-                    font-family: 'Noto Sans KR', sans-serif;
-                    line-height: 1.4;
-                    color: #333;
-                    margin: 0;
-                    padding: 10mm;
-                    font-size: 9pt;
-                }}
-                
-                h1 {{
-                    color: #2c3e50;
-                    text-align: center;
-                    margin: 10mm 0 5mm 0;
-                    font-size: 18pt;
-                    font-weight: 700;
-                }}
-                
-                h2 {{
-                    color: #34495e;
-                    border-bottom: 2px solid #95a5a6;
-                    padding-bottom: 8px;
-                    margin-top: 15px;
-                    margin-bottom: 10px;
-                    font-size: 18pt;
-                    font-weight: 600;
-                    page-break-after: avoid;
-                    page-break-before: auto;
-                }}
-                
-                h3 {{
-                    color: #7f8c8d;
-                    margin-top: 20px;
-                    font-size: 14pt;
-                    font-weight: 500;
-                }}
-                
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin: 5mm 0;
-                    font-size: 7pt;
-                }}
-                
-                /* 보장 항목 컬럼 (첫 번째 컬럼) */
-                th:first-child, td:first-child {{
-                    width: 25%;
-                    text-align: left;
-                    padding-left: 8px;
-                    font-weight: 600;
-                    background-color: #f8f9fa !important;
-                }}
-                
-                /* 나머지 컬럼 */
-                th, td {{
-                    border: 1px solid #d0d0d0;
-                    padding: 6px 4px;
-                    text-align: center;
-                    vertical-align: middle;
-                }}
-                
-                /* 4번째와 5번째 컬럼 사이 굵은 줄 */
-                th:nth-child(5), td:nth-child(5) {{
-                    border-left: 3px solid #8B9FE8;
-                }}
-                
-                /* 메인 헤더 */
-                thead th {{
-                    background: linear-gradient(135deg, #6B7FD7 0%, #8B9FE8 100%);
-                    color: white;
-                    font-weight: 700;
-                    font-size: 8pt;
-                    padding: 8px;
-                }}
-                
-                /* 보장 항목 컬럼 헤더 */
-                thead th:first-child {{
-                    background: linear-gradient(135deg, #6B7FD7 0%, #8B9FE8 100%);
-                    color: white;
-                    font-weight: 700;
-                }}
-                
-                /* 교차 행 배경색 (노란색/파란색) */
-                /* 홀수 행 - 전체 노란색 */
-                tbody tr:nth-child(odd) td:nth-child(2),
-                tbody tr:nth-child(odd) td:nth-child(3),
-                tbody tr:nth-child(odd) td:nth-child(4),
-                tbody tr:nth-child(odd) td:nth-child(5),
-                tbody tr:nth-child(odd) td:nth-child(6),
-                tbody tr:nth-child(odd) td:nth-child(7) {{
-                    background-color: #FFF9E6;
-                }}
-                
-                /* 짝수 행 - 전체 파란색 */
-                tbody tr:nth-child(even) td:nth-child(2),
-                tbody tr:nth-child(even) td:nth-child(3),
-                tbody tr:nth-child(even) td:nth-child(4),
-                tbody tr:nth-child(even) td:nth-child(5),
-                tbody tr:nth-child(even) td:nth-child(6),
-                tbody tr:nth-child(even) td:nth-child(7) {{
-                    background-color: #E8F4FD;
-                }}
-                
-                /* 신규 담보 강조 */
-                .new-coverage {{
-                    background-color: #d4edda !important;
-                    border-left: 3px solid #28a745 !important;
-                }}
-                
-                hr {{
-                    border: none;
-                    border-top: 1px solid #ecf0f1;
-                    margin: 25px 0;
-                }}
-                
-                ul, ol {{
-                    margin: 10px 0;
-                    padding-left: 25px;
-                }}
-                
-                li {{
-                    margin: 5px 0;
-                }}
-                
-                strong {{
-                    color: #2c3e50;
-                    font-weight: 600;
-                }}
-                
-                code {{
-                    background-color: #f4f4f4;
-                    padding: 2px 5px;
-                    border-radius: 3px;
-                    font-family: 'Courier New', monospace;
-                }}
-                
-                @page {{
-                    size: A4;
-                    margin: 15mm;
-                    @bottom-center {{
-                        content: counter(page) " / " counter(pages);
-                        font-size: 9pt;
-                        color: #7f8c8d;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-        
-        # HTML을 PDF로 변환
-        pdf_bytes = HTML(string=html_template, base_url='.').write_pdf()
+        # 마크다운 -> HTML -> PDF 변환
+        pdf_bytes = render_pdf_bytes(markdown_content, filename)
         
         # BytesIO 객체로 변환
         pdf_buffer = io.BytesIO(pdf_bytes)
@@ -895,6 +950,8 @@ def generate_excel():
         )
         center_alignment = Alignment(horizontal='center', vertical='center')
         left_alignment = Alignment(horizontal='left', vertical='center')
+        odd_row_fill = PatternFill(start_color="FFF9E6", end_color="FFF9E6", fill_type="solid")
+        even_row_fill = PatternFill(start_color="E8F4FD", end_color="E8F4FD", fill_type="solid")
         
         row_num = 1
         
@@ -950,9 +1007,9 @@ def generate_excel():
                             
                             # 교차 행 배경색 적용
                             if r_idx % 2 == 0:  # 짝수 행 (0-indexed이므로 실제로는 홀수 번째 행)
-                                cell.fill = PatternFill(start_color="FFF9E6", end_color="FFF9E6", fill_type="solid")
+                                cell.fill = odd_row_fill
                             else:  # 홀수 행 (실제로는 짝수 번째 행)
-                                cell.fill = PatternFill(start_color="E8F4FD", end_color="E8F4FD", fill_type="solid")
+                                cell.fill = even_row_fill
                 
                 row_num += len(table)
         
@@ -1031,9 +1088,11 @@ def extract_tables_from_markdown(markdown_content):
                 current_table = None
             
             # 섹션 이름 추출
-            section_name = line.replace('##', '').strip()
+            section_name = line[2:].replace('##', '').strip()
             # 번호 제거 (예: "1. 요약 비교표" -> "요약 비교표")
-            section_name = section_name.split('.', 1)[-1].strip() if '.' in section_name else section_name
+            _, sep, rest = section_name.partition('.')
+            if sep:
+                section_name = rest.strip()
             current_section = section_name
             in_table = False
             continue
@@ -1051,8 +1110,9 @@ def extract_tables_from_markdown(markdown_content):
             if all(cell.replace('-', '').replace(':', '').strip() == '' for cell in cells):
                 continue
             
-            # 마크다운 강조 제거 (**텍스트** -> 텍스트)
-            cells = [cell.replace('**', '').replace('*', '').strip() for cell in cells]
+            # 마크다운 강조 제거 (**텍스트** -> 텍스트), 강조가 없는 행은 건너뜀
+            if '*' in line:
+                cells = [cell.replace('**', '').replace('*', '').strip() for cell in cells]
             
             if cells:
                 current_table.append(cells)
@@ -36,6 +36,9 @@ class Settings(BaseSettings):
     # Domain Allowlist
     allowlist_domains: List[str] = ["goodrichplus.kr", "example.com"]
     
+    # Crawler Configuration (robots.txt 검사용, None이면 "*")
+    user_agent: Optional[str] = None
+    
     # Chunking Configuration
     chunk_size: int = 1500
     chunk_overlap: int = 200
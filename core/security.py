@@ -1,54 +1,86 @@
+import time
 import requests
-from urllib.parse import urlparse
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib.parse import ParseResult, urlparse
+from urllib.robotparser import RobotFileParser
+from typing import Any, Dict, List, Optional, Tuple
 from core.config import settings
 from core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Shared session so robots.txt and HEAD requests to the same origin reuse connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0))
+_SESSION.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0))
+_SESSION.max_redirects = 5  # bound redirect chains (requests default is 30)
+if settings.user_agent:
+    _SESSION.headers['User-Agent'] = settings.user_agent
 
-def is_allowed_domain(url: str) -> bool:
-    """Check if the domain is in the allowlist"""
+# robots.txt cache: "scheme://netloc" -> (parser or _ROBOTS_FAIL, fetched_at)
+_ROBOTS_FAIL = object()  # sentinel for hosts whose robots.txt could not be fetched
+_ROBOTS_CACHE: Dict[str, Tuple[Any, float]] = {}
+_ROBOTS_TTL = 6 * 3600  # 6 hours
+_ROBOTS_FAIL_TTL = 300  # 5 minutes
+
+_MAX_PDF_BYTES = settings.max_pdf_mb * 1024 * 1024
+
+# Allowlist lookup tables, built once at import
+_ALLOW_DOMAINS = frozenset(d.lower().lstrip('.') for d in settings.allowlist_domains)
+_ALLOW_SUFFIXES = tuple('.' + d for d in _ALLOW_DOMAINS)
+
+
+def is_allowed_domain(url: str, parsed: Optional[ParseResult] = None) -> bool:
+    """Check if the domain (or one of its parents) is in the allowlist"""
     try:
-        domain = urlparse(url).netloc.lower()
-        return any(allowed in domain for allowed in settings.allowlist_domains)
+        domain = (parsed or urlparse(url)).hostname or ''
+        return domain in _ALLOW_DOMAINS or domain.endswith(_ALLOW_SUFFIXES)
     except Exception as e:
         logger.error(f"Error parsing domain from {url}: {e}")
         return False
 
 
-def check_robots_txt(url: str) -> bool:
-    """Check robots.txt for the given URL (best effort)"""
-    try:
-        parsed = urlparse(url)
-        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-        
-        response = requests.get(robots_url, timeout=5)
+def _fetch_robots_parser(origin: str) -> RobotFileParser:
+    """Fetch and parse robots.txt for the given origin"""
+    parser = RobotFileParser()
+    parser.set_url(f"{origin}/robots.txt")
+    
+    # Stream the body line by line instead of materializing text + split copies
+    with _SESSION.get(parser.url, timeout=5, stream=True) as response:
         if response.status_code != 200:
-            return True  # Assume allowed if robots.txt not found
-        
-        robots_content = response.text.lower()
-        user_agent = "*"
+            parser.allow_all = True  # Assume allowed if robots.txt not found
+        else:
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            parser.parse(response.iter_lines(decode_unicode=True))
+    
+    return parser
+
+
+def check_robots_txt(url: str, parsed: Optional[ParseResult] = None) -> bool:
+    """Check robots.txt for the given URL (best effort, cached per origin)"""
+    try:
+        parsed = parsed or urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
         
-        # Simple robots.txt parsing
-        lines = robots_content.split('\n')
-        disallow_sections = []
-        current_user_agent = None
+        now = time.monotonic()
+        parser, fetched_at = _ROBOTS_CACHE.get(origin, (None, 0.0))
+        ttl = _ROBOTS_FAIL_TTL if parser is _ROBOTS_FAIL else _ROBOTS_TTL
+        if parser is None or now - fetched_at >= ttl:
+            try:
+                parser = _fetch_robots_parser(origin)
+            except Exception as e:
+                logger.warning(f"Error fetching robots.txt for {origin}: {e}")
+                parser = _ROBOTS_FAIL
+            _ROBOTS_CACHE[origin] = (parser, now)
         
-        for line in lines:
-            line = line.strip()
-            if line.startswith('user-agent:'):
-                current_user_agent = line.split(':', 1)[1].strip()
-            elif line.startswith('disallow:') and current_user_agent in [user_agent, '*']:
-                disallow_path = line.split(':', 1)[1].strip()
-                disallow_sections.append(disallow_path)
+        if parser is _ROBOTS_FAIL:
+            return True  # Assume allowed on error
         
-        # Check if our path is disallowed
-        path = parsed.path
-        for disallow_path in disallow_sections:
-            if path.startswith(disallow_path):
-                logger.warning(f"URL {url} is disallowed by robots.txt")
-                return False
+        if not parser.can_fetch(settings.user_agent or "*", url):
+            logger.warning(f"URL {url} is disallowed by robots.txt")
+            return False
         
         return True
         
@@ -57,35 +89,75 @@ def check_robots_txt(url: str) -> bool:
         return True  # Assume allowed on error
 
 
+def _probe_pdf_headers(url: str) -> Tuple[int, str, Optional[str]]:
+    """Return (status, content-type, content-length) via HEAD, with ranged GET fallback"""
+    response = _SESSION.head(url, timeout=10, allow_redirects=True, stream=True)
+    response.close()
+    if response.status_code not in (405, 501):
+        return (response.status_code,
+                response.headers.get('content-type', ''),
+                response.headers.get('content-length'))
+    
+    # Server does not support HEAD, fall back to a 1-byte ranged GET
+    response = _SESSION.get(url, timeout=10, allow_redirects=True,
+                            headers={'Range': 'bytes=0-0'}, stream=True)
+    response.close()
+    content_type = response.headers.get('content-type', '')
+    if response.status_code == 206:
+        total = response.headers.get('content-range', '').rpartition('/')[2]
+        return 200, content_type, total if total.isdigit() else None
+    return response.status_code, content_type, response.headers.get('content-length')
+
+
 def validate_pdf_url(url: str) -> Tuple[bool, Optional[str]]:
     """Validate if URL points to a valid PDF"""
     try:
-        # Check robots.txt first
-        if not check_robots_txt(url):
-            return False, "Disallowed by robots.txt"
+        parsed = urlparse(url)
         
-        # Check domain allowlist
-        if not is_allowed_domain(url):
-            return False, f"Domain not in allowlist: {urlparse(url).netloc}"
+        # Check domain allowlist first (local, no network)
+        if not is_allowed_domain(url, parsed):
+            return False, f"Domain not in allowlist: {parsed.netloc}"
+        
+        # Check robots.txt (cached per origin)
+        if not check_robots_txt(url, parsed):
+            return False, "Disallowed by robots.txt"
         
         # HEAD request to check content type and size
-        response = requests.head(url, timeout=10, allow_redirects=True)
+        status_code, content_type, content_length = _probe_pdf_headers(url)
         
-        if response.status_code != 200:
-            return False, f"HTTP {response.status_code}"
+        if status_code != 200:
+            return False, f"HTTP {status_code}"
         
-        content_type = response.headers.get('content-type', '').lower()
+        content_type = content_type.lower()
         if 'application/pdf' not in content_type:
             return False, f"Not a PDF: {content_type}"
         
-        content_length = response.headers.get('content-length')
-        if content_length:
-            size_mb = int(content_length) / (1024 * 1024)
-            if size_mb > settings.max_pdf_mb:
-                return False, f"File too large: {size_mb:.1f}MB > {settings.max_pdf_mb}MB"
+        if content_length and content_length.isdigit():
+            size_bytes = int(content_length)
+            if size_bytes > _MAX_PDF_BYTES:
+                return False, f"File too large: {size_bytes / (1024 * 1024):.1f}MB > {settings.max_pdf_mb}MB"
         
         return True, None
         
+    except requests.exceptions.TooManyRedirects:
+        logger.warning(f"Too many redirects for PDF URL {url}")
+        return False, "Too many redirects"
     except Exception as e:
         logger.error(f"Error validating PDF URL {url}: {e}")
         return False, str(e)
+
+
+def validate_pdf_urls(urls: List[str], max_workers: int = 16) -> Dict[str, Tuple[bool, Optional[str]]]:
+    """Validate many PDF URLs concurrently (same-host URLs are checked sequentially)"""
+    by_host: Dict[str, List[str]] = {}
+    for url in dict.fromkeys(urls):
+        by_host.setdefault(urlparse(url).netloc.lower(), []).append(url)
+    
+    def validate_host_group(group: List[str]) -> List[Tuple[str, Tuple[bool, Optional[str]]]]:
+        return [(url, validate_pdf_url(url)) for url in group]
+    
+    results: Dict[str, Tuple[bool, Optional[str]]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for group_results in executor.map(validate_host_group, by_host.values()):
+            results.update(group_results)
+    return results
@@ -5,9 +5,42 @@
 
 import sys
 import os
+import re
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from parsing.pdf_text import PDFTextExtractor
+from debug_utils import cached_extract, iter_matching_lines
+
+# 금액 패턴 (모듈 로드 시 한 번만 컴파일)
+# 모든 단위를 하나의 alternation으로 묶어 텍스트를 한 번만 스캔
+_ALL_AMOUNTS = re.compile(r'([0-9,]+(?:천|만)?원|[0-9.]+억원)')
+_WON_RE = re.compile(r'([0-9,]+원)')
+_SURRENDER_RE = re.compile('해약환급금|경과기간|납입보험료|환급금')
+
+_AMOUNT_BUCKETS = [
+    '[0-9,]+원',    # 85,804원
+    '[0-9]+원',     # 85804원
+    '[0-9,]+천원',  # 1,000천원
+    '[0-9,]+만원',  # 1,000만원
+    '[0-9.]+억원'   # 1.5억원
+]
+
+
+def _classify_amounts(text):
+    """한 번의 스캔으로 금액을 단위별로 분류"""
+    buckets = {label: [] for label in _AMOUNT_BUCKETS}
+    for amount in _ALL_AMOUNTS.findall(text):
+        if amount.endswith('억원'):
+            buckets['[0-9.]+억원'].append(amount)
+        elif amount.endswith('만원'):
+            buckets['[0-9,]+만원'].append(amount)
+        elif amount.endswith('천원'):
+            buckets['[0-9,]+천원'].append(amount)
+        else:
+            buckets['[0-9,]+원'].append(amount)
+            if ',' not in amount:
+                buckets['[0-9]+원'].append(amount)
+    return buckets
 
 def debug_amount_extraction():
     """금액 추출 로직 디버깅"""
@@ -20,7 +53,7 @@ def debug_amount_extraction():
     
     # PDF 텍스트 추출
     extractor = PDFTextExtractor()
-    success, pages = extractor.extract_text_from_url(test_url)
+    success, pages = cached_extract(test_url, extractor)
     
     if not success:
         print("❌ PDF 텍스트 추출 실패")
@@ -30,38 +63,27 @@ def debug_amount_extraction():
     
     # 9페이지 (해약환급금 표) 상세 분석
     page_9 = pages[8]  # 9페이지 (인덱스 8)
+    text_9 = page_9.get('text', '')
+    table_data = page_9.get('table_data', ())
     print(f"\n📊 9페이지 상세 분석:")
-    print(f"텍스트 길이: {len(page_9.get('text', ''))}")
-    print(f"표 데이터 개수: {len(page_9.get('table_data', []))}")
+    print(f"텍스트 길이: {len(text_9)}")
+    print(f"표 데이터 개수: {len(table_data)}")
     
     # 9페이지 텍스트에서 금액 패턴 찾기
-    text_9 = page_9.get('text', '')
     print(f"\n📝 9페이지 텍스트 샘플:")
     print(text_9[:1000])
     
     # 금액 패턴 테스트
-    import re
-    
     print(f"\n🔍 금액 패턴 테스트:")
     
-    # 기존 패턴들
-    patterns = [
-        r'([0-9,]+원)',      # 85,804원
-        r'([0-9]+원)',       # 85804원
-        r'([0-9,]+천원)',    # 1,000천원
-        r'([0-9,]+만원)',    # 1,000만원
-        r'([0-9.]+억원)'     # 1.5억원
-    ]
-    
-    for i, pattern in enumerate(patterns):
-        matches = re.findall(pattern, text_9)
-        print(f"  패턴 {i+1} ({pattern}): {len(matches)}개 발견")
+    amount_buckets = _classify_amounts(text_9)
+    for i, (label, matches) in enumerate(amount_buckets.items()):
+        print(f"  패턴 {i+1} ({label}): {len(matches)}개 발견")
         if matches:
             print(f"    예시: {matches[:5]}")
     
     # 표 데이터에서 금액 추출 테스트
     print(f"\n📋 표 데이터 금액 추출 테스트:")
-    table_data = page_9.get('table_data', [])
     
     for i, item in enumerate(table_data[:10]):  # 처음 10개만
         text_raw = item.get('text_raw', '')
@@ -71,23 +93,20 @@ def debug_amount_extraction():
         print(f"  {i+1}. '{text_raw}' -> amount_raw: '{amount_raw}', amount_norm: {amount_norm}")
         
         # 수동으로 금액 추출 테스트
-        manual_amounts = re.findall(r'([0-9,]+원)', text_raw)
+        manual_amounts = _WON_RE.findall(text_raw)
         if manual_amounts:
             print(f"     수동 추출: {manual_amounts}")
     
     # 해약환급금 표 특정 부분 찾기
     print(f"\n🎯 해약환급금 표 특정 부분:")
-    surrender_lines = []
-    for line in text_9.split('\n'):
-        if any(keyword in line for keyword in ['해약환급금', '경과기간', '납입보험료', '환급금']):
-            surrender_lines.append(line.strip())
+    surrender_lines = [line.strip() for _, line in iter_matching_lines(text_9, _SURRENDER_RE)]
     
     print(f"해약환급금 관련 라인 {len(surrender_lines)}개:")
     for line in surrender_lines[:10]:  # 처음 10개만
         print(f"  '{line}'")
         
         # 각 라인에서 금액 추출
-        amounts = re.findall(r'([0-9,]+원)', line)
+        amounts = _WON_RE.findall(line)
         if amounts:
             print(f"    -> 금액 발견: {amounts}")
 
@@ -9,6 +9,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import logging
 
+from debug_utils import cached_extract
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -48,7 +50,7 @@ def debug_ec2_surrender():
     
     try:
         extractor = PDFTextExtractor()
-        success, pages = extractor.extract_text_from_url(test_url)
+        success, pages = cached_extract(test_url, extractor)
         
         if not success:
             print("❌ PDF 텍스트 추출 실패")
@@ -64,7 +66,7 @@ def debug_ec2_surrender():
         print(f"텍스트 길이: {len(text_9)}")
         
         # 해약환급금 키워드 확인
-        surrender_keywords = ['해약환급금', '환급금', '경과기간', '납입보험료']
+        surrender_keywords = ['환급금', '경과기간', '납입보험료']  # '해약환급금'은 아래에서 따로 확인
         found_keywords = [kw for kw in surrender_keywords if kw in text_9]
         print(f"발견된 키워드: {found_keywords}")
         
@@ -5,11 +5,16 @@ GPT API에 전달되는 실제 내용을 디버깅하는 스크립트
 
 import sys
 import os
+import re
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from parsing.pdf_text import PDFTextExtractor
+from debug_utils import cached_extract, iter_matching_lines
 from llm.gpt_summarizer import GPTSummarizer
 
+# '환급금'이 '해약환급금'도 포함
+_REFUND_RE = re.compile('환급금')
+
 def debug_gpt_input():
     """GPT API에 전달되는 내용을 디버깅"""
     
@@ -22,7 +27,7 @@ def debug_gpt_input():
     # 1. PDF 텍스트 추출
     print("1. PDF 텍스트 추출 중...")
     extractor = PDFTextExtractor()
-    success, pages = extractor.extract_text_from_url(test_url)
+    success, pages = cached_extract(test_url, extractor)
     
     if not success:
         print("❌ PDF 텍스트 추출 실패")
@@ -34,18 +39,19 @@ def debug_gpt_input():
     print("\n2. 페이지별 상세 정보:")
     for i, page in enumerate(pages):
         page_num = page.get('page_number', i+1)
-        text_length = len(page.get('text', ''))
-        has_surrender = any(keyword in page.get('text', '') for keyword in ['해약환급금', '환급금', '경과기간'])
-        table_data_count = len(page.get('table_data', []))
+        text = page.get('text', '')
+        table_data = page.get('table_data', ())
+        text_length = len(text)
+        has_surrender = '환급금' in text or '경과기간' in text  # '해약환급금'은 '환급금'에 포함
+        table_data_count = len(table_data)
         
         print(f"  페이지 {page_num}: 텍스트 길이 {text_length}, 해약환급금 관련: {has_surrender}, 표 데이터: {table_data_count}개")
         
         if has_surrender:
             print(f"    📊 해약환급금 관련 페이지 {page_num} 감지!")
-            print(f"    📝 텍스트 샘플: {page.get('text', '')[:200]}...")
+            print(f"    📝 텍스트 샘플: {text[:200]}...")
             
             # 표 데이터 상세 확인
-            table_data = page.get('table_data', [])
             if table_data:
                 print(f"    📋 표 데이터 {len(table_data)}개:")
                 for j, item in enumerate(table_data[:5]):  # 처음 5개만
@@ -54,29 +60,28 @@ def debug_gpt_input():
     # 3. GPT 텍스트 조합 확인 (API 키 없이)
     print("\n3. GPT 텍스트 조합 확인:")
     try:
-        summarizer = GPTSummarizer()
+        summarizer = GPTSummarizer.get()
         combined_text = summarizer._combine_extracted_text(pages)
     except Exception as e:
         print(f"⚠️ GPT 초기화 실패 (API 키 문제): {e}")
         # API 키 없이도 텍스트 조합은 가능
         from llm.gpt_summarizer import GPTSummarizer
         summarizer = GPTSummarizer.__new__(GPTSummarizer)  # 인스턴스 생성만
+        summarizer._combined_cache = {}
         combined_text = summarizer._combine_extracted_text(pages)
     
     print(f"✅ GPT 텍스트 조합 완료: {len(combined_text)} 자")
     
     # 해약환급금 관련 부분 확인
-    surrender_sections = []
-    lines = combined_text.split('\n')
-    for i, line in enumerate(lines):
-        if '해약환급금' in line or '환급금' in line:
-            surrender_sections.append(f"라인 {i+1}: {line}")
+    surrender_sections = [
+        f"라인 {line_no}: {line}" for line_no, line in iter_matching_lines(combined_text, _REFUND_RE)
+    ]
     
     print(f"📊 해약환급금 관련 라인 {len(surrender_sections)}개 발견:")
     for section in surrender_sections[:10]:  # 처음 10개만
         print(f"  {section}")
     
-    # 4. 표 데이터 추출 확인
+    # 4. 표 데이터 추출 확인 (5단계에서도 재사용)
     print("\n4. 표 데이터 추출 확인:")
     table_data1 = summarizer._extract_table_data_from_pages(pages)
     print(f"📋 추출된 표 데이터: {table_data1}")
@@ -84,8 +89,6 @@ def debug_gpt_input():
     # 5. 실제 GPT 프롬프트 생성 (비교 분석용)
     print("\n5. 실제 GPT 프롬프트 생성:")
     
-    # 표 데이터 추출
-    table_data1 = summarizer._extract_table_data_from_pages(pages)
     table_data2 = "표 데이터 없음"  # 단일 상품이므로
     
     # 텍스트 스마트 절단
@@ -5,9 +5,16 @@
 
 import sys
 import os
+import re
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from parsing.pdf_text import PDFTextExtractor
+from debug_utils import cached_page_texts, iter_matching_lines
+
+# 데이터 행 (앞 공백 허용) / 헤더 행 (경과기간, 납입보험료 모두 포함)
+_ROW_RE = re.compile(r'(?m)^[^\S\n]*(?:\d+년|만기)[^\n]*')
+_HEADER_RE = re.compile(r'(?m)^(?=[^\n]*경과기간)(?=[^\n]*납입보험료)[^\n]*')
+_SURRENDER_RE = re.compile('해약환급금|환급금|경과기간|납입보험료|적립부분|보장부분')
 
 def debug_text_structure():
     """텍스트 구조 디버깅"""
@@ -20,7 +27,7 @@ def debug_text_structure():
     
     # PDF 텍스트 추출
     extractor = PDFTextExtractor()
-    success, pages = extractor.extract_text_from_url(test_url)
+    success, pages = cached_page_texts(test_url, extractor)
     
     if not success:
         print("❌ PDF 텍스트 추출 실패")
@@ -35,29 +42,24 @@ def debug_text_structure():
     print("\n" + "="*50)
     
     # 해약환급금 관련 라인 찾기
-    lines = text_9.split('\n')
-    print(f"📝 전체 라인 수: {len(lines)}")
+    line_count = text_9.count('\n') + 1
+    print(f"📝 전체 라인 수: {line_count}")
     
     print(f"\n🔍 해약환급금 관련 라인들:")
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if any(keyword in line for keyword in ['해약환급금', '환급금', '경과기간', '납입보험료', '적립부분', '보장부분']):
-            print(f"  라인 {i+1}: '{line}'")
+    for line_no, line in iter_matching_lines(text_9, _SURRENDER_RE):
+        print(f"  라인 {line_no}: '{line.strip()}'")
     
     print(f"\n🎯 표 헤더 찾기:")
-    for i, line in enumerate(lines):
+    for line_no, line in iter_matching_lines(text_9, _HEADER_RE):
         line = line.strip()
-        if '경과기간' in line and '납입보험료' in line:
-            print(f"  헤더 라인 {i+1}: '{line}'")
-            print(f"  컬럼들: {line.split()}")
+        print(f"  헤더 라인 {line_no}: '{line}'")
+        print(f"  컬럼들: {line.split()}")
     
     print(f"\n📊 데이터 행 찾기:")
-    for i, line in enumerate(lines):
+    for line_no, line in iter_matching_lines(text_9, _ROW_RE):
         line = line.strip()
-        if re.match(r'^\d+년', line) or re.match(r'^만기', line):
-            print(f"  데이터 라인 {i+1}: '{line}'")
-            print(f"  컬럼들: {line.split()}")
+        print(f"  데이터 라인 {line_no}: '{line}'")
+        print(f"  컬럼들: {line.split()}")
 
 if __name__ == "__main__":
-    import re
     debug_text_structure()
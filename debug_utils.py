@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+디버그 스크립트 공용 유틸리티
+"""
+
+import os
+import hashlib
+import json
+
+# 텍스트 전용 캐시를 위한 import (선택적)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 추출 결과 디스크 캐시 위치 (DEBUG_NO_CACHE=1 이면 캐시 사용 안 함)
+# 다른 사용자가 파일을 심을 수 없도록 /tmp 대신 사용자 홈 아래 0700 디렉터리 사용
+CACHE_DIR = os.path.expanduser("~/.cache/goodrich_prf_ocr/pdfcache")
+
+
+def _cache_path(url, suffix):
+    """URL 기준 캐시 파일 경로 (캐시 디렉터리가 없으면 소유자 전용 권한으로 생성)"""
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    return os.path.join(CACHE_DIR, f"{hashlib.sha1(url.encode()).hexdigest()}{suffix}")
+
+
+def cached_extract(url, extractor):
+    """
+    extract_text_from_url 결과를 URL 기준으로 디스크에 캐시
+    
+    Args:
+        url: PDF URL
+        extractor: PDFTextExtractor 인스턴스
+        
+    Returns:
+        (success, pages) 튜플 (extract_text_from_url과 동일)
+    """
+    if os.getenv('DEBUG_NO_CACHE') == '1':
+        return extractor.extract_text_from_url(url)
+    
+    # 페이지는 dict/list/str/숫자뿐이므로 JSON으로 저장 (pickle과 달리 읽을 때 코드 실행 없음)
+    path = _cache_path(url, ".json")
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            success, pages = json.load(f)
+        return success, pages
+    
+    result = extractor.extract_text_from_url(url)
+    success, _ = result
+    if success:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, default=str)
+    return result
+
+
+def cached_page_texts(url, extractor):
+    """
+    페이지 번호/텍스트만 필요한 스크립트용 캐시
+    pyarrow가 있으면 parquet 컬럼만 읽어 table_data 역직렬화를 건너뜀
+    
+    Returns:
+        (success, pages) 튜플 - 각 page는 page_number, text 키만 포함
+        (pyarrow가 없으면 cached_extract 결과를 그대로 반환)
+    """
+    if not PARQUET_AVAILABLE or os.getenv('DEBUG_NO_CACHE') == '1':
+        return cached_extract(url, extractor)
+    
+    path = _cache_path(url, ".text.parquet")
+    if os.path.exists(path):
+        return True, pq.read_table(path, columns=['page_number', 'text']).to_pylist()
+    
+    success, pages = cached_extract(url, extractor)
+    if success:
+        pq.write_table(pa.Table.from_pylist([
+            {'page_number': page.get('page_number', i + 1), 'text': page.get('text', '')}
+            for i, page in enumerate(pages)
+        ]), path)
+    return success, pages
+
+
+def iter_matching_lines(text, pattern):
+    """
+    정규식이 매칭되는 라인만 (라인 번호, 라인) 형태로 순회
+    텍스트 전체를 split 하지 않고 매칭 위치 주변만 잘라냄
+    
+    Args:
+        text: 검색할 텍스트
+        pattern: 컴파일된 정규식 (줄바꿈을 넘지 않는 패턴)
+    """
+    line_no = 1
+    counted = 0
+    line_end = -1
+    for match in pattern.finditer(text):
+        if match.start() <= line_end:
+            continue  # 이미 반환한 라인 안의 추가 매칭
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        line_end = text.find('\n', match.end())
+        if line_end == -1:
+            line_end = len(text)
+        line_no += text.count('\n', counted, line_start)
+        counted = line_start
+        yield line_no, text[line_start:line_end]
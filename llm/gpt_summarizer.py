@@ -1,19 +1,41 @@
 """
 GPT API를 사용한 PDF 텍스트 정리 및 요약 모듈
 """
+import atexit
+import hashlib
+import importlib.util
+import json
 import os
+import random
+import re
+import sqlite3
+import string
+import sys
+import threading
 import time
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from itertools import accumulate
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
 import logging
 
-# 토큰 계산을 위한 import (선택적)
+# openai, httpx, tiktoken, dotenv는 무거우므로 처음 사용할 때 import (GPT를 쓰지 않는 실행의 시작 시간 단축)
+
+# 토큰 계산을 위한 tiktoken (선택적) - 설치 여부만 확인
+TIKTOKEN_AVAILABLE = importlib.util.find_spec('tiktoken') is not None
+if not TIKTOKEN_AVAILABLE:
+    logging.warning("tiktoken 라이브러리가 없습니다. 근사치 토큰 계산을 사용합니다.")
+
+# 빠른 JSON 직렬화 (선택적) - 응답 캐시 키 계산과 배치 JSONL 입출력에 사용
 try:
-    import tiktoken
-    TIKTOKEN_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    TIKTOKEN_AVAILABLE = False
-    logging.warning("tiktoken 라이브러리가 없습니다. 근사치 토큰 계산을 사용합니다.")
+    ORJSON_AVAILABLE = False
 
 try:
     from core.gui_config import gui_settings as settings
@@ -34,1210 +56,2404 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logging.basicConfig(level=logging.INFO)
 
+# 해약환급금 표 파서 - 모듈 로드 시 한 번만 import (sys.path는 프로젝트 루트가 없을 때만 한 번 추가)
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+try:
+    from parsing.table_parser import TableParser
+    _TABLE_PARSER = TableParser()  # 상태 없는 파서라 프로세스 전체에서 공유
+except ImportError as e:
+    _TABLE_PARSER = None
+    logger.error(f"TableParser import 실패: {e}")
 
-class GPTSummarizer:
-    def __init__(self, api_key: Optional[str] = None):
-        """
-        GPT 요약기 초기화
-        
-        Args:
-            api_key: OpenAI API 키 (없으면 환경변수에서 자동 로드)
-        """
-        # API 키 설정 (.env 파일 우선)
-        from dotenv import load_dotenv
-        load_dotenv()  # .env 파일 강제 로드
-        
-        # .env 파일 -> 설정 -> 파라미터 -> 시스템 환경변수 순서로 우선순위
-        self.api_key = (api_key or 
-                       settings.openai_api_key or 
-                       os.getenv('OPENAI_API_KEY'))
-        
-        if not self.api_key:
-            raise ValueError(
-                "OpenAI API 키가 필요합니다. 다음 중 하나의 방법으로 설정해주세요:\n"
-                "1. 환경변수: OPENAI_API_KEY=your_key\n"
-                "2. 파라미터로 직접 전달\n"
-                "3. core/config.py에서 openai_api_key 설정"
-            )
-        
-        # API 키 디버깅 정보
-        key_preview = f"{self.api_key[:10]}...{self.api_key[-4:]}" if len(self.api_key) > 14 else "****"
-        logger.info(f"OpenAI API 키 로드됨: {key_preview}")
-        
-        # OpenAI 클라이언트 초기화 (proxy 설정 명시적 비활성화)
+
+# 프로세스 전체에서 공유하는 HTTP 클라이언트 (api.openai.com keep-alive 연결 재사용)
+_SHARED_HTTPX = None
+
+# API 키 해시 -> OpenAI 클라이언트 (인스턴스를 새로 만들어도 같은 클라이언트 재사용)
+_SHARED_CLIENTS = {}
+_SHARED_CLIENTS_LOCK = threading.Lock()
+
+# GPTSummarizer.get()용 인스턴스: api_key 인자 -> GPTSummarizer
+_INSTANCES = {}
+_INSTANCES_LOCK = threading.Lock()
+
+# .env 파일은 프로세스당 한 번만 로드
+_DOTENV_LOADED = False
+
+
+def _get_shared_httpx():
+    """공유 httpx 클라이언트 (첫 호출 시 생성, 실패하면 None)"""
+    global _SHARED_HTTPX
+    if _SHARED_HTTPX is None:
         try:
             import httpx
-            # HTTP 클라이언트를 명시적으로 생성하여 proxy 설정 제어
-            http_client = httpx.Client(
-                timeout=30.0,
+            _SHARED_HTTPX = httpx.Client(
+                # h2 패키지가 있으면 HTTP/2로 병렬 요청을 한 연결에 다중화
+                http2=importlib.util.find_spec('h2') is not None,
+                timeout=httpx.Timeout(_API_CALL_TIMEOUT, connect=10.0),
                 follow_redirects=True,
-                # proxy 설정을 명시적으로 None으로 설정
-                proxies=None
-            )
-            self.client = OpenAI(
-                api_key=self.api_key,
-                http_client=http_client
-            )
-        except Exception as e:
-            logger.warning(f"HTTP 클라이언트 설정 실패, 기본 설정 사용: {e}")
-            # 기본 설정으로 재시도
-            try:
-                self.client = OpenAI(api_key=self.api_key)
-            except Exception as e2:
-                # 환경 변수에서 proxy 설정 제거 후 재시도
-                import os
-                old_http_proxy = os.environ.pop('HTTP_PROXY', None)
-                old_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-                old_http_proxy_lower = os.environ.pop('http_proxy', None)
-                old_https_proxy_lower = os.environ.pop('https_proxy', None)
-                
-                try:
-                    self.client = OpenAI(api_key=self.api_key)
-                    logger.info("proxy 환경변수 제거 후 OpenAI 클라이언트 초기화 성공")
-                except Exception as e3:
-                    logger.error(f"모든 방법 실패: {e3}")
-                    raise e3
-                finally:
-                    # 환경변수 복원
-                    if old_http_proxy: os.environ['HTTP_PROXY'] = old_http_proxy
-                    if old_https_proxy: os.environ['HTTPS_PROXY'] = old_https_proxy
-                    if old_http_proxy_lower: os.environ['http_proxy'] = old_http_proxy_lower
-                    if old_https_proxy_lower: os.environ['https_proxy'] = old_https_proxy_lower
-        # 가장 저렴한 모델 사용 (gpt-4o-mini)
-        self.model = 'gpt-4o-mini'
-        
-        # API 키 유효성 검증
-        try:
-            test_response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": "test"}],
-                max_tokens=1
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=60.0),
+                trust_env=False  # 환경변수 proxy 설정 무시
             )
-            logger.info(f"✅ OpenAI API 키 검증 성공")
+            atexit.register(_SHARED_HTTPX.close)
         except Exception as e:
-            logger.error(f"❌ OpenAI API 키 검증 실패: {e}")
-            raise ValueError(f"OpenAI API 키가 유효하지 않습니다: {e}")
-        
-        logger.info(f"GPT Summarizer initialized with model: {self.model}")
-    
-    def _estimate_tokens(self, text: str) -> int:
-        """텍스트의 토큰 수를 추정합니다."""
-        if TIKTOKEN_AVAILABLE:
-            try:
-                encoding = tiktoken.encoding_for_model(self.model)
-                return len(encoding.encode(text))
-            except Exception as e:
-                logger.warning(f"tiktoken 인코딩 실패: {e}")
-        
-        # 근사치 계산 (한국어: 2자당 1토큰, 영어: 4자당 1토큰)
-        korean_chars = len([c for c in text if ord(c) >= 0xAC00 and ord(c) <= 0xD7A3])
-        other_chars = len(text) - korean_chars
-        return int(korean_chars / 2 + other_chars / 4)
+            logger.warning(f"공유 HTTP 클라이언트 생성 실패, OpenAI 기본 클라이언트를 사용합니다: {e}")
+    return _SHARED_HTTPX
+
+
+_RULE = '=' * 50
+_WIDE_RULE = '=' * 60
+
+# 공통 헤더 형식과 다른 결과 헤더 (str.format으로 값만 채움)
+_PRODUCTS_COMPARISON_HEADER = (
+    "🔍 보험상품 종합 비교 분석 결과\n" + _WIDE_RULE + "\n\n"
+    "📁 {product1_label}: {file1_name} ({pages1_count}페이지)\n"
+    "📁 {product2_label}: {file2_name} ({pages2_count}페이지)\n\n"
+    + _WIDE_RULE + "\n\n"
+)
+_SURRENDER_HEADER = (
+    "💰 해약환급금 특화 분석 결과\n" + _RULE + "\n\n"
+    "📁 파일명: {file_name}\n"
+    "📑 페이지 수: {page_count}\n\n\n"
+    + _RULE + "\n\n"
+)
+
+
+def _document_header(title: str, file_name: str, page_count: int, time_label: str, note: str) -> str:
+    """결과 앞에 붙는 공통 문서 메타데이터 (제목, 파일명, 페이지 수, 처리 시각, 안내)"""
+    return "".join((
+        title, "\n", _RULE, "\n\n",
+        "📁 파일명: ", str(file_name), "\n",
+        "📑 페이지 수: ", str(page_count), "\n",
+        "⏰ ", time_label, ": ", datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "\n",
+        note, "\n\n",
+        _RULE, "\n\n"
+    ))
+
+
+# API 호출 타임아웃 (초) 및 재시도할 HTTP 상태 코드
+_API_CALL_TIMEOUT = 120
+_RETRYABLE_STATUS_CODES = (500, 502, 503, 529)
+
+# 프로세스 전체 동시 API 호출 상한 (병렬 처리 경로가 겹쳐도 Rate Limit 안쪽으로 유지)
+_MAX_CONCURRENT_API_CALLS = int(os.getenv('GPT_MAX_CONCURRENCY', '10'))
+_API_SEMAPHORE = threading.BoundedSemaphore(_MAX_CONCURRENT_API_CALLS)
+
+
+class _RateLimiter:
+    """분당 요청 수(RPM)/토큰 수(TPM) 토큰 버킷 - 한도를 다 쓴 경우에만 대기 (스레드 안전)"""
     
-    def _normalize_currency_units(self, text: str) -> str:
-        """
-        금액 단위를 통일하여 정확한 비교가 가능하도록 정규화합니다.
-        
-        Args:
-            text: 정규화할 텍스트
-            
-        Returns:
-            금액 단위가 통일된 텍스트
-        """
-        import re
-        
-        # 금액 패턴 매칭 및 단위 통일
-        # 1. 천원 단위 (예: 1,000천원, 1000천원)
-        thousand_pattern = r'([0-9,]+)\s*천원'
-        def replace_thousand(match):
-            amount = match.group(1).replace(',', '')
-            try:
-                value = int(amount) * 1000
-                return f"{value:,}원"
-            except:
-                return match.group(0)
-        text = re.sub(thousand_pattern, replace_thousand, text)
-        
-        # 2. 만원 단위 (예: 1,000만원, 1000만원)
-        ten_thousand_pattern = r'([0-9,]+)\s*만원'
-        def replace_ten_thousand(match):
-            amount = match.group(1).replace(',', '')
-            try:
-                value = int(amount) * 10000
-                return f"{value:,}원"
-            except:
-                return match.group(0)
-        text = re.sub(ten_thousand_pattern, replace_ten_thousand, text)
-        
-        # 3. 억원 단위 (예: 1억원, 1.5억원)
-        hundred_million_pattern = r'([0-9.]+)\s*억원'
-        def replace_hundred_million(match):
-            amount = match.group(1)
-            try:
-                value = float(amount) * 100000000
-                return f"{int(value):,}원"
-            except:
-                return match.group(0)
-        text = re.sub(hundred_million_pattern, replace_hundred_million, text)
-        
-        # 4. 숫자만 있는 경우 (원이 없는 경우) - 문맥에 따라 판단
-        # 보험료 관련 문맥에서 숫자만 있으면 원 단위로 가정
-        premium_context_pattern = r'(월보험료|보험료|납입|보장금액|지급금액)[:：]\s*([0-9,]+)(?![원천만억])'
-        def add_won_unit(match):
-            prefix = match.group(1)
-            amount = match.group(2)
-            return f"{prefix}: {amount}원"
-        text = re.sub(premium_context_pattern, add_won_unit, text)
-        
-        return text
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self._capacity = (float(requests_per_minute), float(tokens_per_minute))
+        self._available = list(self._capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
     
-    def _smart_truncate_text(self, text: str, max_input_tokens: int = 100000) -> str:
-        """토큰 제한을 고려하여 텍스트를 스마트하게 절단합니다. (GPT-4o-mini 128K 활용)"""
-        current_tokens = self._estimate_tokens(text)
-        
-        # GPT-4o-mini는 128K 토큰 지원하므로 대부분의 PDF는 전체 처리 가능
-        if current_tokens <= max_input_tokens:
-            logger.info(f"✅ 전체 텍스트 보존: {current_tokens} 토큰 (제한: {max_input_tokens})")
-            return text
-        
-        # 토큰 비율 계산
-        ratio = max_input_tokens / current_tokens
-        target_length = int(len(text) * ratio * 0.9)  # 10% 여유분
-        
-        # 문장 단위로 절단 시도
-        sentences = text.split('.')
-        truncated = ""
-        for sentence in sentences:
-            if self._estimate_tokens(truncated + sentence + ".") > max_input_tokens:
-                break
-            truncated += sentence + "."
-        
-        if truncated.strip():
-            logger.info(f"텍스트를 문장 단위로 절단: {current_tokens} → {self._estimate_tokens(truncated)} 토큰")
-            return truncated
-        
-        # 문장 단위 절단 실패 시 문자 단위로 절단
-        truncated = text[:target_length]
-        logger.info(f"텍스트를 문자 단위로 절단: {current_tokens} → {self._estimate_tokens(truncated)} 토큰")
-        return truncated
-
-    def _safe_api_call(self, messages, max_tokens=1000, retries=3, delay=2, temperature=None):
-        """
-        Rate Limit을 고려한 안전한 API 호출
-        
-        Args:
-            messages: 채팅 메시지 리스트
-            max_tokens: 최대 토큰 수
-            retries: 재시도 횟수
-            delay: 재시도 간격 (초)
-            temperature: 온도 설정 (None이면 기본값 0.3 사용)
-            
-        Returns:
-            OpenAI API response object or None if failed
-        """
-        # 토큰 수 사전 검증
-        total_input_tokens = sum(self._estimate_tokens(msg.get('content', '')) for msg in messages)
-        total_tokens = total_input_tokens + max_tokens
-        
-        if total_tokens > 125000:  # GPT-4o-mini 안전 마진 (128k - 3k)
-            logger.warning(f"토큰 수 초과 위험: {total_tokens} tokens (입력: {total_input_tokens}, 출력: {max_tokens})")
-            # 출력 토큰 자동 조정
-            max_tokens = min(max_tokens, 125000 - total_input_tokens)
-            logger.info(f"출력 토큰 자동 조정: {max_tokens}")
-        
-        logger.info(f"API 호출 예상 토큰: 입력 {total_input_tokens} + 출력 {max_tokens} = {total_tokens}")
-        for attempt in range(retries):
-            try:
-                # Rate Limit 방지를 위한 지연
-                if attempt > 0:
-                    wait_time = delay * (2 ** attempt)  # 지수적 백오프
-                    logger.info(f"API 재시도 대기: {wait_time}초")
-                    time.sleep(wait_time)
-                elif hasattr(self, '_last_api_call'):
-                    # 연속 호출 간 최소 간격 보장 (Rate Limit 방지)
-                    elapsed = time.time() - self._last_api_call
-                    min_interval = 0.5  # 500ms 최소 간격
-                    if elapsed < min_interval:
-                        sleep_time = min_interval - elapsed
-                        logger.info(f"Rate Limit 방지 대기: {sleep_time:.2f}초")
-                        time.sleep(sleep_time)
-                
-                # API 호출 시간 기록
-                self._last_api_call = time.time()
-                
-                # temperature 설정 (None이면 기본값 0.3 사용)
-                temp = temperature if temperature is not None else 0.3
-                
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temp,
-                    max_tokens=max_tokens
-                )
-                
-                # 성공 로깅
-                logger.info(f"✅ API 호출 성공 (시도 {attempt + 1}/{retries})")
-                
-                # 성공 시 다음 요청을 위한 짧은 지연
-                time.sleep(1)
-                return response
-                
-            except Exception as e:
-                error_str = str(e)
-                logger.warning(f"API 호출 시도 {attempt + 1}/{retries} 실패: {error_str}")
+    def acquire(self, tokens: int) -> None:
+        # 한 요청이 분당 한도보다 크면 버킷이 가득 찰 때까지만 기다림
+        needed = (1.0, min(float(tokens), self._capacity[1]))
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated_at
+                self._updated_at = now
+                for i, capacity in enumerate(self._capacity):
+                    self._available[i] = min(capacity, self._available[i] + elapsed * capacity / 60.0)
                 
-                # 다양한 에러 타입별 처리
-                if "429" in error_str or "rate" in error_str.lower():
-                    if attempt < retries - 1:
-                        wait_time = delay * (2 ** (attempt + 1))
-                        logger.warning(f"🚨 Rate Limit 감지, {wait_time}초 대기 후 재시도...")
-                        time.sleep(wait_time)
-                        continue
-                elif "context_length_exceeded" in error_str.lower() or ("token" in error_str.lower() and "exceed" in error_str.lower()):
-                    logger.error(f"🚨 토큰 수 초과 감지: {error_str}")
-                    logger.error(f"📊 예상 토큰: 입력 {sum(self._estimate_tokens(msg.get('content', '')) for msg in messages)} + 출력 {max_tokens}")
-                    # 토큰 수 초과 시 더 이상 재시도하지 않음
-                    break
-                elif "invalid_api_key" in error_str.lower() or "401" in error_str:
-                    logger.error(f"🚨 API 키 오류 감지: {error_str}")
-                    # API 키 오류 시 재시도 무의미
-                    break
+                if all(self._available[i] >= needed[i] for i in range(2)):
+                    for i in range(2):
+                        self._available[i] -= needed[i]
+                    return
                 
-                # 마지막 시도에서도 실패하면 None 반환 (예외 발생 대신)
-                if attempt == retries - 1:
-                    logger.error(f"❌ API 호출 최종 실패: {error_str}")
-                    return None
-        
-        logger.error("API 호출 최대 재시도 횟수 초과")
-        return None
-    
-    def format_extracted_text(self, pages: List[Dict[str, Any]], file_name: str) -> str:
-        """
-        OCR로 추출된 원본 텍스트를 GPT API로 보기 좋게 정리
-        
-        Args:
-            pages: PDF 페이지 데이터 리스트
-            file_name: PDF 파일명
-            
-        Returns:
-            GPT로 정리된 텍스트
-        """
-        try:
-            # 1. 원본 텍스트 합치기 (요약하지 않음)
-            raw_text = self._combine_extracted_text(pages)
-            
-            if not raw_text.strip():
-                return "❌ 추출된 텍스트가 없습니다."
-            
-            # 2. GPT 프롬프트 생성
-            prompt = self._create_formatting_prompt(raw_text, file_name, len(pages))
-            
-            # 3. GPT API 호출
-            logger.info("GPT API 호출 중...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 PDF 문서 텍스트를 깔끔하게 정리하는 전문가입니다. 내용을 요약하지 말고, 읽기 쉽게 구조화하고 포맷팅해주세요."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
-            
-            formatted_text = response.choices[0].message.content.strip()
-            
-            # 4. 기본 정보 추가
-            final_result = self._add_document_metadata(formatted_text, file_name, len(pages))
-            
-            logger.info("GPT 텍스트 정리 완료")
-            return final_result
-            
-        except Exception as e:
-            logger.error(f"GPT 텍스트 정리 중 오류: {e}")
-            # GPT 실패 시 기본 포맷 반환
-            return self._fallback_formatting(pages, file_name)
+                wait_time = max((needed[i] - self._available[i]) * 60.0 / self._capacity[i] for i in range(2))
+            logger.info(f"Rate Limit 방지 대기: {wait_time:.2f}초")
+            time.sleep(wait_time)
     
-    def summarize_extracted_text(self, pages: List[Dict[str, Any]], file_name: str) -> str:
-        """
-        추출된 텍스트를 GPT로 요약 (원하는 프로세스)
-        
-        Args:
-            pages: PDF 페이지 데이터 리스트
-            file_name: PDF 파일명
-            
-        Returns:
-            GPT로 생성된 요약
-        """
-        try:
-            raw_text = self._combine_extracted_text(pages)
-            
-            if not raw_text.strip():
-                return "❌ 요약할 텍스트가 없습니다."
-            
-            # 내용 전체 인식 프롬프트 (요약하지 않음)
-            prompt = f"""
-다음은 PDF 문서 "{file_name}"에서 OCR로 추출한 텍스트입니다.
-이 내용을 요약하지 말고, 전체 내용을 그대로 깔끔하게 정리해주세요.
+    def update_from_headers(self, headers) -> None:
+        """응답 헤더(x-ratelimit-remaining-*)의 실제 남은 한도가 더 작으면 그 값으로 맞춤"""
+        for i, name in enumerate(('x-ratelimit-remaining-requests', 'x-ratelimit-remaining-tokens')):
+            value = headers.get(name)
+            if value is None:
+                continue
+            try:
+                remaining = float(value)
+            except ValueError:
+                continue
+            with self._lock:
+                self._available[i] = min(self._available[i], remaining)
 
-추출된 텍스트:
-{raw_text}  # 전체 텍스트 포함
 
-정리 요구사항:
-1. ❌ 내용을 절대 요약하지 마세요 - 모든 페이지의 모든 정보를 보존해주세요
-2. ✅ 전체 페이지 전체 내용을 빠뜨리지 말고 모두 포함해주세요
-3. ✅ 각 페이지별로 구조화된 형태로 재구성 (제목, 목록, 표 등)
-4. ✅ **모든 표(테이블) 데이터는 반드시 마크다운 표 형식으로 정리해주세요**
-5. ✅ **다음 표들을 특히 정확하게 추출해주세요:**
-   - 위험보장 및 보험금 지급 표
-   - 해약환급금 예시표 (경과기간별) - **반드시 연도별/경과기간별 상세 데이터 포함**
-   - 갱신담보 보험료 예시표
-   - 모든 숫자, 금액, 비율 데이터가 포함된 표
-   - **해약환급금 관련 모든 표와 수치 데이터**
-6. ✅ OCR 오류나 오타는 자연스럽게 수정해주세요
-7. ✅ 페이지별로 섹션을 명확히 구분해주세요
-8. ✅ 마크다운 형식 사용 (## 제목, ** 강조, - 목록, | 표 |)
-9. ✅ 한국어는 자연스럽게, 영어/숫자는 원문 유지
-10. ✅ 중요한 정보는 굵게 표시해주세요
-11. ✅ 모든 페이지의 내용을 순서대로 나열해주세요
-12. ⚠️  **중요**: 전체 페이지 끝까지 모든 내용을 완성해주세요. 중간에 끊지 마세요!
+# 기본값은 gpt-4o-mini Tier 1 한도 (계정 등급에 맞게 환경변수로 조정)
+_RATE_LIMITER = _RateLimiter(
+    int(os.getenv('GPT_RPM_LIMIT', '500')),
+    int(os.getenv('GPT_TPM_LIMIT', '200000'))
+)
 
-표 데이터 예시:
+# 서킷 브레이커: 장애성 오류(타임아웃/연결/5xx, 429 제외)로 재시도를 모두 소진한 호출이 연속 5번이면 30초 동안 바로 대체 경로로
+_BREAKER_FAIL_THRESHOLD = 5
+_BREAKER_COOLDOWN = 30.0
+_BREAKER = {"fails": 0, "opened_at": 0.0}
+_BREAKER_LOCK = threading.Lock()
 
-**위험보장표:**
-| 담보명 | 보장금액 | 보험료(출생전) | 보험료(출생후) | 비고 |
-|--------|----------|----------------|----------------|------|
-| 상해후유장해 | 1억원 | 350원 | 1,820원 | 3~100% |
-| 암진단 | 1억원 | 2,230원 | 5,230원 | - |
 
-**해약환급금 예시표:**
-| 경과기간 | 납입보험료 | 해약환급금 | 환급률 |
-|----------|------------|------------|-------|
-| 03개월 | 246,870원 | 0원 | 0.0% |
-| 01년 | 987,480원 | 0원 | 0.0% |
-| 30년01개월 | 30,065,340원 | 14,806,968원 | 49.3% |
+def _breaker_is_open() -> bool:
+    """차단 중이면 True (쿨다운이 지나면 다음 호출 한 번은 통과시켜 복구 여부 확인)"""
+    with _BREAKER_LOCK:
+        return (_BREAKER["fails"] >= _BREAKER_FAIL_THRESHOLD
+                and time.time() - _BREAKER["opened_at"] < _BREAKER_COOLDOWN)
 
-**⚠️ 해약환급금 표 추출 시 주의사항:**
-- 연도별/경과기간별 모든 데이터를 빠뜨리지 말고 포함
-- 표 구조가 깨져도 숫자 데이터는 반드시 보존
-- "해약환급금", "환급금", "해약" 관련 모든 표와 수치 추출
 
-**갱신담보 보험료 예시표:**
-| 담보명 | 갱신주기 | 0차(현재) | 1차 보험료 | 증가율 | 2차 보험료 | 증가율 |
-|--------|----------|-----------|------------|--------|------------|--------|
-| 독감치료담보 | 20년 | 1,770원 | 313원 | -82.3% | 270원 | -13.7% |
-| 표적항암약물 | 10년 | 469원 | 511원 | 9.0% | 875원 | 71.2% |
+def _breaker_record_failure() -> None:
+    with _BREAKER_LOCK:
+        _BREAKER["fails"] += 1
+        if _BREAKER["fails"] >= _BREAKER_FAIL_THRESHOLD:
+            if _BREAKER["fails"] == _BREAKER_FAIL_THRESHOLD:
+                logger.warning(f"🚨 API 연속 실패 {_BREAKER_FAIL_THRESHOLD}회, {_BREAKER_COOLDOWN:.0f}초간 호출 차단")
+            _BREAKER["opened_at"] = time.time()
 
-결과 형식:
-# PDF 전체 내용: {file_name}
 
-## 📋 문서 정보
-[문서의 기본 정보]
+def _breaker_record_success() -> None:
+    with _BREAKER_LOCK:
+        _BREAKER["fails"] = 0
 
-## 📄 전체 내용
-[모든 내용을 구조화하여 표시 - 절대 요약하지 않음]
 
-### 📊 위험보장 및 보험금 지급 표
-[위험보장 관련 모든 표를 마크다운 형식으로 정리]
+# API 키 해시별 검증 결과 (별도 검증 호출 없이 첫 실제 호출 결과로 판정)
+_VALIDATED_KEYS = set()
+_INVALID_KEYS = set()
 
-### 💰 해약환급금 예시표
-[경과기간별 해약환급금 표를 완전히 정리]
+# GPT 응답 디스크 캐시 (GPT_SUMMARIZER_CACHE=1 일 때만 사용)
+# 같은 (모델, 메시지, 옵션) 요청은 API를 다시 호출하지 않고 저장된 응답을 반환
+_RESPONSE_CACHE_ENABLED = os.getenv('GPT_SUMMARIZER_CACHE') == '1'
+_RESPONSE_CACHE_PATH = os.path.expanduser(
+    os.getenv('GPT_SUMMARIZER_CACHE_PATH', '~/.cache/gpt_summarizer/responses.sqlite3')
+)
+_RESPONSE_CACHE_MAX_ENTRIES = 1000
+_RESPONSE_CACHE_LOCK = threading.Lock()
+_response_cache_db = None
 
-### 🔄 갱신담보 보험료 예시표  
-[갱신차수별 보험료 변동 표를 완전히 정리]
 
-### 📋 기타 모든 표 데이터
-[문서 내 모든 표 형태 데이터를 빠뜨리지 않고 정리]
-"""
+def _json_bytes(obj: Any) -> bytes:
+    """JSON을 UTF-8 bytes로 직렬화 (orjson이 있으면 str 중간 단계 없이 바로 bytes)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
 
-            # Rate Limit을 고려한 안전한 API 호출
-            messages = [
-                {
-                    "role": "system",
-                    "content": "당신은 PDF 문서 정리 전문가입니다. 내용을 요약하지 말고, 모든 정보를 보존하면서 읽기 쉽게 구조화해주세요."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-            
-            response = self._safe_api_call(
-                messages=messages, 
-                max_tokens=8000,  # 19페이지 전체 출력을 위해 대폭 확대
-                retries=3,
-                delay=2
-            )
-            
-            if response is None:
-                # GPT 실패 시 기본 텍스트 정리 시도
-                logger.warning("GPT API 실패, 기본 텍스트 포맷팅 사용")
-                return self._fallback_formatting(pages, file_name)
-            
-            summary = response.choices[0].message.content.strip()
-            
-            # 문서 메타데이터 추가
-            from datetime import datetime
-            metadata = f"""📄 PDF 요약 결과
-{'='*50}
 
-📁 파일명: {file_name}
-📑 페이지 수: {len(pages)}
-⏰ 요약 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-🤖 요약 방식: GPT API 사용
+def _json_loads(data):
+    """bytes/str JSON 파싱 (orjson이 있으면 디코딩 없이 bytes 그대로 파싱)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
 
-{'='*50}
 
-"""
-            
-            return metadata + summary
-            
-        except Exception as e:
-            logger.error(f"GPT 요약 중 오류: {e}")
-            return f"❌ 요약 생성 중 오류 발생: {str(e)}"
-    
-    def summarize_content(self, pages: List[Dict[str, Any]], file_name: str) -> str:
-        """
-        추출된 텍스트를 요약 (선택적 기능)
-        
-        Args:
-            pages: PDF 페이지 데이터 리스트
-            file_name: PDF 파일명
-            
-        Returns:
-            GPT로 생성된 요약
-        """
-        try:
-            raw_text = self._combine_extracted_text(pages)
-            
-            if not raw_text.strip():
-                return "❌ 요약할 텍스트가 없습니다."
-            
-            # 요약 프롬프트
-            prompt = f"""
-다음 PDF 문서의 내용을 한국어로 요약해주세요:
+def _response_cache_key(model: str, messages: List[Dict[str, str]], max_tokens: Optional[int],
+                        temperature: float) -> str:
+    request = {"m": model, "t": max_tokens, "temp": temperature, "msgs": messages}
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(request, option=orjson.OPT_SORT_KEYS)
+    else:
+        payload = json.dumps(request, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
-문서명: {file_name}
-페이지 수: {len(pages)}
 
-내용:
-{raw_text}  # 전체 텍스트 포함
+def _get_response_cache_db():
+    global _response_cache_db
+    if _response_cache_db is None:
+        os.makedirs(os.path.dirname(_RESPONSE_CACHE_PATH), exist_ok=True)
+        db = sqlite3.connect(_RESPONSE_CACHE_PATH, check_same_thread=False)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, content TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        _response_cache_db = db
+    return _response_cache_db
 
-요구사항:
-1. 핵심 내용만 간결하게 요약
-2. 중요한 키워드와 개념 포함
-3. 구조화된 형태로 작성
-4. 한국어 사용
-"""
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 문서 요약 전문가입니다. 핵심 내용을 놓치지 않고 간결하게 요약해주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=2000
+def _response_cache_get(key: str) -> Optional[str]:
+    try:
+        with _RESPONSE_CACHE_LOCK:
+            db = _get_response_cache_db()
+            row = db.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return row[0]
+    except Exception as e:
+        logger.warning(f"응답 캐시 조회 실패: {e}")
+        return None
+
+
+def _response_cache_put(key: str, content: str) -> None:
+    try:
+        with _RESPONSE_CACHE_LOCK:
+            db = _get_response_cache_db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, content, accessed_at) VALUES (?, ?, ?)",
+                (key, content, time.time())
             )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            logger.error(f"GPT 요약 중 오류: {e}")
-            return f"❌ 요약 생성 중 오류 발생: {str(e)}"
-    
-    def _combine_extracted_text(self, pages: List[Dict[str, Any]]) -> str:
-        """모든 페이지의 텍스트를 합치기 (전체 내용 보존)"""
-        all_text = ""
-        
-        # 타입 안전성 확인
-        if not isinstance(pages, list):
-            logger.error(f"Expected list, got {type(pages)}")
-            return ""
-        
-        total_pages = len(pages)
-        logger.info(f"GPT 텍스트 조합 시작: 총 {total_pages} 페이지")
-        
-        for i, page in enumerate(pages):
-            # 각 페이지가 딕셔너리인지 확인
-            if not isinstance(page, dict):
-                logger.error(f"Page {i} is not dict: {type(page)}")
-                continue
-                
-            page_num = page.get('page_number', i+1)
-            text = page.get('text', '')
-            ocr_text = page.get('ocr_text', '')
-            
-            # 해약환급금 관련 페이지 특별 표시
-            is_surrender_page = any(keyword in text for keyword in ['해약환급금', '환급금', '경과기간'])
-            page_marker = f"\n\n=== 페이지 {page_num}/{total_pages} {'[해약환급금 관련]' if is_surrender_page else ''} ===\n"
-            all_text += page_marker
-            
-            if is_surrender_page:
-                logger.info(f"해약환급금 관련 페이지 {page_num} GPT 텍스트에 포함")
-            
-            # 기본 텍스트 추가 (더 많은 내용 포함)
-            if text.strip():
-                all_text += text.strip() + "\n"
-            
-            # OCR 텍스트 추가 (구분하여 표시)
-            if ocr_text.strip():
-                if text.strip():
-                    all_text += "\n[OCR로 추가 추출된 텍스트]\n"
-                all_text += ocr_text.strip() + "\n"
-            
-            # 페이지에 텍스트가 없는 경우 표시
-            if not text.strip() and not ocr_text.strip():
-                all_text += "[이 페이지에서 텍스트를 추출할 수 없습니다]\n"
-        
-        logger.info(f"전체 텍스트 길이: {len(all_text)} 자, 총 {total_pages} 페이지")
-        return all_text
-    
-    def _create_formatting_prompt(self, raw_text: str, file_name: str, page_count: int) -> str:
-        """GPT 포맷팅용 프롬프트 생성"""
-        return f"""
-다음은 PDF "{file_name}"에서 OCR로 추출한 원본 텍스트입니다.
-내용을 요약하지 말고, 읽기 쉽게 정리만 해주세요.
+            # 오래 사용되지 않은 항목부터 정리 (LRU)
+            db.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT ?)",
+                (_RESPONSE_CACHE_MAX_ENTRIES,)
+            )
+            db.commit()
+    except Exception as e:
+        logger.warning(f"응답 캐시 저장 실패: {e}")
 
-문서 정보:
-- 파일명: {file_name}
-- 페이지 수: {page_count}
 
-원본 텍스트:
-{raw_text}  # 전체 텍스트 포함
+def _cached_response(content: str):
+    """캐시/스트리밍으로 받은 내용을 OpenAI 응답과 같은 형태(response.choices[0].message.content)로 감싸기"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
 
-정리 요구사항:
-1. 내용을 절대 요약하지 마세요 - 모든 정보를 보존
-2. 구조화된 형태로 재구성 (제목, 목록, 표 등)
-3. 오타나 OCR 오류는 자연스럽게 수정
-4. 문단과 섹션을 명확히 구분
-5. 마크다운 형식 사용 (제목: ##, 목록: -, 강조: **)
-6. 중요한 정보는 굵게 표시
-7. 한국어는 자연스럽게, 영어는 원문 유지
 
-결과 형식:
-# 문서 제목 (파일명 기반)
+# 의미 기반 응답 캐시 (GPT_SEMANTIC_CACHE=1 일 때만 사용)
+# 같은 문서(원문 전체 해시 일치)를 다시 열면 이전 분석 결과를 재사용
+# 임베딩 유사도 조회는 호출 측이 semantic_similar=True로 허용한 작업만 (앞부분만 임베딩하므로 숫자가 다른 문서도 적중 가능)
+_SEMANTIC_CACHE_ENABLED = os.getenv('GPT_SEMANTIC_CACHE') == '1'
+_SEMANTIC_CACHE_THRESHOLD = 0.92  # 코사인 유사도
+_SEMANTIC_CACHE_TTL = 24 * 3600  # 24시간
+_SEMANTIC_CACHE_MAX_ENTRIES = 1000
+_SEMANTIC_EMBED_CHARS = 2000  # 임베딩에 사용할 앞부분 길이
 
-## 개요
-[문서의 기본 정보]
 
-## 주요 내용
-[구조화된 전체 내용]
-"""
+class _SemanticCache:
+    """작업별 응답 캐시: 해시 정확 일치(L1) 후 임베딩 유사도(L2)로 조회"""
     
-    def _add_document_metadata(self, formatted_text: str, file_name: str, page_count: int) -> str:
-        """문서 메타데이터 추가"""
-        from datetime import datetime
-        
-        metadata = f"""📄 PDF 문서 정리 결과
-{'='*50}
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 해시 -> (작업, 단위 임베딩 또는 None, 응답, 저장 시각), 오래 안 쓴 항목이 앞쪽
+        self._entries = OrderedDict()
+    
+    @staticmethod
+    def exact_key(task: str, text: str) -> str:
+        return hashlib.sha256(f"{PROMPT_VERSION}\0{task}\0{text}".encode('utf-8')).hexdigest()
+    
+    def _is_fresh(self, stored_at: float) -> bool:
+        return time.time() - stored_at < _SEMANTIC_CACHE_TTL
+    
+    def get_exact(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._is_fresh(entry[3]):
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+    
+    def get_similar(self, task: str, embedding) -> Optional[str]:
+        import numpy as np
+        with self._lock:
+            candidates = [(key, entry) for key, entry in self._entries.items()
+                          if entry[0] == task and entry[1] is not None and self._is_fresh(entry[3])]
+            if not candidates:
+                return None
+            similarities = np.stack([entry[1] for _, entry in candidates]) @ embedding
+            best = int(similarities.argmax())
+            if similarities[best] < _SEMANTIC_CACHE_THRESHOLD:
+                return None
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            logger.info(f"의미 캐시 유사도: {similarities[best]:.3f}")
+            return entry[2]
+    
+    def put(self, key: str, task: str, embedding, content: str) -> None:
+        with self._lock:
+            self._entries[key] = (task, embedding, content, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > _SEMANTIC_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
 
-📁 파일명: {file_name}
-📑 페이지 수: {page_count}
-⏰ 처리 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-🤖 정리 방식: GPT API 사용
 
-{'='*50}
+_SEMANTIC_CACHE = _SemanticCache()
 
-"""
-        return metadata + formatted_text
-    
-    def _fallback_formatting(self, pages: List[Dict[str, Any]], file_name: str) -> str:
-        """GPT 실패 시 기본 포맷팅"""
-        from datetime import datetime
-        
-        result = f"""📄 PDF 텍스트 추출 결과 (기본 모드)
-{'='*50}
 
-📁 파일명: {file_name}
-📑 페이지 수: {len(pages)}
-⏰ 처리 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-⚠️  GPT API 사용 불가 - 기본 포맷 적용
+# _smart_truncate_text 결과 캐시: (모델, 토큰 제한, 원문 해시) -> (절단 텍스트, 토큰 수)
+_TRUNCATE_CACHE = OrderedDict()
+_TRUNCATE_CACHE_MAX_ENTRIES = 64
+_TRUNCATE_CACHE_LOCK = threading.Lock()
 
-{'='*50}
+# 문장별 토큰 수 캐시: (모델, 원문 해시) -> 문장별 토큰 수 리스트 (토큰 제한이 달라도 재사용)
+_SENTENCE_TOKENS_CACHE = OrderedDict()
+_SENTENCE_TOKENS_CACHE_MAX_ENTRIES = 16
+_SENTENCE_TOKENS_CACHE_LOCK = threading.Lock()
 
-"""
-        
-        # 페이지별 텍스트 추가
-        for i, page in enumerate(pages):
-            # 각 페이지가 딕셔너리인지 확인
-            if not isinstance(page, dict):
-                continue
-                
-            page_num = page.get('page_number', i+1)
-            text = page.get('text', '')
-            ocr_text = page.get('ocr_text', '')
-            
-            result += f"\n## 페이지 {page_num}\n"
-            result += "-" * 20 + "\n"
-            
-            if text.strip():
-                result += text.strip() + "\n\n"
-            
-            if ocr_text.strip():
-                result += "**[OCR 텍스트]**\n"
-                result += ocr_text.strip() + "\n\n"
-        
-        return result
-    
-    def analyze_for_comparison(self, pages: List[Dict[str, Any]], file_name: str) -> str:
-        """
-        상품 비교용 핵심 정보 추출 및 분석
-        
-        Args:
-            pages: PDF 페이지 데이터 리스트
-            file_name: PDF 파일명
-            
-        Returns:
-            비교 분석에 특화된 구조화된 정보
-        """
-        try:
-            raw_text = self._combine_extracted_text(pages)
-            
-            if not raw_text.strip():
-                return "❌ 분석할 텍스트가 없습니다."
-            
-            # 토큰 제한 고려한 스마트 절단 (비교 분석용 - 전체 보존)
-            smart_text = self._smart_truncate_text(raw_text, max_input_tokens=80000)
-            
-            # 비교 분석용 특화 프롬프트
-            prompt = f"""
-다음은 보험 상품 문서 "{file_name}"에서 추출한 텍스트입니다.
-이 상품을 다른 상품과 비교하기 위한 핵심 정보를 체계적으로 분석해주세요.
+# _estimate_tokens 결과 캐시: (모델, 텍스트 해시) -> 토큰 수 (원문을 키로 두지 않아 큰 텍스트 사본이 남지 않음)
+_TOKEN_COUNT_CACHE = OrderedDict()
+_TOKEN_COUNT_CACHE_MAX_ENTRIES = 2048
+_TOKEN_COUNT_CACHE_LOCK = threading.Lock()
 
-추출된 텍스트:
-{smart_text}
 
-분석 요구사항:
-1. **상품 기본 정보**
-   - 상품명, 상품 코드
-   - 상품 타입 (어린이보험, 종합보험, 암보험 등)
-   - 보험 회사명
+# BPE 파일을 재시작 후에도 디스크에서 재사용 (매번 다시 받지 않도록)
+# tiktoken 기본값은 공용 /tmp 아래이므로, 배포 설정에 TIKTOKEN_CACHE_DIR가 없으면 사용자 전용(0700) 디렉터리 사용
+_TIKTOKEN_CACHE_DIR = os.path.expanduser("~/.cache/goodrich_prf_ocr/tiktoken")
 
-2. **보험료 정보** 🚨 중요: 모든 금액은 원본 문서의 정확한 숫자를 그대로 사용하세요
-   - 월 보험료 (예: 92,540원처럼 원본 그대로, 절대 반올림하거나 수정하지 마세요)
-   - 납입 방식 (월납, 연납 등)
-   - 납입 기간
-   - **만기 기간** (예: 30세, 80세, 100세, 종신 등 - 반드시 포함)
-   
-   ⚠️ 금액 표기 주의사항:
-   - 92,540원은 그대로 92,540원으로 표기
-   - 절대 92,000원이나 93,000원으로 반올림하지 않기
-   - 모든 숫자는 원본 텍스트에서 발견한 그대로 정확히 복사
 
-3. **핵심 보장 내용**
-   - 기본 보장 (주계약)
-   - 주요 특약 보장 (상위 5개)
-   - 보장 금액 및 범위
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str):
+    """모델별 tiktoken 인코딩 (BPE 테이블 로딩 비용이 커서 한 번만 생성)"""
+    if 'TIKTOKEN_CACHE_DIR' not in os.environ:
+        # import 시점이 아니라 인코딩을 처음 불러올 때만 설정 (디렉터리를 못 만들면 tiktoken 기본값 사용)
+        try:
+            os.makedirs(_TIKTOKEN_CACHE_DIR, mode=0o700, exist_ok=True)
+            os.environ['TIKTOKEN_CACHE_DIR'] = _TIKTOKEN_CACHE_DIR
+        except OSError as e:
+            logger.warning(f"tiktoken 캐시 디렉터리 생성 실패: {e}")
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        # tiktoken이 모르는 모델명이면 매번 예외가 나지 않도록 gpt-4o 계열 인코딩 사용
+        logger.warning(f"tiktoken에 등록되지 않은 모델: {model_name}, o200k_base 인코딩 사용")
+        return tiktoken.get_encoding("o200k_base")
 
-4. **비교 우위 요소**
-   - 이 상품만의 독특한 보장
-   - 타 상품 대비 유리한 점
-   - 보험료 경쟁력
 
-5. **해약/환급 정보**
-   - 환급 방식 (무해지환급형, 저해지환급형 등)
-   - 만기 환급률 또는 조건
+# 한글 음절 (tiktoken 없을 때 토큰 근사치 계산용)
+_HANGUL_RE = re.compile(r'[\uAC00-\uD7A3]')
 
-6. **대상 고객**
-   - 주요 타겟 연령층
-   - 추천 상황
+# 해약환급금 관련 페이지 표시용 키워드 ('해약환급금'은 '환급금'에 포함됨)
+_SURRENDER_PAGE_KEYWORDS = ('환급금', '경과기간')
 
-결과 형식:
-# 🏷️ 상품 비교 분석: {file_name}
+# TableParser가 해약환급금 표 섹션을 시작하는 키워드 (둘 다 없는 페이지는 항상 빈 결과)
+_SURRENDER_TABLE_START_KEYWORDS = ('해약환급금 예시', '경과기간')
 
-## 📋 기본 정보
-- **상품명**: [정확한 상품명]
-- **상품코드**: [코드]
-- **상품타입**: [카테고리]
-- **회사**: [보험사명]
+# 해약환급금 분석용 줄 필터 (해약환급금/환급금/해약/환급/경과기간/납입보험료 - 긴 키워드는 짧은 키워드에 포함됨)
+_SURRENDER_LINE_RE = re.compile('해약|환급|경과기간|납입보험료')
 
-## 💰 보험료 정보 🚨 숫자 변경 절대 금지
-- **월보험료**: [원본 문서의 정확한 금액 - 예: 92,540원]
-- **납입방식**: [방식]
-- **납입기간**: [기간]
-- **만기기간**: [만기 - 예: 30세, 80세, 100세, 종신]
+# 금액 단위 정규화 패턴 (_normalize_currency_units)
+# 1. 천원 단위 (예: 1,000천원, 1000천원)
+_RE_THOUSAND = re.compile(r'([0-9,]+)\s*천원')
+# 2. 만원 단위 (예: 1,000만원, 1000만원)
+_RE_TEN_THOUSAND = re.compile(r'([0-9,]+)\s*만원')
+# 3. 억원 단위 (예: 1억원, 1.5억원)
+_RE_HUNDRED_MILLION = re.compile(r'([0-9.]+)\s*억원')
+# 4. 숫자만 있는 경우 (원이 없는 경우) - 보험료 관련 문맥에서 숫자만 있으면 원 단위로 가정
+_RE_PREMIUM_CTX = re.compile(r'(월보험료|보험료|납입|보장금액|지급금액)[:：]\s*([0-9,]+)(?![원천만억])')
 
-💡 **금액 표기 원칙**: 
-- 문서에서 찾은 정확한 금액을 그대로 표기
-- 절대 반올림하지 않음 (예: 92,540원 → 92,000원 변경 금지)
 
-## 🛡️ 핵심 보장
-### 기본보장 (주계약)
-- [주계약 내용 및 금액]
+# 중복 제거 기준 (짧은 줄/문단은 표 값 등 의미 있는 반복일 수 있으므로 유지)
+_DEDUPE_MIN_LINE_CHARS = 20
+_DEDUPE_MIN_PARAGRAPH_CHARS = 80
+_DEDUPE_SHINGLE_SIZE = 5
+_DEDUPE_JACCARD_THRESHOLD = 0.9
+# 숫자나 '|'가 있는 줄/문단은 표 행일 수 있으므로 중복이어도 제거하지 않음 (플랜/성별별 표는 같은 행이 반복됨)
+_RE_TABLE_CHARS = re.compile(r'[0-9|]')
 
-### 주요 특약 TOP 5
-1. [특약명] - [보장금액] - [특징]
-2. [특약명] - [보장금액] - [특징]
-3. [특약명] - [보장금액] - [특징]
-4. [특약명] - [보장금액] - [특징]
-5. [특약명] - [보장금액] - [특징]
+# PDF 본문 공백 압축 (토큰만 차지하는 연속 공백/탭과 3줄 이상의 빈 줄)
+_RE_INLINE_SPACES = re.compile(r'[ \t]{2,}')
+_RE_EXTRA_BLANK_LINES = re.compile(r'\n{3,}')
 
 
-"""
-            messages = [
-                {
-                    "role": "system",
-                    "content": "당신은 보험상품 비교 분석 전문가입니다. 상품의 핵심 경쟁력과 차별화 요소를 정확히 파악하여 비교에 최적화된 정보를 제공해주세요. 🚨 중요: 모든 금액과 숫자는 원본 문서의 정확한 값을 그대로 사용하고, 절대 반올림하거나 수정하지 마세요."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-            
-            response = self._safe_api_call(
-                messages=messages,
-                max_tokens=6000,  # 더 상세한 분석을 위해 증가
-                retries=3,
-                delay=2
-            )
-            
-            if response is None:
-                # GPT 실패 시 기본 텍스트 정리 시도
-                logger.warning("GPT API 실패, 기본 텍스트 포맷팅 사용")
-                return self._fallback_formatting(pages, file_name)
-            
-            analysis = response.choices[0].message.content.strip()
-            
-            # 메타데이터 추가
-            from datetime import datetime
-            metadata = f"""📊 상품 비교 분석 결과
-{'='*50}
+def _shingles(paragraph: str) -> frozenset:
+    """공백을 제거한 문단의 문자 5-gram 집합"""
+    compact = ''.join(paragraph.split())
+    return frozenset(compact[i:i + _DEDUPE_SHINGLE_SIZE]
+                     for i in range(len(compact) - _DEDUPE_SHINGLE_SIZE + 1))
 
-📁 파일명: {file_name}
-📑 페이지 수: {len(pages)}
-⏰ 분석 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-🎯 분석 목적: 상품 비교용 핵심 정보 추출
 
-{'='*50}
-
-"""
-            
-            return metadata + analysis
-            
-        except Exception as e:
-            logger.error(f"상품 비교 분석 중 오류: {e}")
-            return f"❌ 비교 분석 생성 중 오류 발생: {str(e)}"
+def _dedupe_lines(raw_text: str) -> str:
+    """
+    반복되는 머리글/바닥글/안내 문구를 제거합니다.
     
-    def analyze_products_comparison(self, pages1: List[Dict[str, Any]], file1_name: str, 
-                                    pages2: List[Dict[str, Any]], file2_name: str, 
-                                    custom_prompt: str = "",
-                                    required_coverages: Optional[List[str]] = None) -> str:
-        """
-        두 보험상품의 직접적인 비교 분석을 수행합니다.
-        
-        Args:
-            pages1: 첫 번째 상품 페이지 데이터
-            file1_name: 첫 번째 상품 파일명
-            pages2: 두 번째 상품 페이지 데이터
-            file2_name: 두 번째 상품 파일명
-            
-        Returns:
-            두 상품의 종합적인 비교 분석 결과
-        """
-        try:
-            # 두 상품의 텍스트 추출
-            text1 = self._combine_extracted_text(pages1)
-            text2 = self._combine_extracted_text(pages2)
-            
-            if not text1.strip() or not text2.strip():
-                return "❌ 비교할 텍스트가 충분하지 않습니다."
-            
-            # 금액 단위 정규화 (두 상품 모두)
-            normalized_text1 = self._normalize_currency_units(text1)
-            normalized_text2 = self._normalize_currency_units(text2)
-            
-            # 토큰 제한 고려한 스마트 절단 (두 상품 모두)
-            smart_text1 = self._smart_truncate_text(normalized_text1, max_input_tokens=40000)
-            smart_text2 = self._smart_truncate_text(normalized_text2, max_input_tokens=40000)
-            
-            pages1_count = len(pages1)
-            pages2_count = len(pages2)
-            product1_label = file1_name or "상품 A"
-            product2_label = file2_name or "상품 B"
-            
-            # 표 데이터 추출 및 주입
-            table_data1 = self._extract_table_data_from_pages(pages1)
-            table_data2 = self._extract_table_data_from_pages(pages2)
-            
-            # 필수 담보 지침
-            required_coverages = required_coverages or []
+    0. 연속 공백/탭은 한 칸으로, 줄 앞뒤 공백은 제거, 3줄 이상 빈 줄은 한 줄로 압축
+    1. 같은 줄이 다시 나오면 첫 번째만 남김 (짧은 줄, 숫자나 '|'가 있는 줄은 제외)
+    2. 앞 문단과 5-gram Jaccard 유사도가 0.9를 넘는 문단은 제거 (숫자나 '|'가 있는 문단은 제외)
+    """
+    seen_lines = set()
+    kept_lines = []
+    for line in _RE_INLINE_SPACES.sub(' ', raw_text).split('\n'):
+        stripped = line.strip()
+        if len(stripped) >= _DEDUPE_MIN_LINE_CHARS and not _RE_TABLE_CHARS.search(stripped):
+            line_hash = hashlib.blake2b(stripped.encode('utf-8'), digest_size=8).digest()
+            if line_hash in seen_lines:
+                continue
+            seen_lines.add(line_hash)
+        kept_lines.append(stripped)
+    
+    kept_paragraphs = []
+    seen_shingles = []  # (shingle 수, shingle 집합)
+    for paragraph in _RE_EXTRA_BLANK_LINES.sub('\n\n', '\n'.join(kept_lines)).split('\n\n'):
+        if len(paragraph) >= _DEDUPE_MIN_PARAGRAPH_CHARS and not _RE_TABLE_CHARS.search(paragraph):
+            shingles = _shingles(paragraph)
+            size = len(shingles)
+            # Jaccard >= t 이려면 두 집합 크기 비율도 t 이상이어야 하므로 크기로 먼저 거름
+            if size and any(
+                other_size * _DEDUPE_JACCARD_THRESHOLD <= size <= other_size / _DEDUPE_JACCARD_THRESHOLD
+                and len(shingles & other) > _DEDUPE_JACCARD_THRESHOLD * len(shingles | other)
+                for other_size, other in seen_shingles
+            ):
+                continue
+            seen_shingles.append((size, shingles))
+        kept_paragraphs.append(paragraph)
+    
+    return '\n\n'.join(kept_paragraphs)
 
-            # 1단계: 담보 리스트 추출 (일관성 확보를 위해 먼저 추출)
-            # 주석: 담보 리스트를 먼저 추출하여 순서를 고정하지만, 실패 시에도 프롬프트에서 순서 강제
-            coverage_list = self._extract_coverage_list(smart_text1, smart_text2, product1_label, product2_label)
-            
-            user_instruction = ""
-            if custom_prompt:
-                user_instruction = f"""
-🚨 **사용자 특별 요청사항**:
-{custom_prompt}
 
-위 요청사항을 반드시 우선적으로 고려하여 분석을 진행해주세요.
-"""
-            
-            required_coverage_section = ""
-            if required_coverages:
-                coverage_lines = "\n".join(f"- {coverage}" for coverage in required_coverages)
-                required_coverage_section = (
-                    "🚨 **반드시 표에 포함해야 하는 담보 목록**:\n"
-                    f"{coverage_lines}\n\n"
-                    "위 담보는 문서에 해당 정보가 없어도 표에 행을 추가하고 값은 '해당 없음'으로 명시하세요.\n"
-                )
-            
-            # 추출된 담보 리스트 섹션
-            coverage_list_section = ""
-            if coverage_list:
-                coverage_list_section = f"""
-🚨 **추출된 담보 리스트 (매우 중요 - 반드시 이 순서대로 표시하세요)**:
+def _replace_thousand(match):
+    amount = match.group(1).replace(',', '')
+    try:
+        value = int(amount) * 1000
+        return f"{value:,}원"
+    except:
+        return match.group(0)
 
-{coverage_list}
 
-⚠️ **중요**: 위 담보 리스트는 두 문서에서 추출한 모든 담보 항목입니다.
-반드시 위 순서대로 표에 나열하세요. 순서를 절대 변경하지 마세요.
-문서에 없는 담보는 '해당 없음'으로 표시하되, 위 순서는 반드시 유지하세요.
-"""
-            else:
-                # 담보 리스트 추출 실패 시 프롬프트에 담보 순서 강조
-                coverage_list_section = """
-🚨 **담보 항목 순서 (매우 중요 - 반드시 이 순서대로 표시하세요)**:
-다음 순서를 정확히 준수하여 담보를 나열하세요:
+def _replace_ten_thousand(match):
+    amount = match.group(1).replace(',', '')
+    try:
+        value = int(amount) * 10000
+        return f"{value:,}원"
+    except:
+        return match.group(0)
 
-**카테고리 1: 기본계약 관련**
-1. 기본계약(상해후유장해)
-2. 보험료납입면제대상담보
 
-**카테고리 2: 상해 관련 담보**
-3. 골절진단담보
-4. 화상진단담보
-5. 상해입원일당(1-180일)담보
-6. 상해입원일당(1-180일, 중환자실)담보
-7. 상해입원일당(1-30일)담보
-8. 상해수술 II (1-5종)(1종)담보
-9. 상해수술 II (1-5종)(2종)담보
-10. 상해수술 II (1-5종)(3종)담보
-11. 상해수술 II (1-5종)(4종)담보
-12. 상해수술 II (1-5종)(5종)담보
-13. 상해통원수술 II 담보
-14. 상해흉터성형수술 II 담보
-15. 상해입원수술 II 담보
+def _replace_hundred_million(match):
+    amount = match.group(1)
+    try:
+        value = float(amount) * 100000000
+        return f"{int(value):,}원"
+    except:
+        return match.group(0)
 
-**카테고리 3: 질병 관련 담보**
-16. 질병입원일당 II (1-180일)담보
-17. 질병입원일당 II (1-180일, 중환자실)담보
-18. 질병수술담보
 
-**카테고리 4: 암 관련 담보**
-19. 암진단 II (유사암제외)담보
-20. 유사암진단 II 담보
+def _add_won_unit(match):
+    prefix = match.group(1)
+    amount = match.group(2)
+    return f"{prefix}: {amount}원"
 
-**카테고리 5: 심혈관/뇌혈관 질환 담보**
-21. 심혈관질환(특정 I,I49제외)진단담보
-22. 심혈관질환(I49)진단담보
-23. 뇌혈관질환(I)진단담보
 
-**카테고리 6: 기타 특수 담보**
-24. 특정감염병 II 입원일당(1-30일)담보
-25. 기타 특수 질환 담보
+# summarize_extracted_text 프롬프트 (정적 부분은 모듈 로드 시 한 번만 생성)
+_SUMMARY_PROMPT_HEAD = """
+다음은 PDF 문서 "{file_name}"에서 OCR로 추출한 텍스트입니다.
+이 내용을 요약하지 말고, 전체 내용을 그대로 깔끔하게 정리해주세요.
 
-⚠️ 위 순서를 정확히 준수하여 담보를 나열하세요. 순서를 절대 변경하지 마세요.
+추출된 텍스트:
 """
 
-            prompt = f"""
-아래에는 두 가지 보험 상품의 보장 내역이 있습니다. 
-이 두 상품을 비교하여 3개 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)의 헤더와 표만 출력하세요.
-🚨 중요: 3개 표 섹션의 헤더와 표만 출력하고, 표 이외의 부가 설명 텍스트, 분석 문단, 비교 설명을 절대 작성하지 마세요.
-
-단, 동일한 항목명이 완전히 일치하지 않더라도 '의미상 유사한 항목'은 같은 줄에 매칭하세요.
-예를 들어 하나의 상해입원일당 상품 담보 리스트에서 종합병원, 중환자실이 추가되면, 이는 큰 담보리스트에서 세부화된 리스트입니다.
-비교 시, 보장 항목명에 포함된 숫자(금액, 기간, 납입년수)는 모두 수치로 인식하고, 단위(천원, 만원, 원)를 통일하여 비교하세요.
+_SUMMARY_PROMPT_TAIL = """  # 전체 텍스트 포함
 
-{user_instruction}
+정리 요구사항:
+1. ❌ 내용을 절대 요약하지 마세요 - 모든 페이지의 모든 정보를 보존해주세요
+2. ✅ 전체 페이지 전체 내용을 빠뜨리지 말고 모두 포함해주세요
+3. ✅ 각 페이지별로 구조화된 형태로 재구성 (제목, 목록, 표 등)
+4. ✅ **모든 표(테이블) 데이터는 반드시 마크다운 표 형식으로 정리해주세요**
+5. ✅ **다음 표들을 특히 정확하게 추출해주세요:**
+   - 위험보장 및 보험금 지급 표
+   - 해약환급금 예시표 (경과기간별) - **반드시 연도별/경과기간별 상세 데이터 포함**
+   - 갱신담보 보험료 예시표
+   - 모든 숫자, 금액, 비율 데이터가 포함된 표
+   - **해약환급금 관련 모든 표와 수치 데이터**
+6. ✅ OCR 오류나 오타는 자연스럽게 수정해주세요
+7. ✅ 페이지별로 섹션을 명확히 구분해주세요
+8. ✅ 마크다운 형식 사용 (## 제목, ** 강조, - 목록, | 표 |)
+9. ✅ 한국어는 자연스럽게, 영어/숫자는 원문 유지
+10. ✅ 중요한 정보는 굵게 표시해주세요
+11. ✅ 모든 페이지의 내용을 순서대로 나열해주세요
+12. ⚠️  **중요**: 전체 페이지 끝까지 모든 내용을 완성해주세요. 중간에 끊지 마세요!
 
-{required_coverage_section.strip()}
+표 데이터 예시:
 
-{coverage_list_section}
+**위험보장표:**
+| 담보명 | 보장금액 | 보험료(출생전) | 보험료(출생후) | 비고 |
+|--------|----------|----------------|----------------|------|
+| 상해후유장해 | 1억원 | 350원 | 1,820원 | 3~100% |
+| 암진단 | 1억원 | 2,230원 | 5,230원 | - |
 
-**📊 표 데이터 (매우 중요 - 정확한 수치 비교용)**:
-🚨 **절대 중요**: 아래 표 데이터는 PDF에서 추출한 정확한 숫자 정보입니다. 
-반드시 이 표 데이터의 숫자를 우선적으로 사용하세요. 추출된 텍스트와 다를 경우 표 데이터를 기준으로 하세요.
+**해약환급금 예시표:**
+| 경과기간 | 납입보험료 | 해약환급금 | 환급률 |
+|----------|------------|------------|-------|
+| 03개월 | 246,870원 | 0원 | 0.0% |
+| 01년 | 987,480원 | 0원 | 0.0% |
+| 30년01개월 | 30,065,340원 | 14,806,968원 | 49.3% |
 
-{product1_label} 표 데이터: {table_data1}
-{product2_label} 표 데이터: {table_data2}
+**⚠️ 해약환급금 표 추출 시 주의사항:**
+- 연도별/경과기간별 모든 데이터를 빠뜨리지 말고 포함
+- 표 구조가 깨져도 숫자 데이터는 반드시 보존
+- "해약환급금", "환급금", "해약" 관련 모든 표와 수치 추출
 
-⚠️ **숫자 인식 주의사항**:
-- 표 데이터의 모든 숫자(보험료, 가입금액, 기간 등)를 정확히 그대로 사용하세요.
-- 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원 → 1,270원 그대로, 4,380원 → 4,380원 그대로)
-- 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 2,405원)
-- 표 데이터에 없는 정보만 추출된 텍스트에서 보완하세요.
+**갱신담보 보험료 예시표:**
+| 담보명 | 갱신주기 | 0차(현재) | 1차 보험료 | 증가율 | 2차 보험료 | 증가율 |
+|--------|----------|-----------|------------|--------|------------|--------|
+| 독감치료담보 | 20년 | 1,770원 | 313원 | -82.3% | 270원 | -13.7% |
+| 표적항암약물 | 10년 | 469원 | 511원 | 9.0% | 875원 | 71.2% |
 
-**{product1_label}**: {file1_name}
-페이지 수: {pages1_count}
-추출된 텍스트:
-{smart_text1}
+결과 형식:
+# PDF 전체 내용: {file_name}
 
-**{product2_label}**: {file2_name}  
-페이지 수: {pages2_count}
-추출된 텍스트:
-{smart_text2}
+## 📋 문서 정보
+[문서의 기본 정보]
 
-[출력 지침]
+## 📄 전체 내용
+[모든 내용을 구조화하여 표시 - 절대 요약하지 않음]
 
-1. **기본 정보 추출**
-   - 상품명, 상품코드, 상품타입, 보험회사를 정확히 추출하세요
-   - 🚨 **숫자 인식 정확성 (매우 중요)**:
-     - **표 데이터를 최우선으로 사용하세요.** 표 데이터에 있는 모든 숫자는 정확히 그대로 사용하세요.
-     - 모든 금액(보험료, 가입금액 등)은 원본 문서의 정확한 숫자를 그대로 사용하세요.
-     - 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원은 절대 1,000원이나 1,300원으로 변경하지 마세요)
-     - 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 4,380원, 2,405원)
-     - 표 데이터와 추출된 텍스트가 다를 경우 표 데이터를 기준으로 하세요.
-   - 💰 **금액 단위 통일**: 모든 금액은 원 단위로 통일하여 비교하세요
-     (천원, 만원, 억원 등은 모두 원 단위로 변환하여 표시)
-     ⚠️ 중요: 금액 표기 시 "천원", "만원", "억원" 같은 단위를 절대 사용하지 마세요.
-     반드시 숫자만 계산하여 "원" 단위로만 표기하세요. (예: "1,000천원" → "1,000,000원", "100만원" → "1,000,000원")
-     - 변환 시에도 정확한 숫자를 사용하세요. (예: "20만원" → "200,000원", "5백만원" → "5,000,000원")
-   - 📅 **만기기간 표기**: 만기기간은 상품 문서에 있는 그대로 표기하세요 (예: "100세 만기", "30세 만기", "20년납100세만기")
-     만기기간의 차이점은 계산하지 말고 반드시 "-"로 표기하세요.
-   - 💵 **총보험료 계산 (매우 중요)**:
-     - 총보험료는 반드시 계산하여 표에 포함하세요.
-     - 계산 공식: 총보험료 = 월보험료 × 납입기간(년) × 12개월
-     - 예: 월보험료 55,030원, 납입기간 20년 → 총보험료 = 55,030 × 20 × 12 = 13,207,200원
-     - 예: 월보험료 87,066원, 납입기간 20년 → 총보험료 = 87,066 × 20 × 12 = 20,895,840원
-     - 차이점은 두 상품의 총보험료 차이를 계산하여 표시하세요.
-     - 천 단위 구분 기호(쉼표)를 정확히 사용하세요. (예: 13,207,200원, 20,895,840원)
+### 📊 위험보장 및 보험금 지급 표
+[위험보장 관련 모든 표를 마크다운 형식으로 정리]
 
-2. **보장 항목 자동 식별 및 매칭**
-   - 두 문서에서 '보장 항목'을 스스로 식별하세요 
-     (예: 수술보장, 특정질병보장, 입원보장, 납입면제, 비급여치료, 암보장, 뇌혈관질환보장 등)
-   - 문서마다 항목 이름이나 구성이 달라도 같은 의미라면 같은 카테고리로 묶어 비교하세요
-   - 한쪽 상품에만 존재하는 항목은 '해당 없음'으로 표시하세요
-   - ⚠️ **담보 항목 추출 시 주의사항**:
-     - 문서에서 발견한 모든 담보 항목을 빠짐없이 추출하세요
-     - 담보 항목 이름은 문서에 나온 그대로 정확히 사용하세요 (약어나 축약 없이)
-     - 동일한 담보가 여러 페이지에 나와도 한 번만 표시하되, 가장 정확한 정보를 사용하세요
-     - 담보 항목의 순서는 아래 "담보 항목 순서 고정" 섹션에 따라 반드시 준수하세요
+### 💰 해약환급금 예시표
+[경과기간별 해약환급금 표를 완전히 정리]
 
-3. **전문용어 고객 친화적 해석**
-   - 전문 용어가 표의 셀 내용에 포함되어 있을 때만 간단한 설명을 괄호 안에 추가하세요
-     (예: 표의 담보명에 '납입면제(특정 조건 충족 시 보험료 납입을 면제받는 제도)' 형식으로 표기)
-   - ⚠️ 중요: 표의 셀 내용이 아닌 별도의 설명 문단이나 텍스트는 절대 작성하지 마세요.
+### 🔄 갱신담보 보험료 예시표  
+[갱신차수별 보험료 변동 표를 완전히 정리]
+
+### 📋 기타 모든 표 데이터
+[문서 내 모든 표 형태 데이터를 빠뜨리지 않고 정리]
+"""
+
+
+# analyze_for_detail 고정 지침 (프롬프트 프리픽스 캐시를 위해 문서 내용보다 앞에 위치, 1024토큰 이상)
+_DETAIL_SYSTEM_PROMPT = """당신은 보험상품 상세 분석 전문가입니다. 고객이 상품을 완전히 이해하고 현명한 선택을 할 수 있도록 상세하고 실용적인 정보를 제공해주세요. 모든 내용을 포함하되 이해하기 쉽게 설명해주세요. 🚨 중요: 모든 금액과 숫자는 원본 문서의 정확한 값을 그대로 사용하고, 절대 반올림하거나 수정하지 마세요.
+
+상세 분석 요구사항:
+1. **종합 상품 개요**
+   - 상품의 핵심 가치와 목적
+   - 누구를 위한 상품인지
+   - 이 상품의 철학과 설계 개념
+
+2. **완전한 보장 구조**
+   - 기본 보장 상세 설명
+   - 모든 특약 보장 내용 (중요도 순)
+   - 보장 제외 사항 및 주의사항
+   - 각 보장별 실제 활용 예시
+
+3. **보험료 구조 분석** 🚨 모든 금액은 원본 그대로 표기
+   - 보험료 산출 기준 (정확한 금액으로 예: 92,540원)
+   - 연령별, 성별 차이 (구체적 금액)
+   - 보험료 할인/할증 요인
+   - 갱신 조건 및 보험료 변동
+   
+   💡 **금액 표기 원칙**: 원본에서 92,540원이면 92,540원 그대로, 절대 반올림 금지
+
+4. **가입 조건 및 절차**
+   - 가입 가능 연령 및 조건
+   - 건강 고지 의무 사항
+   - 필요 서류 및 절차
+   - 가입 후 주의사항
+
+5. **실전 활용 가이드**
+   - 보험금 청구 절차
+   - 자주 발생하는 사고별 보상 범위
+   - 보험금 지급 제외 사례
+   - 고객이 알아두면 좋은 팁
+
+6. **장단점 심층 분석**
+   - 이 상품의 명확한 장점
+   - 한계나 아쉬운 점
+   - 다른 상품과의 차별점
+   - 개선 제안
+
+7. **생애주기별 활용법**
+   - 연령대별 활용 전략
+   - 가족 상황별 최적 설계
+   - 다른 보험과의 조합 방법
+
+8. **수치 정보 완전 정리**
+   - 모든 보험료 정보 테이블
+   - 해약환급금 상세 표
+   - 갱신 보험료 변동 예시
+   - 보장 금액별 비교표
 
 결과 형식:
+# 📖 [파일명] 완전 분석 가이드
 
-당신은 보험상품 비교 전문 AI 분석가입니다.  
-다음 두 보험상품의 PDF 내용을 기반으로 3개 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)의 헤더와 표만 출력하세요.
-🚨 절대 중요: 3개 표 섹션의 헤더와 표만 출력하고, 표 이외의 부가 설명 텍스트, 분석 문단, 비교 설명을 절대 작성하지 마세요.
+## 🎯 상품 철학 및 핵심 가치
+[이 상품이 추구하는 가치와 설계 철학]
 
-[분석 목표]
-- 두 상품의 기본 정보(상품명, 보험사, 납입기간, 만기, 월 보험료, 총보험료)를 표로 요약하세요.
-- 총보험료는 반드시 계산하여 포함하세요. (총보험료 = 월보험료 × 납입기간(년) × 12개월)
-- 보장 항목별 차이를 표로 정리하세요.
-- 단, 동일한 항목명이 완전히 일치하지 않더라도 '의미상 유사한 항목'은 같은 줄에 매칭하세요.
-- 예를 들어 하나의 상해입원일당 상품 담보 리스트에서 종합병원, 중환자실이 추가되면, 이는 큰 담보리스트에서 세부화된 리스트입니다.
-- 비교 시, 보장 항목명에 포함된 숫자(금액, 기간, 납입년수)는 모두 수치로 인식하고, 금액은 반드시 원 단위로 통일하여 비교하세요.
-- ⚠️ 금액 표기 시 "천원", "만원", "억원" 같은 단위를 절대 사용하지 말고, 숫자만 계산하여 "원" 단위로만 표기하세요.
+## 🏗️ 완전한 보장 구조
+### 🛡️ 기본 보장 (주계약)
+[상세한 기본 보장 설명]
 
-[분석 시 유의사항]
-- 두 상품이 '리모델링 관계'인지 여부는 상품명 또는 보장 구조를 기반으로 판단하세요.
-  (예: 동일 보험사, 동일 시리즈명, 만기나 담보 구성 확장)
-- 결과를 **요약 비교표 → 공통 가입담보 비교표 → 리모델링 전용 가입담보 표** 순서로 작성하세요.
-- 질병입원일당, 질병수술담보, 상해입원일당 등 모든 입원/수술 관련 보장을 놓치지 마세요
-- {product1_label}와 {product2_label}의 모든 보장 항목을 나열하고 비교하세요
-- 🚨 **절대 금지 (매우 중요)**: 
-  - 출력은 오직 3개의 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)만 포함하세요.
-  - 표 이외의 모든 텍스트 설명을 절대 작성하지 마세요.
-  - "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 섹션을 절대 작성하지 마세요.
-  - "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치" 등의 키워드가 포함된 설명 텍스트를 절대 작성하지 마세요.
-  - 표의 셀 내용을 제외한 모든 문단, 설명, 분석 텍스트를 절대 작성하지 마세요.
-  - 표만 출력하고 그 외 어떤 내용도 추가하지 마세요.
+### ⭐ 특약 보장 완전 가이드
+[모든 특약을 중요도순으로 상세 설명]
 
-- 🚨 **표 작성 시 주의사항 (매우 중요)**:
-- 두 상품에 모두 등장하는 담보는 "공통 가입담보" 표에 정렬하고, {product2_label} (리모델링 상품)에만 있는 담보는 "리모델링 전용 가입담보" 표에 정리하세요. {product1_label}에 데이터가 없는 경우 '해당 없음'으로 채우세요.
-- ⚠️ **담보 순서 고정 (절대 중요)**: 담보 항목은 반드시 아래 "담보 항목 순서 고정" 섹션에 정의된 순서대로 표시하세요. 순서를 절대 변경하지 마세요. 카테고리 순서(1→2→3→4→5→6)를 정확히 준수하세요.
-- 동일 담보의 세부 구성(예: 입원일당/중환자실 등)은 한 행 안에서 비교하거나 필요 시 추가 행으로 분리하세요
-- 보장 설명이 부족하면 간단한 설명을 추가해 고객이 이해하기 쉽게 작성하세요
-- 필수 담보 목록에 포함된 항목은 문서에 없더라도 '해당 없음'으로 행을 추가하세요
-- 🚨 **출력 형식 (절대 중요 - 반드시 준수하세요)**: 
-  - 출력은 **오직 3개의 표 섹션만** 출력하세요:
-    1. 요약 비교표 (상품 기본정보)
-    2. 공통 가입담보 비교
-    3. 리모델링 전용 가입담보
-  - 위 3개 표 섹션 이외의 **모든 추가 섹션, 문단, 텍스트를 절대 작성하지 마세요.**
-  - 표의 셀 내용을 제외한 **모든 설명 텍스트를 절대 작성하지 마세요.**
-  - "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 텍스트 설명 섹션을 절대 작성하지 마세요.
-  - "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치", "보험료가", "만기가", "초기 비용", "장기적으로" 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요.
-  - 위 3개 표 섹션 이후에 **어떤 내용도 추가하지 마세요.**
-  - **표만 출력하고 그 외 어떤 텍스트도 출력하지 마세요.**
-  - 출력 형식은 아래 "출력 형식" 섹션에 정의된 표 구조만 정확히 따라주세요.
-- 🚨 **숫자 인식 정확성 (매우 중요)**:
-  - **표 데이터를 최우선으로 사용하세요.** 표 데이터에 있는 모든 숫자는 정확히 그대로 사용하세요.
-  - 모든 금액(보험료, 가입금액 등)은 원본 문서의 정확한 숫자를 그대로 표기하세요 (절대 반올림 금지)
-  - 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원은 절대 1,000원이나 1,300원으로 변경하지 마세요)
-  - 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 4,380원, 2,405원)
-  - 표 데이터와 추출된 텍스트가 다를 경우 표 데이터를 기준으로 하세요.
-- ⚠️ **금액 단위 통일**: 모든 금액(가입금액, 보험료 등)은 반드시 "원" 단위로만 표기하세요.
-  - "천원", "만원", "억원" 같은 단위를 절대 사용하지 마세요.
-  - 예: 문서에 "100,000천원"이 있으면 "100,000,000원"으로 변환하여 표기
-  - 예: 문서에 "100만원"이 있으면 "1,000,000원"으로 변환하여 표기
-  - 예: 문서에 "20만원"이 있으면 "200,000원"으로 변환하여 표기
-  - 예: 문서에 "5백만원"이 있으면 "5,000,000원"으로 변환하여 표기
-  - 변환 시에도 정확한 숫자를 사용하세요.
-- **납입기간/만기 표기**: 납입기간과 만기는 상품 문서에 있는 그대로 표기하세요 (예: "20년납30세만기", "30년납100세만기", "전기납20년만기")
+### ⚠️ 보장 제외 및 주의사항
+[고객이 반드시 알아야 할 제외 사항]
 
-- 📋 **담보 항목 순서 고정 (매우 중요 - 반드시 이 순서대로 표시하세요)**:
-담보 항목은 다음 카테고리 순서대로 **정확히** 정렬하여 표시하세요. 이 순서는 절대 변경하지 마세요.
+## 💰 보험료 구조 완전 분석
+### 📊 보험료 산출 기준
+[보험료 결정 요소들]
 
-**카테고리 1: 기본계약 관련** (최우선 - 반드시 첫 번째로 표시)
-1. 기본계약(상해후유장해)
-2. 보험료납입면제대상담보
+### 📈 갱신 및 변동 조건
+[보험료 변동 가능성]
 
-**카테고리 2: 상해 관련 담보** (기본계약 다음 - 반드시 두 번째로 표시)
-3. 골절진단담보
-4. 화상진단담보
-5. 상해입원일당(1-180일)담보
-6. 상해입원일당(1-180일, 중환자실)담보
-7. 상해입원일당(1-30일)담보
-8. 상해수술 II (1-5종)(1종)담보
-9. 상해수술 II (1-5종)(2종)담보
-10. 상해수술 II (1-5종)(3종)담보
-11. 상해수술 II (1-5종)(4종)담보
-12. 상해수술 II (1-5종)(5종)담보
-13. 상해통원수술 II 담보
-14. 상해흉터성형수술 II 담보
-15. 상해입원수술 II 담보
+## 📋 가입 가이드
+### ✅ 가입 조건
+[상세한 가입 자격 및 조건]
 
-**카테고리 3: 질병 관련 담보** (상해 다음 - 반드시 세 번째로 표시)
-16. 질병입원일당 II (1-180일)담보
-17. 질병입원일당 II (1-180일, 중환자실)담보
-18. 질병수술담보
+### 📝 필요 절차
+[단계별 가입 과정]
 
-**카테고리 4: 암 관련 담보** (질병 다음 - 반드시 네 번째로 표시)
-19. 암진단 II (유사암제외)담보
-20. 유사암진단 II 담보
+## 🔧 실전 활용 매뉴얼
+### 💊 보험금 청구 가이드
+[실제 청구 시 필요한 모든 정보]
 
-**카테고리 5: 심혈관/뇌혈관 질환 담보** (암 다음 - 반드시 다섯 번째로 표시)
-21. 심혈관질환(특정 I,I49제외)진단담보
-22. 심혈관질환(I49)진단담보
-23. 뇌혈관질환(I)진단담보
+### 📚 사례별 보상 범위
+[구체적인 상황별 보상 예시]
 
-**카테고리 6: 기타 특수 담보** (마지막 - 반드시 마지막으로 표시)
-24. 특정감염병 II 입원일당(1-30일)담보
-25. 기타 특수 질환 담보
+## ⚖️ 장단점 완전 분석
+### ✅ 명확한 장점
+[이 상품의 확실한 강점들]
 
-⚠️ **매우 중요 - 반드시 준수해야 할 사항**:
-- 위 카테고리 순서(1→2→3→4→5→6)를 절대 변경하지 마세요.
-- 문서에서 발견한 담보 항목을 위 카테고리에 맞춰 분류하세요.
-- 각 카테고리 내에서도 위 번호 순서를 정확히 따라 표시하세요.
-- 예: "상해입원일당(1-180일)담보"는 항상 "상해입원일당(1-180일, 중환자실)담보"보다 먼저 표시하세요.
-- 예: "상해수술 II (1-5종)(1종)담보"는 항상 "상해수술 II (1-5종)(2종)담보"보다 먼저 표시하세요.
-- 담보 이름은 문서에 나온 그대로 정확히 사용하세요 (약어나 축약 없이).
-- 문서에서 발견하지 못한 담보는 표시하지 마세요 (추측하지 마세요).
-- 두 상품에 모두 있는 담보는 "공통 가입담보" 표에, {product2_label}에만 있는 담보는 "리모델링 전용 가입담보" 표에 표시하세요.
-- 리모델링 관계 판단 시 상품명, 보험사, 시리즈명, 보장구조 종합 고려
-- ⚠️ 중요: 위 판단은 표를 생성하기 위한 내부 분석일 뿐이며, 표 이외의 설명 텍스트를 작성하지 마세요.
+### ⚠️ 한계 및 개선점
+[솔직한 아쉬운 점들]
 
-[출력 형식]
+## 🎯 생애주기별 활용 전략
+### 👶 연령대별 전략
+[각 연령에서의 최적 활용법]
 
-🚨 **절대 중요: 출력은 오직 아래 3개의 표 섹션만 출력하세요.**
-- **1. 요약 비교표 (상품 기본정보)** - 섹션 헤더와 표를 반드시 포함하세요.
-- **2. 공통 가입담보 비교** - 섹션 헤더와 표를 반드시 포함하세요.
-- **3. 리모델링 전용 가입담보** - 섹션 헤더와 표를 반드시 포함하세요.
+### 👨‍👩‍👧‍👦 가족 상황별 설계
+[가족 구성에 따른 맞춤 전략]
 
-⚠️ **절대 금지 사항 (매우 중요 - 반드시 준수하세요)**:
-- 위 3개 표 섹션의 **섹션 헤더(## 1. 요약 비교표, ## 2. 공통 가입담보 비교, ## 3. 리모델링 전용 가입담보)와 표는 반드시 포함하세요.**
-- 위 3개 표 섹션 이외의 **모든 추가 섹션, 문단, 텍스트를 절대 작성하지 마세요.**
-- 표의 셀 내용과 섹션 헤더를 제외한 **모든 설명 텍스트를 절대 작성하지 마세요.**
-- "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 섹션을 절대 작성하지 마세요.
-- "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치", "보험료가", "만기가" 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요.
-- 표 이외의 추가 설명, 요약, 결론, 분석, 비교 설명 섹션을 절대 작성하지 마세요.
-- 위 3개 표 섹션 이후에 어떤 내용도 추가하지 마세요.
-- **3개 표 섹션의 헤더와 표만 출력하고, 그 외 부가 설명 텍스트는 절대 출력하지 마세요.**
+## 📊 완전한 수치 정보
+### 💰 보험료 상세표
+[모든 보험료 정보를 표로 정리]
 
-# 🏆 보험상품 비교 분석 보고서
+### 📈 해약환급금 표
+[경과 기간별 상세 환급 정보]
 
-## 1. 요약 비교표 (상품 기본정보)
-| 구분 | {product1_label} | {product2_label} | 차이점 |
-|------|--------|--------|--------|
-| **상품명** | [{product1_label} 상품명] | [{product2_label} 상품명] | - |
-| **보험사** | [보험사] | [보험사] | - |
-| **상품타입** | [타입] | [타입] | - |
-| **월보험료** | [금액]원 🚨 | [금액]원 🚨 | [차이]원 |
-| **납입기간** | [기간] | [기간] | [차이] |
-| **총보험료** | [총보험료]원 ⚠️ 계산: 월보험료 × 납입기간(년) × 12개월 | [총보험료]원 ⚠️ 계산: 월보험료 × 납입기간(년) × 12개월 | [차이]원 |
-| **만기기간** | [만기 - 예: 100세 만기, 30세 만기 등 상품 문서의 원본 그대로 표기] | [만기 - 예: 100세 만기, 30세 만기 등 상품 문서의 원본 그대로 표기] | - |
-| **납입방식** | [방식] | [방식] | - |
+### 🔄 갱신 보험료 예시
+[갱신 시 보험료 변동 예측]
 
-## 2. 공통 가입담보 비교  
-⚠️ **중요**: 담보 항목은 위 "담보 항목 순서 고정" 섹션에 정의된 순서대로 정확히 나열하세요.
-반드시 카테고리 1(기본계약 관련)부터 시작하여 카테고리 6(기타 특수 담보)까지 순서대로 표시하세요.
+## 💡 전문가 조언
+[이 상품을 고려할 때 반드시 알아둘 점들]
+"""
 
-| 보장 항목 | {product1_label} 납입기간/만기 | {product1_label} 가입금액 | {product1_label} 보험료 | {product2_label} 납입기간/만기 | {product2_label} 가입금액 | {product2_label} 보험료 |
------------|----------------|--------------|----------------|--------------|----------------|--------------|
-| 기본계약(상해후유장해) | [기간 - 예: 20년납30세만기, 30년납100세만기 등 상품 문서의 원본 그대로 표기] | [금액]원 ⚠️ 반드시 원 단위로만 표기 (천원, 만원 단위 사용 금지) | [금액]원 | [기간 - 예: 20년납30세만기, 30년납100세만기 등 상품 문서의 원본 그대로 표기] | [금액]원 ⚠️ 반드시 원 단위로만 표기 (천원, 만원 단위 사용 금지) | [금액]원 |
-| 보험료납입면제대상담보 | [기간 - 예: 전기납20년만기, 전기납30년만기 등] | [금액]원 | [금액]원 | [기간 - 예: 전기납20년만기, 전기납30년만기 등] | [금액]원 | [금액]원 |
-| 골절진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 화상진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해입원일당(1-180일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해입원일당(1-180일, 중환자실)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해입원일당(1-30일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해수술 II (1-5종)(1종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해수술 II (1-5종)(2종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해수술 II (1-5종)(3종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해수술 II (1-5종)(4종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해수술 II (1-5종)(5종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해통원수술 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해흉터성형수술 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 상해입원수술 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 질병입원일당 II (1-180일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 질병입원일당 II (1-180일, 중환자실)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 질병수술담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 암진단 II (유사암제외)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 유사암진단 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 심혈관질환(특정 I,I49제외)진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 심혈관질환(I49)진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 뇌혈관질환(I)진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
-| 특정감염병 II 입원일당(1-30일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
 
-⚠️ **위 표는 예시입니다. 문서에서 발견한 담보만 표시하고, 위 순서를 정확히 준수하세요.**
-문서에 없는 담보는 '해당 없음'으로 표시하되, 위 순서는 절대 변경하지 마세요.
+# analyze_for_detail 구조화 출력용 (본문만 JSON으로 받고 마크다운은 _render_detail_markdown에서 조립)
+# 18개 필드 한국어 서술은 4000 토큰을 자주 넘어 JSON이 잘리고 마크다운 재생성(2회 호출)이 되므로 기본값은 끔
+_DETAIL_STRUCTURED_ENABLED = os.getenv('GPT_STRUCTURED_DETAIL', '0') == '1'
+# 기존 마크다운 상세 분석의 출력 상한(8000)과 같게 - 스키마 전체를 담을 여유
+_DETAIL_STRUCTURED_MAX_TOKENS = 8000
+
+_DETAIL_STRUCTURED_SYSTEM_PROMPT = _DETAIL_SYSTEM_PROMPT.split("결과 형식:")[0] + """결과 형식:
+주어진 JSON 스키마의 각 필드에 해당 섹션의 내용만 작성하세요.
+제목, 구분선, 이모지 등 마크다운 형식은 넣지 말고 내용만 간결하게 작성하세요.
+원본 문서에 없는 정보는 빈 문자열 또는 빈 배열로 두세요.
+"""
+
+_TEXT_FIELD = {"type": "string"}
+_TEXT_LIST_FIELD = {"type": "array", "items": {"type": "string"}}
+
+
+def _object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """strict 모드 JSON 스키마 객체 (모든 필드 필수, 추가 필드 금지)"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+_DETAIL_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "insurance_detail_analysis",
+        "strict": True,
+        "schema": _object_schema({
+            "philosophy": _TEXT_FIELD,
+            "coverage_basic": _TEXT_FIELD,
+            "riders": {"type": "array", "items": _object_schema({
+                "name": _TEXT_FIELD, "description": _TEXT_FIELD
+            })},
+            "exclusions": _TEXT_LIST_FIELD,
+            "premium_basis": _TEXT_FIELD,
+            "premium_renewal": _TEXT_FIELD,
+            "enrollment_conditions": _TEXT_LIST_FIELD,
+            "enrollment_procedure": _TEXT_LIST_FIELD,
+            "claim_guide": _TEXT_FIELD,
+            "coverage_cases": _TEXT_LIST_FIELD,
+            "pros": _TEXT_LIST_FIELD,
+            "cons": _TEXT_LIST_FIELD,
+            "age_strategy": _TEXT_FIELD,
+            "family_strategy": _TEXT_FIELD,
+            "premium_table": {"type": "array", "items": _object_schema({
+                "condition": _TEXT_FIELD, "premium": _TEXT_FIELD
+            })},
+            "surrender_table": {"type": "array", "items": _object_schema({
+                "period": _TEXT_FIELD, "paid_premium": _TEXT_FIELD,
+                "surrender_value": _TEXT_FIELD, "refund_rate": _TEXT_FIELD
+            })},
+            "renewal_examples": _TEXT_FIELD,
+            "expert_advice": _TEXT_FIELD
+        })
+    }
+}
+
+
+def _md_list(items: List[str]) -> str:
+    """문자열 리스트 → 마크다운 글머리표"""
+    return "\n".join(f"- {item}" for item in items)
+
+
+def _md_table(headers: Tuple[str, ...], rows: List[Tuple[str, ...]]) -> str:
+    """헤더/행 → 마크다운 표"""
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def _render_detail_markdown(payload: Dict[str, Any], file_name: str) -> str:
+    """구조화된 상세 분석 결과를 기존 상세 분석 마크다운 형식으로 변환"""
+    riders = "\n\n".join(f"**{r['name']}**: {r['description']}" for r in payload.get('riders', []))
+    premium_table = _md_table(
+        ("구분", "보험료"),
+        [(row['condition'], row['premium']) for row in payload.get('premium_table', [])]
+    ) if payload.get('premium_table') else ""
+    surrender_table = _md_table(
+        ("경과기간", "납입보험료", "해약환급금", "환급률"),
+        [(row['period'], row['paid_premium'], row['surrender_value'], row['refund_rate'])
+         for row in payload.get('surrender_table', [])]
+    ) if payload.get('surrender_table') else ""
+    
+    sections = (
+        f"# 📖 {file_name} 완전 분석 가이드",
+        f"## 🎯 상품 철학 및 핵심 가치\n{payload.get('philosophy', '')}",
+        "## 🏗️ 완전한 보장 구조",
+        f"### 🛡️ 기본 보장 (주계약)\n{payload.get('coverage_basic', '')}",
+        f"### ⭐ 특약 보장 완전 가이드\n{riders}",
+        f"### ⚠️ 보장 제외 및 주의사항\n{_md_list(payload.get('exclusions', []))}",
+        "## 💰 보험료 구조 완전 분석",
+        f"### 📊 보험료 산출 기준\n{payload.get('premium_basis', '')}",
+        f"### 📈 갱신 및 변동 조건\n{payload.get('premium_renewal', '')}",
+        "## 📋 가입 가이드",
+        f"### ✅ 가입 조건\n{_md_list(payload.get('enrollment_conditions', []))}",
+        f"### 📝 필요 절차\n{_md_list(payload.get('enrollment_procedure', []))}",
+        "## 🔧 실전 활용 매뉴얼",
+        f"### 💊 보험금 청구 가이드\n{payload.get('claim_guide', '')}",
+        f"### 📚 사례별 보상 범위\n{_md_list(payload.get('coverage_cases', []))}",
+        "## ⚖️ 장단점 완전 분석",
+        f"### ✅ 명확한 장점\n{_md_list(payload.get('pros', []))}",
+        f"### ⚠️ 한계 및 개선점\n{_md_list(payload.get('cons', []))}",
+        "## 🎯 생애주기별 활용 전략",
+        f"### 👶 연령대별 전략\n{payload.get('age_strategy', '')}",
+        f"### 👨‍👩‍👧‍👦 가족 상황별 설계\n{payload.get('family_strategy', '')}",
+        "## 📊 완전한 수치 정보",
+        f"### 💰 보험료 상세표\n{premium_table}",
+        f"### 📈 해약환급금 표\n{surrender_table}",
+        f"### 🔄 갱신 보험료 예시\n{payload.get('renewal_examples', '')}",
+        f"## 💡 전문가 조언\n{payload.get('expert_advice', '')}",
+    )
+    return "\n\n".join(sections) + "\n"
+
+
+# analyze_for_comparison 프롬프트 (고정 지침은 system 메시지 앞쪽에 두어 프롬프트 프리픽스 캐시 활용)
+_COMPARISON_SYSTEM_PROMPT = """당신은 보험상품 비교 분석 전문가입니다. 상품의 핵심 경쟁력과 차별화 요소를 정확히 파악하여 비교에 최적화된 정보를 제공해주세요. 🚨 중요: 모든 금액과 숫자는 원본 문서의 정확한 값을 그대로 사용하고, 절대 반올림하거나 수정하지 마세요.
+
+분석 요구사항:
+1. **상품 기본 정보**
+   - 상품명, 상품 코드
+   - 상품 타입 (어린이보험, 종합보험, 암보험 등)
+   - 보험 회사명
+
+2. **보험료 정보** 🚨 중요: 모든 금액은 원본 문서의 정확한 숫자를 그대로 사용하세요
+   - 월 보험료 (예: 92,540원처럼 원본 그대로, 절대 반올림하거나 수정하지 마세요)
+   - 납입 방식 (월납, 연납 등)
+   - 납입 기간
+   - **만기 기간** (예: 30세, 80세, 100세, 종신 등 - 반드시 포함)
+   
+   ⚠️ 금액 표기 주의사항:
+   - 92,540원은 그대로 92,540원으로 표기
+   - 절대 92,000원이나 93,000원으로 반올림하지 않기
+   - 모든 숫자는 원본 텍스트에서 발견한 그대로 정확히 복사
+
+3. **핵심 보장 내용**
+   - 기본 보장 (주계약)
+   - 주요 특약 보장 (상위 5개)
+   - 보장 금액 및 범위
+
+4. **비교 우위 요소**
+   - 이 상품만의 독특한 보장
+   - 타 상품 대비 유리한 점
+   - 보험료 경쟁력
+
+5. **해약/환급 정보**
+   - 환급 방식 (무해지환급형, 저해지환급형 등)
+   - 만기 환급률 또는 조건
+
+6. **대상 고객**
+   - 주요 타겟 연령층
+   - 추천 상황
+
+결과 형식:
+# 🏷️ 상품 비교 분석: [파일명]
+
+## 📋 기본 정보
+- **상품명**: [정확한 상품명]
+- **상품코드**: [코드]
+- **상품타입**: [카테고리]
+- **회사**: [보험사명]
+
+## 💰 보험료 정보 🚨 숫자 변경 절대 금지
+- **월보험료**: [원본 문서의 정확한 금액 - 예: 92,540원]
+- **납입방식**: [방식]
+- **납입기간**: [기간]
+- **만기기간**: [만기 - 예: 30세, 80세, 100세, 종신]
+
+💡 **금액 표기 원칙**: 
+- 문서에서 찾은 정확한 금액을 그대로 표기
+- 절대 반올림하지 않음 (예: 92,540원 → 92,000원 변경 금지)
+
+## 🛡️ 핵심 보장
+### 기본보장 (주계약)
+- [주계약 내용 및 금액]
+
+### 주요 특약 TOP 5
+1. [특약명] - [보장금액] - [특징]
+2. [특약명] - [보장금액] - [특징]
+3. [특약명] - [보장금액] - [특징]
+4. [특약명] - [보장금액] - [특징]
+5. [특약명] - [보장금액] - [특징]
+
+
+"""
+
+# _fallback_comparison 결과 형식
+_FALLBACK_COMPARISON_TEMPLATE = string.Template("""# 🔍 기본 비교 분석 (GPT 분석 실패 시 대체)
+
+## 📊 $product1_label 분석
+$analysis1
+
+---
+
+## 📊 $product2_label 분석  
+$analysis2
+
+---
+
+## ⚠️ 알림
+GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
+상세한 비교를 위해서는 다시 시도해주세요.
+""")
+
+# analyze_products_comparison 프롬프트 (모듈 로드 시 한 번만 생성, 호출마다 변수만 치환)
+_PRODUCTS_COMPARISON_SYSTEM_PROMPT = "당신은 보험상품 비교 분석 전문가입니다. 두 상품을 비교하여 3개 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)의 헤더와 표만 출력하세요. 🚨 매우 중요: 1) **표 데이터를 최우선으로 사용하세요.** 표 데이터에 있는 모든 숫자는 정확히 그대로 사용하세요. 모든 금액과 숫자는 원본 문서의 정확한 값을 그대로 사용하고, 절대 반올림하거나 수정하지 마세요. 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원은 절대 1,000원이나 1,300원으로 변경하지 마세요) 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 4,380원, 2,405원) 2) 금액 표기 시 '천원', '만원', '억원' 같은 단위를 절대 사용하지 말고, 반드시 숫자만 계산하여 '원' 단위로만 표기하세요 (예: '1,000천원' → '1,000,000원', '20만원' → '200,000원', '5백만원' → '5,000,000원'). 변환 시에도 정확한 숫자를 사용하세요. 3) 만기기간은 상품 문서에 있는 그대로 표기하고(예: '100세 만기', '20년납100세만기'), 차이점은 반드시 '-'로 표기하세요. 4) 담보 항목은 반드시 사용자 프롬프트에 정의된 순서대로 표시하세요. 순서를 절대 변경하지 마세요. 5) 🚨 절대 중요: 출력은 오직 3개의 표 섹션만 출력하세요 - 1. 요약 비교표(## 1. 요약 비교표 헤더 포함), 2. 공통 가입담보 비교(## 2. 공통 가입담보 비교 헤더 포함), 3. 리모델링 전용 가입담보(## 3. 리모델링 전용 가입담보 헤더 포함). 위 3개 표 섹션의 헤더와 표는 반드시 포함하세요. 위 3개 표 섹션 이외의 추가 섹션, 문단, 텍스트를 절대 작성하지 마세요. '만기 구조 및 납입기간에 따른 보장 지속성 차이', '리모델링 상품 분석', '고객 입장에서의 합리적인 선택', '초기 비용 대비 장기 가치 평가' 등의 섹션을 절대 작성하지 마세요. '상품 A는...', '리모델링 상품은...', '물가상승률', '재가입', '재갱신', '보장 지속성', '장기 가치', '보험료가', '만기가', '초기 비용', '장기적으로' 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요. 표의 셀 내용과 섹션 헤더를 제외한 모든 텍스트, 문단, 설명, 분석, 비교 설명을 절대 작성하지 마세요. 3개 표 섹션의 헤더와 표만 출력하고 그 외 부가 설명 텍스트는 절대 출력하지 마세요. 전문용어는 표의 셀 내용에만 괄호로 간단히 설명을 추가하세요."
+
+_PRODUCTS_COMPARISON_PROMPT_TEMPLATE = string.Template("""
+아래에는 두 가지 보험 상품의 보장 내역이 있습니다. 
+이 두 상품을 비교하여 3개 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)의 헤더와 표만 출력하세요.
+🚨 중요: 3개 표 섹션의 헤더와 표만 출력하고, 표 이외의 부가 설명 텍스트, 분석 문단, 비교 설명을 절대 작성하지 마세요.
+
+단, 동일한 항목명이 완전히 일치하지 않더라도 '의미상 유사한 항목'은 같은 줄에 매칭하세요.
+예를 들어 하나의 상해입원일당 상품 담보 리스트에서 종합병원, 중환자실이 추가되면, 이는 큰 담보리스트에서 세부화된 리스트입니다.
+비교 시, 보장 항목명에 포함된 숫자(금액, 기간, 납입년수)는 모두 수치로 인식하고, 단위(천원, 만원, 원)를 통일하여 비교하세요.
+
+${user_instruction}
+
+${required_coverage_section}
+
+${coverage_list_section}
+
+**📊 표 데이터 (매우 중요 - 정확한 수치 비교용)**:
+🚨 **절대 중요**: 아래 표 데이터는 PDF에서 추출한 정확한 숫자 정보입니다. 
+반드시 이 표 데이터의 숫자를 우선적으로 사용하세요. 추출된 텍스트와 다를 경우 표 데이터를 기준으로 하세요.
+
+${product1_label} 표 데이터: ${table_data1}
+${product2_label} 표 데이터: ${table_data2}
+
+⚠️ **숫자 인식 주의사항**:
+- 표 데이터의 모든 숫자(보험료, 가입금액, 기간 등)를 정확히 그대로 사용하세요.
+- 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원 → 1,270원 그대로, 4,380원 → 4,380원 그대로)
+- 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 2,405원)
+- 표 데이터에 없는 정보만 추출된 텍스트에서 보완하세요.
+
+**${product1_label}**: ${file1_name}
+페이지 수: ${pages1_count}
+추출된 텍스트:
+${smart_text1}
+
+**${product2_label}**: ${file2_name}  
+페이지 수: ${pages2_count}
+추출된 텍스트:
+${smart_text2}
+
+[출력 지침]
+
+1. **기본 정보 추출**
+   - 상품명, 상품코드, 상품타입, 보험회사를 정확히 추출하세요
+   - 🚨 **숫자 인식 정확성 (매우 중요)**:
+     - **표 데이터를 최우선으로 사용하세요.** 표 데이터에 있는 모든 숫자는 정확히 그대로 사용하세요.
+     - 모든 금액(보험료, 가입금액 등)은 원본 문서의 정확한 숫자를 그대로 사용하세요.
+     - 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원은 절대 1,000원이나 1,300원으로 변경하지 마세요)
+     - 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 4,380원, 2,405원)
+     - 표 데이터와 추출된 텍스트가 다를 경우 표 데이터를 기준으로 하세요.
+   - 💰 **금액 단위 통일**: 모든 금액은 원 단위로 통일하여 비교하세요
+     (천원, 만원, 억원 등은 모두 원 단위로 변환하여 표시)
+     ⚠️ 중요: 금액 표기 시 "천원", "만원", "억원" 같은 단위를 절대 사용하지 마세요.
+     반드시 숫자만 계산하여 "원" 단위로만 표기하세요. (예: "1,000천원" → "1,000,000원", "100만원" → "1,000,000원")
+     - 변환 시에도 정확한 숫자를 사용하세요. (예: "20만원" → "200,000원", "5백만원" → "5,000,000원")
+   - 📅 **만기기간 표기**: 만기기간은 상품 문서에 있는 그대로 표기하세요 (예: "100세 만기", "30세 만기", "20년납100세만기")
+     만기기간의 차이점은 계산하지 말고 반드시 "-"로 표기하세요.
+   - 💵 **총보험료 계산 (매우 중요)**:
+     - 총보험료는 반드시 계산하여 표에 포함하세요.
+     - 계산 공식: 총보험료 = 월보험료 × 납입기간(년) × 12개월
+     - 예: 월보험료 55,030원, 납입기간 20년 → 총보험료 = 55,030 × 20 × 12 = 13,207,200원
+     - 예: 월보험료 87,066원, 납입기간 20년 → 총보험료 = 87,066 × 20 × 12 = 20,895,840원
+     - 차이점은 두 상품의 총보험료 차이를 계산하여 표시하세요.
+     - 천 단위 구분 기호(쉼표)를 정확히 사용하세요. (예: 13,207,200원, 20,895,840원)
+
+2. **보장 항목 자동 식별 및 매칭**
+   - 두 문서에서 '보장 항목'을 스스로 식별하세요 
+     (예: 수술보장, 특정질병보장, 입원보장, 납입면제, 비급여치료, 암보장, 뇌혈관질환보장 등)
+   - 문서마다 항목 이름이나 구성이 달라도 같은 의미라면 같은 카테고리로 묶어 비교하세요
+   - 한쪽 상품에만 존재하는 항목은 '해당 없음'으로 표시하세요
+   - ⚠️ **담보 항목 추출 시 주의사항**:
+     - 문서에서 발견한 모든 담보 항목을 빠짐없이 추출하세요
+     - 담보 항목 이름은 문서에 나온 그대로 정확히 사용하세요 (약어나 축약 없이)
+     - 동일한 담보가 여러 페이지에 나와도 한 번만 표시하되, 가장 정확한 정보를 사용하세요
+     - 담보 항목의 순서는 아래 "담보 항목 순서 고정" 섹션에 따라 반드시 준수하세요
+
+3. **전문용어 고객 친화적 해석**
+   - 전문 용어가 표의 셀 내용에 포함되어 있을 때만 간단한 설명을 괄호 안에 추가하세요
+     (예: 표의 담보명에 '납입면제(특정 조건 충족 시 보험료 납입을 면제받는 제도)' 형식으로 표기)
+   - ⚠️ 중요: 표의 셀 내용이 아닌 별도의 설명 문단이나 텍스트는 절대 작성하지 마세요.
+
+결과 형식:
+
+당신은 보험상품 비교 전문 AI 분석가입니다.  
+다음 두 보험상품의 PDF 내용을 기반으로 3개 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)의 헤더와 표만 출력하세요.
+🚨 절대 중요: 3개 표 섹션의 헤더와 표만 출력하고, 표 이외의 부가 설명 텍스트, 분석 문단, 비교 설명을 절대 작성하지 마세요.
+
+[분석 목표]
+- 두 상품의 기본 정보(상품명, 보험사, 납입기간, 만기, 월 보험료, 총보험료)를 표로 요약하세요.
+- 총보험료는 반드시 계산하여 포함하세요. (총보험료 = 월보험료 × 납입기간(년) × 12개월)
+- 보장 항목별 차이를 표로 정리하세요.
+- 단, 동일한 항목명이 완전히 일치하지 않더라도 '의미상 유사한 항목'은 같은 줄에 매칭하세요.
+- 예를 들어 하나의 상해입원일당 상품 담보 리스트에서 종합병원, 중환자실이 추가되면, 이는 큰 담보리스트에서 세부화된 리스트입니다.
+- 비교 시, 보장 항목명에 포함된 숫자(금액, 기간, 납입년수)는 모두 수치로 인식하고, 금액은 반드시 원 단위로 통일하여 비교하세요.
+- ⚠️ 금액 표기 시 "천원", "만원", "억원" 같은 단위를 절대 사용하지 말고, 숫자만 계산하여 "원" 단위로만 표기하세요.
+
+[분석 시 유의사항]
+- 두 상품이 '리모델링 관계'인지 여부는 상품명 또는 보장 구조를 기반으로 판단하세요.
+  (예: 동일 보험사, 동일 시리즈명, 만기나 담보 구성 확장)
+- 결과를 **요약 비교표 → 공통 가입담보 비교표 → 리모델링 전용 가입담보 표** 순서로 작성하세요.
+- 질병입원일당, 질병수술담보, 상해입원일당 등 모든 입원/수술 관련 보장을 놓치지 마세요
+- ${product1_label}와 ${product2_label}의 모든 보장 항목을 나열하고 비교하세요
+- 🚨 **절대 금지 (매우 중요)**: 
+  - 출력은 오직 3개의 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)만 포함하세요.
+  - 표 이외의 모든 텍스트 설명을 절대 작성하지 마세요.
+  - "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 섹션을 절대 작성하지 마세요.
+  - "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치" 등의 키워드가 포함된 설명 텍스트를 절대 작성하지 마세요.
+  - 표의 셀 내용을 제외한 모든 문단, 설명, 분석 텍스트를 절대 작성하지 마세요.
+  - 표만 출력하고 그 외 어떤 내용도 추가하지 마세요.
+
+- 🚨 **표 작성 시 주의사항 (매우 중요)**:
+- 두 상품에 모두 등장하는 담보는 "공통 가입담보" 표에 정렬하고, ${product2_label} (리모델링 상품)에만 있는 담보는 "리모델링 전용 가입담보" 표에 정리하세요. ${product1_label}에 데이터가 없는 경우 '해당 없음'으로 채우세요.
+- ⚠️ **담보 순서 고정 (절대 중요)**: 담보 항목은 반드시 아래 "담보 항목 순서 고정" 섹션에 정의된 순서대로 표시하세요. 순서를 절대 변경하지 마세요. 카테고리 순서(1→2→3→4→5→6)를 정확히 준수하세요.
+- 동일 담보의 세부 구성(예: 입원일당/중환자실 등)은 한 행 안에서 비교하거나 필요 시 추가 행으로 분리하세요
+- 보장 설명이 부족하면 간단한 설명을 추가해 고객이 이해하기 쉽게 작성하세요
+- 필수 담보 목록에 포함된 항목은 문서에 없더라도 '해당 없음'으로 행을 추가하세요
+- 🚨 **출력 형식 (절대 중요 - 반드시 준수하세요)**: 
+  - 출력은 **오직 3개의 표 섹션만** 출력하세요:
+    1. 요약 비교표 (상품 기본정보)
+    2. 공통 가입담보 비교
+    3. 리모델링 전용 가입담보
+  - 위 3개 표 섹션 이외의 **모든 추가 섹션, 문단, 텍스트를 절대 작성하지 마세요.**
+  - 표의 셀 내용을 제외한 **모든 설명 텍스트를 절대 작성하지 마세요.**
+  - "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 텍스트 설명 섹션을 절대 작성하지 마세요.
+  - "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치", "보험료가", "만기가", "초기 비용", "장기적으로" 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요.
+  - 위 3개 표 섹션 이후에 **어떤 내용도 추가하지 마세요.**
+  - **표만 출력하고 그 외 어떤 텍스트도 출력하지 마세요.**
+  - 출력 형식은 아래 "출력 형식" 섹션에 정의된 표 구조만 정확히 따라주세요.
+- 🚨 **숫자 인식 정확성 (매우 중요)**:
+  - **표 데이터를 최우선으로 사용하세요.** 표 데이터에 있는 모든 숫자는 정확히 그대로 사용하세요.
+  - 모든 금액(보험료, 가입금액 등)은 원본 문서의 정확한 숫자를 그대로 표기하세요 (절대 반올림 금지)
+  - 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원은 절대 1,000원이나 1,300원으로 변경하지 마세요)
+  - 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 4,380원, 2,405원)
+  - 표 데이터와 추출된 텍스트가 다를 경우 표 데이터를 기준으로 하세요.
+- ⚠️ **금액 단위 통일**: 모든 금액(가입금액, 보험료 등)은 반드시 "원" 단위로만 표기하세요.
+  - "천원", "만원", "억원" 같은 단위를 절대 사용하지 마세요.
+  - 예: 문서에 "100,000천원"이 있으면 "100,000,000원"으로 변환하여 표기
+  - 예: 문서에 "100만원"이 있으면 "1,000,000원"으로 변환하여 표기
+  - 예: 문서에 "20만원"이 있으면 "200,000원"으로 변환하여 표기
+  - 예: 문서에 "5백만원"이 있으면 "5,000,000원"으로 변환하여 표기
+  - 변환 시에도 정확한 숫자를 사용하세요.
+- **납입기간/만기 표기**: 납입기간과 만기는 상품 문서에 있는 그대로 표기하세요 (예: "20년납30세만기", "30년납100세만기", "전기납20년만기")
+
+- 📋 **담보 항목 순서 고정 (매우 중요 - 반드시 이 순서대로 표시하세요)**:
+담보 항목은 다음 카테고리 순서대로 **정확히** 정렬하여 표시하세요. 이 순서는 절대 변경하지 마세요.
+
+**카테고리 1: 기본계약 관련** (최우선 - 반드시 첫 번째로 표시)
+1. 기본계약(상해후유장해)
+2. 보험료납입면제대상담보
+
+**카테고리 2: 상해 관련 담보** (기본계약 다음 - 반드시 두 번째로 표시)
+3. 골절진단담보
+4. 화상진단담보
+5. 상해입원일당(1-180일)담보
+6. 상해입원일당(1-180일, 중환자실)담보
+7. 상해입원일당(1-30일)담보
+8. 상해수술 II (1-5종)(1종)담보
+9. 상해수술 II (1-5종)(2종)담보
+10. 상해수술 II (1-5종)(3종)담보
+11. 상해수술 II (1-5종)(4종)담보
+12. 상해수술 II (1-5종)(5종)담보
+13. 상해통원수술 II 담보
+14. 상해흉터성형수술 II 담보
+15. 상해입원수술 II 담보
+
+**카테고리 3: 질병 관련 담보** (상해 다음 - 반드시 세 번째로 표시)
+16. 질병입원일당 II (1-180일)담보
+17. 질병입원일당 II (1-180일, 중환자실)담보
+18. 질병수술담보
+
+**카테고리 4: 암 관련 담보** (질병 다음 - 반드시 네 번째로 표시)
+19. 암진단 II (유사암제외)담보
+20. 유사암진단 II 담보
+
+**카테고리 5: 심혈관/뇌혈관 질환 담보** (암 다음 - 반드시 다섯 번째로 표시)
+21. 심혈관질환(특정 I,I49제외)진단담보
+22. 심혈관질환(I49)진단담보
+23. 뇌혈관질환(I)진단담보
+
+**카테고리 6: 기타 특수 담보** (마지막 - 반드시 마지막으로 표시)
+24. 특정감염병 II 입원일당(1-30일)담보
+25. 기타 특수 질환 담보
+
+⚠️ **매우 중요 - 반드시 준수해야 할 사항**:
+- 위 카테고리 순서(1→2→3→4→5→6)를 절대 변경하지 마세요.
+- 문서에서 발견한 담보 항목을 위 카테고리에 맞춰 분류하세요.
+- 각 카테고리 내에서도 위 번호 순서를 정확히 따라 표시하세요.
+- 예: "상해입원일당(1-180일)담보"는 항상 "상해입원일당(1-180일, 중환자실)담보"보다 먼저 표시하세요.
+- 예: "상해수술 II (1-5종)(1종)담보"는 항상 "상해수술 II (1-5종)(2종)담보"보다 먼저 표시하세요.
+- 담보 이름은 문서에 나온 그대로 정확히 사용하세요 (약어나 축약 없이).
+- 문서에서 발견하지 못한 담보는 표시하지 마세요 (추측하지 마세요).
+- 두 상품에 모두 있는 담보는 "공통 가입담보" 표에, ${product2_label}에만 있는 담보는 "리모델링 전용 가입담보" 표에 표시하세요.
+- 리모델링 관계 판단 시 상품명, 보험사, 시리즈명, 보장구조 종합 고려
+- ⚠️ 중요: 위 판단은 표를 생성하기 위한 내부 분석일 뿐이며, 표 이외의 설명 텍스트를 작성하지 마세요.
+
+[출력 형식]
+
+🚨 **절대 중요: 출력은 오직 아래 3개의 표 섹션만 출력하세요.**
+- **1. 요약 비교표 (상품 기본정보)** - 섹션 헤더와 표를 반드시 포함하세요.
+- **2. 공통 가입담보 비교** - 섹션 헤더와 표를 반드시 포함하세요.
+- **3. 리모델링 전용 가입담보** - 섹션 헤더와 표를 반드시 포함하세요.
+
+⚠️ **절대 금지 사항 (매우 중요 - 반드시 준수하세요)**:
+- 위 3개 표 섹션의 **섹션 헤더(## 1. 요약 비교표, ## 2. 공통 가입담보 비교, ## 3. 리모델링 전용 가입담보)와 표는 반드시 포함하세요.**
+- 위 3개 표 섹션 이외의 **모든 추가 섹션, 문단, 텍스트를 절대 작성하지 마세요.**
+- 표의 셀 내용과 섹션 헤더를 제외한 **모든 설명 텍스트를 절대 작성하지 마세요.**
+- "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 섹션을 절대 작성하지 마세요.
+- "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치", "보험료가", "만기가" 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요.
+- 표 이외의 추가 설명, 요약, 결론, 분석, 비교 설명 섹션을 절대 작성하지 마세요.
+- 위 3개 표 섹션 이후에 어떤 내용도 추가하지 마세요.
+- **3개 표 섹션의 헤더와 표만 출력하고, 그 외 부가 설명 텍스트는 절대 출력하지 마세요.**
+
+# 🏆 보험상품 비교 분석 보고서
+
+## 1. 요약 비교표 (상품 기본정보)
+| 구분 | ${product1_label} | ${product2_label} | 차이점 |
+|------|--------|--------|--------|
+| **상품명** | [${product1_label} 상품명] | [${product2_label} 상품명] | - |
+| **보험사** | [보험사] | [보험사] | - |
+| **상품타입** | [타입] | [타입] | - |
+| **월보험료** | [금액]원 🚨 | [금액]원 🚨 | [차이]원 |
+| **납입기간** | [기간] | [기간] | [차이] |
+| **총보험료** | [총보험료]원 ⚠️ 계산: 월보험료 × 납입기간(년) × 12개월 | [총보험료]원 ⚠️ 계산: 월보험료 × 납입기간(년) × 12개월 | [차이]원 |
+| **만기기간** | [만기 - 예: 100세 만기, 30세 만기 등 상품 문서의 원본 그대로 표기] | [만기 - 예: 100세 만기, 30세 만기 등 상품 문서의 원본 그대로 표기] | - |
+| **납입방식** | [방식] | [방식] | - |
+
+## 2. 공통 가입담보 비교  
+⚠️ **중요**: 담보 항목은 위 "담보 항목 순서 고정" 섹션에 정의된 순서대로 정확히 나열하세요.
+반드시 카테고리 1(기본계약 관련)부터 시작하여 카테고리 6(기타 특수 담보)까지 순서대로 표시하세요.
+
+| 보장 항목 | ${product1_label} 납입기간/만기 | ${product1_label} 가입금액 | ${product1_label} 보험료 | ${product2_label} 납입기간/만기 | ${product2_label} 가입금액 | ${product2_label} 보험료 |
+-----------|----------------|--------------|----------------|--------------|----------------|--------------|
+| 기본계약(상해후유장해) | [기간 - 예: 20년납30세만기, 30년납100세만기 등 상품 문서의 원본 그대로 표기] | [금액]원 ⚠️ 반드시 원 단위로만 표기 (천원, 만원 단위 사용 금지) | [금액]원 | [기간 - 예: 20년납30세만기, 30년납100세만기 등 상품 문서의 원본 그대로 표기] | [금액]원 ⚠️ 반드시 원 단위로만 표기 (천원, 만원 단위 사용 금지) | [금액]원 |
+| 보험료납입면제대상담보 | [기간 - 예: 전기납20년만기, 전기납30년만기 등] | [금액]원 | [금액]원 | [기간 - 예: 전기납20년만기, 전기납30년만기 등] | [금액]원 | [금액]원 |
+| 골절진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 화상진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해입원일당(1-180일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해입원일당(1-180일, 중환자실)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해입원일당(1-30일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해수술 II (1-5종)(1종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해수술 II (1-5종)(2종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해수술 II (1-5종)(3종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해수술 II (1-5종)(4종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해수술 II (1-5종)(5종)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해통원수술 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해흉터성형수술 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 상해입원수술 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 질병입원일당 II (1-180일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 질병입원일당 II (1-180일, 중환자실)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 질병수술담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 암진단 II (유사암제외)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 유사암진단 II 담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 심혈관질환(특정 I,I49제외)진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 심혈관질환(I49)진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 뇌혈관질환(I)진단담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+| 특정감염병 II 입원일당(1-30일)담보 | [기간] | [금액]원 | [금액]원 | [기간] | [금액]원 | [금액]원 |
+
+⚠️ **위 표는 예시입니다. 문서에서 발견한 담보만 표시하고, 위 순서를 정확히 준수하세요.**
+문서에 없는 담보는 '해당 없음'으로 표시하되, 위 순서는 절대 변경하지 마세요.
+
+## 3. 리모델링 전용 가입담보 (${product2_label}만 제공)  
+| 보장 항목 | 보장 내용 요약 | ${product1_label} 가입 여부 | ${product1_label} 가입금액 | ${product2_label} 납입기간/만기 | ${product2_label} 가입금액 | ${product2_label} 보험료 |
+-----------|----------------|----------------|----------------|----------------|----------------|----------------|
+| [담보명] | [설명] | 해당 없음 | 해당 없음 | [기간 - 예: 20년납30세만기, 30년납100세만기 등 상품 문서의 원본 그대로 표기] | [금액]원 ⚠️ 반드시 원 단위로만 표기 (천원, 만원 단위 사용 금지) | [금액]원 |
+
+🚨 **최종 확인 (매우 중요 - 반드시 준수하세요)**: 
+- 출력은 **오직 위 3개의 표 섹션만** 출력하세요:
+  1. 요약 비교표 (상품 기본정보) - **섹션 헤더(## 1. 요약 비교표)와 표를 반드시 포함하세요.**
+  2. 공통 가입담보 비교 - **섹션 헤더(## 2. 공통 가입담보 비교)와 표를 반드시 포함하세요.**
+  3. 리모델링 전용 가입담보 - **섹션 헤더(## 3. 리모델링 전용 가입담보)와 표를 반드시 포함하세요.**
+- 위 3개 표 섹션의 **섹션 헤더와 표는 반드시 포함하세요.**
+- 위 3개 표 섹션 이후에 **어떤 내용도 추가하지 마세요.**
+- 표의 셀 내용과 섹션 헤더를 제외한 **모든 텍스트, 문단, 설명을 절대 작성하지 마세요.**
+- "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 섹션을 절대 작성하지 마세요.
+- "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치", "보험료가", "만기가", "초기 비용", "장기적으로" 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요.
+- 표 이외의 추가 설명, 요약, 결론, 분석, 비교 설명 섹션을 절대 작성하지 마세요.
+- **3개 표 섹션의 헤더와 표만 출력하고, 그 외 부가 설명 텍스트는 절대 출력하지 마세요.**
+
+
+""")
+
+# 프롬프트 버전 (템플릿 내용의 해시) - 프롬프트를 수정하면 의미 캐시가 자동으로 무효화됨
+PROMPT_VERSION = hashlib.md5("\0".join((
+    _SUMMARY_PROMPT_HEAD, _SUMMARY_PROMPT_TAIL, _DETAIL_SYSTEM_PROMPT,
+    _DETAIL_STRUCTURED_SYSTEM_PROMPT, json.dumps(_DETAIL_RESPONSE_FORMAT, sort_keys=True),
+    _COMPARISON_SYSTEM_PROMPT, _FALLBACK_COMPARISON_TEMPLATE.template,
+    _PRODUCTS_COMPARISON_SYSTEM_PROMPT, _PRODUCTS_COMPARISON_PROMPT_TEMPLATE.template
+)).encode('utf-8')).hexdigest()
+
+
+class GPTSummarizer:
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        GPT 요약기 초기화
+        
+        Args:
+            api_key: OpenAI API 키 (없으면 환경변수에서 자동 로드)
+        """
+        # API 키 설정 (.env 파일 우선)
+        global _DOTENV_LOADED
+        if not _DOTENV_LOADED:
+            from dotenv import load_dotenv
+            load_dotenv()  # .env 파일 강제 로드
+            _DOTENV_LOADED = True
+        
+        # .env 파일 -> 설정 -> 파라미터 -> 시스템 환경변수 순서로 우선순위
+        self.api_key = (api_key or 
+                       settings.openai_api_key or 
+                       os.getenv('OPENAI_API_KEY'))
+        
+        if not self.api_key:
+            raise ValueError(
+                "OpenAI API 키가 필요합니다. 다음 중 하나의 방법으로 설정해주세요:\n"
+                "1. 환경변수: OPENAI_API_KEY=your_key\n"
+                "2. 파라미터로 직접 전달\n"
+                "3. core/config.py에서 openai_api_key 설정"
+            )
+        
+        # API 키 디버깅 정보
+        key_preview = f"{self.api_key[:10]}...{self.api_key[-4:]}" if len(self.api_key) > 14 else "****"
+        logger.info(f"OpenAI API 키 로드됨: {key_preview}")
+        
+        # OpenAI 클라이언트 초기화 (API 키당 하나를 공유하고, 공유 HTTP 클라이언트로 연결 풀 재사용)
+        key_hash = hashlib.sha256(self.api_key.encode()).hexdigest()
+        with _SHARED_CLIENTS_LOCK:
+            self.client = _SHARED_CLIENTS.get(key_hash)
+            if self.client is None:
+                from openai import OpenAI
+                http_client = _get_shared_httpx()
+                if http_client is not None:
+                    self.client = OpenAI(api_key=self.api_key, http_client=http_client)
+                else:
+                    self.client = OpenAI(api_key=self.api_key)
+                _SHARED_CLIENTS[key_hash] = self.client
+        
+        # 가장 저렴한 모델 사용 (gpt-4o-mini)
+        self.model = 'gpt-4o-mini'
+        
+        # _combine_extracted_text 결과 캐시: id(pages) -> (pages, 합친 텍스트)
+        self._combined_cache = {}
+        
+        # API 키 유효성은 첫 실제 호출에서 확인 (생성 시 검증용 요청 생략)
+        self._key_hash = key_hash
+        
+        logger.info(f"GPT Summarizer initialized with model: {self.model}")
+    
+    @classmethod
+    def get(cls, api_key: Optional[str] = None) -> 'GPTSummarizer':
+        """
+        프로세스 공용 인스턴스 반환 (같은 api_key면 초기화 비용 없이 재사용)
+        
+        Args:
+            api_key: OpenAI API 키 (없으면 환경변수에서 자동 로드)
+        """
+        with _INSTANCES_LOCK:
+            instance = _INSTANCES.get(api_key)
+            if instance is None:
+                instance = cls(api_key=api_key)
+                _INSTANCES[api_key] = instance
+            return instance
+    
+    @staticmethod
+    def prewarm(models=('gpt-4o-mini',)) -> None:
+        """
+        tiktoken 인코딩을 미리 로드합니다. (서버 시작 시 호출하면 첫 요청의 지연 제거)
+        
+        Args:
+            models: 미리 로드할 모델 이름 목록
+        """
+        if not TIKTOKEN_AVAILABLE:
+            return
+        for model in models:
+            try:
+                _get_encoding(model).encode("warmup")
+                logger.info(f"tiktoken 인코딩 사전 로드 완료: {model}")
+            except Exception as e:
+                logger.warning(f"tiktoken 인코딩 사전 로드 실패 ({model}): {e}")
+    
+    def _estimate_tokens(self, text: str) -> int:
+        """텍스트의 토큰 수를 추정합니다. (같은 프롬프트/원문은 재시도, 여러 경로에서 반복되므로 캐시)"""
+        return self._estimate_tokens_many([text])[0]
+    
+    def _estimate_tokens_many(self, texts: List[str]) -> List[int]:
+        """여러 텍스트의 토큰 수 (캐시에 없는 것만 encode_batch 한 번으로 계산)"""
+        keys = [(self.model, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()) for text in texts]
+        counts = [None] * len(texts)
+        with _TOKEN_COUNT_CACHE_LOCK:
+            for i, key in enumerate(keys):
+                cached = _TOKEN_COUNT_CACHE.get(key)
+                if cached is not None:
+                    _TOKEN_COUNT_CACHE.move_to_end(key)
+                    counts[i] = cached
+        
+        missing = [i for i, count in enumerate(counts) if count is None]
+        if not missing:
+            return counts
+        
+        new_counts = None
+        if TIKTOKEN_AVAILABLE and len(missing) > 1:
+            try:
+                new_counts = [len(tokens) for tokens in _get_encoding(self.model).encode_batch(
+                    [texts[i] for i in missing], num_threads=os.cpu_count() or 1)]
+            except Exception as e:
+                logger.warning(f"tiktoken 일괄 인코딩 실패: {e}")
+        if new_counts is None:
+            new_counts = [self._estimate_tokens_uncached(texts[i]) for i in missing]
+        
+        with _TOKEN_COUNT_CACHE_LOCK:
+            for i, count in zip(missing, new_counts):
+                counts[i] = count
+                _TOKEN_COUNT_CACHE[keys[i]] = count
+            while len(_TOKEN_COUNT_CACHE) > _TOKEN_COUNT_CACHE_MAX_ENTRIES:
+                _TOKEN_COUNT_CACHE.popitem(last=False)
+        return counts
+    
+    def _estimate_tokens_uncached(self, text: str) -> int:
+        if TIKTOKEN_AVAILABLE:
+            try:
+                return len(_get_encoding(self.model).encode(text))
+            except Exception as e:
+                logger.warning(f"tiktoken 인코딩 실패: {e}")
+        
+        # 근사치 계산 (한국어: 2자당 1토큰, 영어: 4자당 1토큰)
+        korean_chars = _HANGUL_RE.subn('', text)[1]
+        other_chars = len(text) - korean_chars
+        return int(korean_chars / 2 + other_chars / 4)
+    
+    def _normalize_currency_units(self, text: str) -> str:
+        """
+        금액 단위를 통일하여 정확한 비교가 가능하도록 정규화합니다.
+        
+        Args:
+            text: 정규화할 텍스트
+            
+        Returns:
+            금액 단위가 통일된 텍스트
+        """
+        # 금액 패턴 매칭 및 단위 통일 (패턴/치환 함수는 모듈 상단에 정의)
+        # 단위 문자열이 아예 없으면 정규식 스캔 생략 (in 검사는 C 수준 부분 문자열 탐색)
+        if '천원' in text:
+            text = _RE_THOUSAND.sub(_replace_thousand, text)
+        if '만원' in text:
+            text = _RE_TEN_THOUSAND.sub(_replace_ten_thousand, text)
+        if '억원' in text:
+            text = _RE_HUNDRED_MILLION.sub(_replace_hundred_million, text)
+        text = _RE_PREMIUM_CTX.sub(_add_won_unit, text)
+        
+        return text
+    
+    def _dedupe_text(self, raw_text: str) -> str:
+        """반복 문구를 제거하고 전후 토큰 수를 기록합니다. (절단 전에 호출)"""
+        deduped = _dedupe_lines(raw_text)
+        if len(deduped) < len(raw_text) and logger.isEnabledFor(logging.INFO):
+            before_tokens = self._estimate_tokens(raw_text)
+            after_tokens = self._estimate_tokens(deduped)
+            logger.info(f"중복 문구 제거: {before_tokens} → {after_tokens} 토큰 "
+                        f"({len(raw_text)} → {len(deduped)} 자)")
+        return deduped
+    
+    def _smart_truncate_text(self, text: str, max_input_tokens: int = 100000) -> str:
+        """토큰 제한을 고려하여 텍스트를 스마트하게 절단합니다. (GPT-4o-mini 128K 활용)"""
+        # BPE 토큰 수는 UTF-8 바이트 수(문자당 최대 4바이트)를 넘지 않으므로 확실히 짧은 텍스트는 토큰화 생략
+        if len(text) * 4 <= max_input_tokens:
+            return text
+        return self._truncate_text_with_tokens(text, max_input_tokens)[0]
+    
+    def _truncate_text_with_tokens(self, text: str, max_input_tokens: int = 100000) -> Tuple[str, int]:
+        """_smart_truncate_text와 같지만 절단 결과의 토큰 수도 함께 반환 (재계산 방지용)"""
+        # 같은 문서를 다시 분석하면 토큰화 없이 이전 결과 재사용
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        key = (self.model, max_input_tokens, digest)
+        with _TRUNCATE_CACHE_LOCK:
+            cached = _TRUNCATE_CACHE.get(key)
+            if cached is not None:
+                _TRUNCATE_CACHE.move_to_end(key)
+                return cached
+        
+        result = self._truncate_text_uncached(text, max_input_tokens, digest)
+        with _TRUNCATE_CACHE_LOCK:
+            _TRUNCATE_CACHE[key] = result
+            while len(_TRUNCATE_CACHE) > _TRUNCATE_CACHE_MAX_ENTRIES:
+                _TRUNCATE_CACHE.popitem(last=False)
+        return result
+    
+    def _sentence_token_counts(self, sentences: List[str], digest: bytes) -> List[int]:
+        """
+        문장별 토큰 수 (원문 해시 기준 캐시)
+        
+        같은 문서를 다른 토큰 제한으로 절단할 때 (비교 80K, 해약환급금 40K 등) BPE 인코딩을 다시 하지 않도록
+        """
+        key = (self.model, digest)
+        with _SENTENCE_TOKENS_CACHE_LOCK:
+            cached = _SENTENCE_TOKENS_CACHE.get(key)
+            if cached is not None:
+                _SENTENCE_TOKENS_CACHE.move_to_end(key)
+                return cached
+        
+        # 문장별로 병렬 인코딩 (tiktoken이 GIL 없이 여러 스레드 사용)
+        token_counts = [len(tokens) for tokens in
+                        _get_encoding(self.model).encode_batch(sentences, num_threads=os.cpu_count() or 1)]
+        with _SENTENCE_TOKENS_CACHE_LOCK:
+            _SENTENCE_TOKENS_CACHE[key] = token_counts
+            while len(_SENTENCE_TOKENS_CACHE) > _SENTENCE_TOKENS_CACHE_MAX_ENTRIES:
+                _SENTENCE_TOKENS_CACHE.popitem(last=False)
+        return token_counts
+    
+    def _truncate_text_uncached(self, text: str, max_input_tokens: int, digest: bytes) -> Tuple[str, int]:
+        if TIKTOKEN_AVAILABLE:
+            try:
+                # 문장별 토큰 수의 누적 합으로 절단 위치 탐색
+                encoding = _get_encoding(self.model)
+                sentences = [sentence + "." for sentence in text.split('.')]
+                token_counts = self._sentence_token_counts(sentences, digest)
+                total_tokens = sum(token_counts)
+                if total_tokens <= max_input_tokens:
+                    logger.info(f"✅ 전체 텍스트 보존: {total_tokens} 토큰 (제한: {max_input_tokens})")
+                    return text, total_tokens
+                
+                cutoff = bisect_right(list(accumulate(token_counts)), max_input_tokens)
+                if cutoff > 0:
+                    truncated = "".join(sentences[:cutoff])
+                    truncated_tokens = sum(token_counts[:cutoff])
+                    logger.info(f"텍스트를 문장 단위로 절단: {total_tokens} → {truncated_tokens} 토큰")
+                    return truncated, truncated_tokens
+                
+                # 첫 문장부터 제한을 넘으면 토큰 단위로 절단
+                truncated = encoding.decode(encoding.encode(sentences[0])[:max_input_tokens])
+                logger.info(f"텍스트를 토큰 단위로 절단: {total_tokens} → {max_input_tokens} 토큰")
+                return truncated, max_input_tokens
+            except Exception as e:
+                logger.warning(f"tiktoken 절단 실패, 근사치로 절단: {e}")
+        
+        current_tokens = self._estimate_tokens(text)
+        
+        # GPT-4o-mini는 128K 토큰 지원하므로 대부분의 PDF는 전체 처리 가능
+        if current_tokens <= max_input_tokens:
+            logger.info(f"✅ 전체 텍스트 보존: {current_tokens} 토큰 (제한: {max_input_tokens})")
+            return text, current_tokens
+        
+        # 토큰 비율 계산
+        ratio = max_input_tokens / current_tokens
+        target_length = int(len(text) * ratio * 0.9)  # 10% 여유분
+        
+        # 문장 단위로 절단 시도 (문장별 토큰 수를 누적하여 한 번만 순회)
+        parts = []
+        used_tokens = 0
+        for sentence in text.split('.'):
+            sentence_tokens = self._estimate_tokens_uncached(sentence + ".")
+            if used_tokens + sentence_tokens > max_input_tokens:
+                break
+            parts.append(sentence + ".")
+            used_tokens += sentence_tokens
+        truncated = "".join(parts)
+        
+        if truncated.strip():
+            logger.info(f"텍스트를 문장 단위로 절단: {current_tokens} → {used_tokens} 토큰")
+            return truncated, used_tokens
+        
+        # 문장 단위 절단 실패 시 문자 단위로 절단
+        truncated = text[:target_length]
+        truncated_tokens = self._estimate_tokens(truncated)
+        logger.info(f"텍스트를 문자 단위로 절단: {current_tokens} → {truncated_tokens} 토큰")
+        return truncated, truncated_tokens
+
+    def _embed_for_cache(self, text: str):
+        """의미 캐시용 임베딩 (단위 벡터, 실패 시 None)"""
+        # 장애 중이거나 인증 실패한 키면 임베딩 없이 캐시 미스로 처리
+        if self._key_hash in _INVALID_KEYS or _breaker_is_open():
+            return None
+        try:
+            import numpy as np
+            model = getattr(settings, 'openai_embedding_model', None) or 'text-embedding-3-small'
+            source = text[:_SEMANTIC_EMBED_CHARS]
+            _RATE_LIMITER.acquire(self._estimate_tokens(source))
+            with _API_SEMAPHORE:
+                response = self.client.embeddings.create(model=model, input=source)
+            vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            return vector / norm if norm else None
+        except Exception as e:
+            logger.warning(f"의미 캐시 임베딩 실패: {e}")
+            return None
+    
+    def _safe_api_call(self, messages, max_tokens=None, retries=5, delay=2, temperature=None, input_tokens=None,
+                       semantic_key=None, semantic_similar=False, response_format=None, stream=False):
+        """
+        Rate Limit을 고려한 안전한 API 호출
+        
+        Args:
+            messages: 채팅 메시지 리스트
+            max_tokens: 최대 출력 토큰 수 (None이면 제한 없이 모델이 종료 시점 결정)
+            retries: 최대 시도 횟수 (기본 5회, 모두 실패하면 None을 반환해 호출 측 대체 경로 사용)
+            delay: 재시도 간격 (초)
+            temperature: 온도 설정 (None이면 기본값 0.3 사용)
+            input_tokens: 이미 계산된 입력 토큰 수 (주면 메시지 재토큰화 생략)
+            semantic_key: (작업 이름, 원문) - 주면 의미 캐시 사용 (GPT_SEMANTIC_CACHE=1)
+            semantic_similar: True면 원문 해시가 달라도 임베딩 유사도로 조회 (기본은 원문 전체 정확 일치만)
+                - 문서별 분석은 표지/약관이 같은 다른 상품의 보험료·환급금이 섞일 수 있으므로 사용 금지
+            response_format: 구조화 출력 형식 (예: json_schema), None이면 일반 텍스트
+            stream: True면 스트리밍으로 받아 합침 (긴 응답도 조각 단위로 타임아웃 적용)
+            
+        Returns:
+            OpenAI API response object or None if failed
+        """
+        # 토큰 수 사전 검증
+        if input_tokens is not None:
+            total_input_tokens = input_tokens
+        else:
+            total_input_tokens = sum(self._estimate_tokens_many([msg.get('content', '') for msg in messages]))
+        
+        if max_tokens is None:
+            if total_input_tokens > 125000:  # GPT-4o-mini 안전 마진 (128k - 3k)
+                logger.warning(f"토큰 수 초과 위험: 입력 {total_input_tokens} tokens")
+            logger.info(f"API 호출 예상 토큰: 입력 {total_input_tokens} (출력 제한 없음)")
+        else:
+            total_tokens = total_input_tokens + max_tokens
+            if total_tokens > 125000:  # GPT-4o-mini 안전 마진 (128k - 3k)
+                logger.warning(f"토큰 수 초과 위험: {total_tokens} tokens (입력: {total_input_tokens}, 출력: {max_tokens})")
+                # 출력 토큰 자동 조정
+                max_tokens = min(max_tokens, 125000 - total_input_tokens)
+                logger.info(f"출력 토큰 자동 조정: {max_tokens}")
+            logger.info(f"API 호출 예상 토큰: 입력 {total_input_tokens} + 출력 {max_tokens} = {total_tokens}")
+        
+        # max_tokens가 None이면 파라미터 자체를 생략
+        request_kwargs = {} if max_tokens is None else {'max_tokens': max_tokens}
+        if response_format is not None:
+            request_kwargs['response_format'] = response_format
+        
+        # temperature 설정 (None이면 기본값 0.3 사용)
+        temp = temperature if temperature is not None else 0.3
+        
+        # 동일 요청 캐시 확인
+        cache_key = None
+        if _RESPONSE_CACHE_ENABLED:
+            cache_key = _response_cache_key(self.model, messages, max_tokens, temp)
+            cached_content = _response_cache_get(cache_key)
+            if cached_content is not None:
+                logger.info("✅ 응답 캐시 적중, API 호출 생략")
+                return _cached_response(cached_content)
+        
+        # 의미 캐시 확인 (정확 일치 → semantic_similar면 임베딩 유사도 순)
+        semantic_entry = None
+        if _SEMANTIC_CACHE_ENABLED and semantic_key is not None:
+            task = f"{self.model}:{semantic_key[0]}"
+            source_text = semantic_key[1]
+            exact_key = _SEMANTIC_CACHE.exact_key(task, source_text)
+            embedding = None
+            cached_content = _SEMANTIC_CACHE.get_exact(exact_key)
+            if cached_content is None and semantic_similar:
+                embedding = self._embed_for_cache(source_text)
+                if embedding is not None:
+                    cached_content = _SEMANTIC_CACHE.get_similar(task, embedding)
+            if cached_content is not None:
+                logger.info("✅ 의미 캐시 적중, API 호출 생략")
+                return _cached_response(cached_content)
+            semantic_entry = (exact_key, task, embedding)
+        
+        if self._key_hash in _INVALID_KEYS:
+            raise ValueError("OpenAI API 키가 유효하지 않습니다 (이전 호출에서 인증 실패)")
+        
+        import httpx
+        import openai
+        
+        retry_after = None  # 429 응답의 retry-after (초)
+        # 서킷 브레이커는 재시도를 모두 소진한 호출당 한 번만 실패로 기록 (429는 리미터/retry-after가 처리하므로 제외)
+        outage_error = False
+        for attempt in range(retries):
+            # 장애 중이면 재시도 대기 없이 바로 실패 처리 (호출 측 대체 경로 사용)
+            if _breaker_is_open():
+                logger.warning("⚡ API 장애 감지로 호출 차단 중, 대체 경로 사용")
+                return None
+            
+            try:
+                if attempt > 0:
+                    # 서버가 알려준 대기 시간 우선, 없으면 지터를 준 백오프 (동시 재시도 충돌 방지)
+                    wait_time = retry_after if retry_after is not None else random.uniform(delay, 2 * delay) * attempt
+                    retry_after = None
+                    logger.info(f"API 재시도 대기: {wait_time:.1f}초")
+                    time.sleep(wait_time)
+                
+                # RPM/TPM 한도 안에서는 대기 없이 바로 호출
+                _RATE_LIMITER.acquire(total_input_tokens + (max_tokens or 0))
+                
+                # 응답 헤더의 남은 한도를 읽기 위해 raw 응답으로 받은 뒤 파싱
+                with _API_SEMAPHORE:
+                    raw_response = self.client.chat.completions.with_raw_response.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temp,
+                        timeout=_API_CALL_TIMEOUT,
+                        stream=stream,
+                        **request_kwargs
+                    )
+                    _RATE_LIMITER.update_from_headers(raw_response.headers)
+                    response = raw_response.parse()
+                    if stream:
+                        response = self._collect_stream(response)
+                
+                # 빈 응답은 재시도
+                if not response.choices or not response.choices[0].message.content:
+                    logger.warning(f"API 호출 시도 {attempt + 1}/{retries}: 빈 응답")
+                    continue
+                
+                # 성공 로깅 (프롬프트 캐시 적중 토큰 포함)
+                usage = getattr(response, 'usage', None)
+                details = getattr(usage, 'prompt_tokens_details', None)
+                cached_tokens = getattr(details, 'cached_tokens', None)
+                if cached_tokens:
+                    logger.info(f"✅ API 호출 성공 (시도 {attempt + 1}/{retries}, 프롬프트 캐시 {cached_tokens}/{usage.prompt_tokens} 토큰)")
+                else:
+                    logger.info(f"✅ API 호출 성공 (시도 {attempt + 1}/{retries})")
+                _breaker_record_success()
+                if self._key_hash not in _VALIDATED_KEYS:
+                    _VALIDATED_KEYS.add(self._key_hash)
+                    logger.info("✅ OpenAI API 키 검증 성공")
+                
+                if cache_key is not None:
+                    _response_cache_put(cache_key, response.choices[0].message.content)
+                if semantic_entry is not None:
+                    _SEMANTIC_CACHE.put(*semantic_entry, response.choices[0].message.content)
+                
+                return response
+                
+            except (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError) as e:
+                # 일시적 오류: 재시도
+                logger.warning(f"🚨 API 호출 시도 {attempt + 1}/{retries} 실패 (재시도 가능): {e}")
+                if isinstance(e, openai.RateLimitError):
+                    try:
+                        retry_after = float(e.response.headers.get('retry-after'))
+                    except (TypeError, ValueError):
+                        retry_after = None
+                else:
+                    outage_error = True
+            except openai.APIStatusError as e:
+                if e.status_code in _RETRYABLE_STATUS_CODES:
+                    logger.warning(f"🚨 API 서버 오류 {e.status_code}, 시도 {attempt + 1}/{retries}: {e}")
+                    outage_error = True
+                    continue
+                
+                error_str = str(e)
+                if "context_length_exceeded" in error_str.lower() or ("token" in error_str.lower() and "exceed" in error_str.lower()):
+                    logger.error(f"🚨 토큰 수 초과 감지: {error_str}")
+                    logger.error(f"📊 예상 토큰: 입력 {total_input_tokens} + 출력 {max_tokens}")
+                elif e.status_code == 401:
+                    logger.error(f"🚨 API 키 오류 감지: {error_str}")
+                    _INVALID_KEYS.add(self._key_hash)
+                    raise ValueError(f"OpenAI API 키가 유효하지 않습니다: {e}")
+                else:
+                    logger.error(f"❌ API 호출 실패 ({e.status_code}): {error_str}")
+                # 요청 자체의 문제이므로 재시도 무의미
+                return None
+            except (httpx.TransportError, openai.APIError) as e:
+                # 스트림을 읽는 도중의 끊김/타임아웃/SSE 오류 이벤트는 create가 아닌 순회 중에 발생 - 일시적 오류로 재시도
+                logger.warning(f"🚨 API 응답 수신 중 오류, 시도 {attempt + 1}/{retries} (재시도 가능): {e}")
+                outage_error = True
+            except Exception as e:
+                logger.error(f"❌ API 호출 실패: {e}")
+                return None
+        
+        logger.error(f"❌ API 호출 최종 실패: 최대 재시도 횟수({retries}) 초과")
+        if outage_error:
+            _breaker_record_failure()
+        return None
+    
+    @staticmethod
+    def _collect_stream(stream):
+        """스트리밍 응답 조각을 모아 일반 응답과 같은 형태로 반환"""
+        parts = []
+        finish_reason = None
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta.content:
+                parts.append(choice.delta.content)
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+        
+        if finish_reason == 'length':
+            logger.warning("⚠️ 출력 토큰 한도에 도달하여 응답이 잘렸습니다")
+        return _cached_response("".join(parts))
+    
+    def format_extracted_text(self, pages: List[Dict[str, Any]], file_name: str) -> str:
+        """
+        OCR로 추출된 원본 텍스트를 GPT API로 보기 좋게 정리
+        
+        Args:
+            pages: PDF 페이지 데이터 리스트
+            file_name: PDF 파일명
+            
+        Returns:
+            GPT로 정리된 텍스트
+        """
+        try:
+            # 1. 원본 텍스트 합치기 (요약하지 않음)
+            raw_text = self._combine_extracted_text(pages)
+            
+            if not raw_text.strip():
+                return "❌ 추출된 텍스트가 없습니다."
+            
+            # 2. GPT 프롬프트 생성
+            prompt = self._create_formatting_prompt(raw_text, file_name, len(pages))
+            
+            # 3. GPT API 호출
+            logger.info("GPT API 호출 중...")
+            response = self._safe_api_call(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "당신은 PDF 문서 텍스트를 깔끔하게 정리하는 전문가입니다. 내용을 요약하지 말고, 읽기 쉽게 구조화하고 포맷팅해주세요."
+                    },
+                    {
+                        "role": "user", 
+                        "content": prompt
+                    }
+                ],
+                max_tokens=4000,
+                temperature=0.3
+            )
+            
+            if response is None:
+                logger.warning("GPT API 실패, 기본 텍스트 포맷팅 사용")
+                return self._fallback_formatting(pages, file_name)
+            
+            formatted_text = response.choices[0].message.content.strip()
+            
+            # 4. 기본 정보 추가
+            final_result = self._add_document_metadata(formatted_text, file_name, len(pages))
+            
+            logger.info("GPT 텍스트 정리 완료")
+            return final_result
+            
+        except Exception as e:
+            logger.error(f"GPT 텍스트 정리 중 오류: {e}")
+            # GPT 실패 시 기본 포맷 반환
+            return self._fallback_formatting(pages, file_name)
+    
+    def summarize_extracted_text(self, pages: List[Dict[str, Any]], file_name: str) -> str:
+        """
+        추출된 텍스트를 GPT로 요약 (원하는 프로세스)
+        
+        Args:
+            pages: PDF 페이지 데이터 리스트
+            file_name: PDF 파일명
+            
+        Returns:
+            GPT로 생성된 요약
+        """
+        try:
+            raw_text = self._combine_extracted_text(pages)
+            
+            if not raw_text.strip():
+                return "❌ 요약할 텍스트가 없습니다."
+            
+            # 프롬프트를 만들기 전에 원문을 먼저 절단하고, 계산된 토큰 수를 사전 검증에 재사용
+            raw_text, raw_tokens = self._truncate_text_with_tokens(self._dedupe_text(raw_text), max_input_tokens=100000)
+            messages = self._create_summary_messages(raw_text, file_name)
+            
+            response = self._safe_api_call(
+                messages=messages, 
+                max_tokens=None,  # 출력 상한 없이 모델이 자연스럽게 종료
+                retries=5,
+                delay=2,
+                input_tokens=raw_tokens + self._summary_prompt_overhead_tokens()
+            )
+            
+            if response is None:
+                # GPT 실패 시 기본 텍스트 정리 시도
+                logger.warning("GPT API 실패, 기본 텍스트 포맷팅 사용")
+                return self._fallback_formatting(pages, file_name)
+            
+            summary = response.choices[0].message.content.strip()
+            
+            return self._create_summary_header(file_name, len(pages)) + summary
+            
+        except Exception as e:
+            logger.error(f"GPT 요약 중 오류: {e}")
+            return f"❌ 요약 생성 중 오류 발생: {str(e)}"
+    
+    def _create_summary_messages(self, raw_text: str, file_name: str) -> List[Dict[str, str]]:
+        """summarize_extracted_text용 메시지 생성 (일반/스트리밍 공용)"""
+        # 내용 전체 인식 프롬프트 (요약하지 않음) - 원문은 format 없이 그대로 이어 붙임
+        prompt = "".join((
+            _SUMMARY_PROMPT_HEAD.format(file_name=file_name),
+            raw_text,
+            _SUMMARY_PROMPT_TAIL.format(file_name=file_name)
+        ))
+
+        # 메시지 구성
+        messages = [
+            {
+                "role": "system",
+                "content": "당신은 PDF 문서 정리 전문가입니다. 내용을 요약하지 말고, 모든 정보를 보존하면서 읽기 쉽게 구조화해주세요."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        return messages
+    
+    def _summary_prompt_overhead_tokens(self) -> int:
+        """요약 프롬프트에서 원문을 제외한 고정 부분의 토큰 수 (모델별로 한 번만 계산)"""
+        cached = getattr(self, '_summary_overhead', None)
+        if cached is None or cached[0] != self.model:
+            static_messages = self._create_summary_messages("", "")
+            overhead = sum(self._estimate_tokens_many([msg['content'] for msg in static_messages]))
+            cached = self._summary_overhead = (self.model, overhead)
+        return cached[1]
+    
+    def _create_summary_header(self, file_name: str, page_count: int) -> str:
+        """요약 결과 앞에 붙는 문서 메타데이터"""
+        # 문서 메타데이터 추가
+        metadata = _document_header("📄 PDF 요약 결과", file_name, page_count, "요약 시간", "🤖 요약 방식: GPT API 사용")
+        return metadata
+    
+    def summarize_extracted_text_stream(self, pages: List[Dict[str, Any]], file_name: str):
+        """
+        summarize_extracted_text의 스트리밍 버전 (생성되는 대로 부분 결과를 반환)
+        
+        Args:
+            pages: PDF 페이지 데이터 리스트
+            file_name: PDF 파일명
+            
+        Yields:
+            요약 결과 조각 (모두 이어 붙이면 summarize_extracted_text 결과와 같은 형식)
+        """
+        raw_text = self._combine_extracted_text(pages)
+        if not raw_text.strip():
+            yield "❌ 요약할 텍스트가 없습니다."
+            return
+        
+        raw_text = self._smart_truncate_text(self._dedupe_text(raw_text), max_input_tokens=100000)
+        messages = self._create_summary_messages(raw_text, file_name)
+        yield from self._stream_api_call(messages, self._create_summary_header(file_name, len(pages)), pages, file_name)
+    
+    def _stream_api_call(self, messages, header: str, pages: List[Dict[str, Any]], file_name: str,
+                         temperature: Optional[float] = None):
+        """
+        스트리밍 API 호출 공용 처리
+        
+        스트림 시작에 실패하면 기본 텍스트 정리 결과를, 성공하면 header 후 생성되는 조각을 순서대로 반환
+        (_safe_api_call과 같은 동시 호출 상한/Rate Limit/서킷 브레이커를 거치며, 스트림이 끝날 때까지 슬롯 점유)
+        """
+        if self._key_hash in _INVALID_KEYS or _breaker_is_open():
+            logger.warning("⚡ API 장애 또는 API 키 오류로 호출 차단 중, 기본 텍스트 포맷팅 사용")
+            yield self._fallback_formatting(pages, file_name)
+            return
+        
+        import openai
+        
+        _RATE_LIMITER.acquire(sum(self._estimate_tokens_many([msg.get('content', '') for msg in messages])))
+        with _API_SEMAPHORE:
+            try:
+                raw_response = self.client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature if temperature is not None else 0.3,
+                    timeout=_API_CALL_TIMEOUT,
+                    stream=True
+                )
+                _RATE_LIMITER.update_from_headers(raw_response.headers)
+                stream = raw_response.parse()
+            except Exception as e:
+                # 스트림 시작 전 실패 시 기본 텍스트 정리로 대체
+                if isinstance(e, openai.AuthenticationError):
+                    _INVALID_KEYS.add(self._key_hash)
+                elif not isinstance(e, openai.APIStatusError) or e.status_code in _RETRYABLE_STATUS_CODES:
+                    _breaker_record_failure()
+                logger.warning(f"GPT 스트리밍 호출 실패, 기본 텍스트 포맷팅 사용: {e}")
+                yield self._fallback_formatting(pages, file_name)
+                return
+            
+            yield header
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                _breaker_record_success()
+            except Exception as e:
+                _breaker_record_failure()
+                logger.error(f"GPT 스트리밍 중 오류: {e}")
+                yield f"\n\n❌ 생성 중 오류 발생: {str(e)}"
+    
+    def summarize_content(self, pages: List[Dict[str, Any]], file_name: str) -> str:
+        """
+        추출된 텍스트를 요약 (선택적 기능)
+        
+        Args:
+            pages: PDF 페이지 데이터 리스트
+            file_name: PDF 파일명
+            
+        Returns:
+            GPT로 생성된 요약
+        """
+        try:
+            raw_text = self._combine_extracted_text(pages)
+            
+            if not raw_text.strip():
+                return "❌ 요약할 텍스트가 없습니다."
+            
+            # 요약 프롬프트
+            prompt = f"""
+다음 PDF 문서의 내용을 한국어로 요약해주세요:
+
+문서명: {file_name}
+페이지 수: {len(pages)}
+
+내용:
+{raw_text}  # 전체 텍스트 포함
+
+요구사항:
+1. 핵심 내용만 간결하게 요약
+2. 중요한 키워드와 개념 포함
+3. 구조화된 형태로 작성
+4. 한국어 사용
+"""
+
+            response = self._safe_api_call(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "당신은 문서 요약 전문가입니다. 핵심 내용을 놓치지 않고 간결하게 요약해주세요."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                max_tokens=2000,
+                temperature=0.3
+            )
+            
+            if response is None:
+                return "❌ 요약 생성 중 오류 발생: GPT API 호출 실패"
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            logger.error(f"GPT 요약 중 오류: {e}")
+            return f"❌ 요약 생성 중 오류 발생: {str(e)}"
+    
+    _PARALLEL_METHODS = ('format_extracted_text', 'summarize_extracted_text', 'summarize_content',
+                         'analyze_for_comparison', 'analyze_for_detail', 'analyze_surrender_value')
+    
+    def process_documents_parallel(self, documents: List[Tuple[List[Dict[str, Any]], str]],
+                                   method: str = 'summarize_extracted_text', max_workers: int = 8) -> List[str]:
+        """
+        여러 문서를 동시에 처리합니다. (API 호출은 네트워크 대기가 대부분이므로 스레드로 병렬화)
+        
+        Args:
+            documents: (pages, file_name) 튜플 리스트
+            method: 문서별로 실행할 메서드 이름
+            max_workers: 동시 API 호출 수 (Rate Limit 고려)
+            
+        Returns:
+            입력 순서와 같은 순서의 결과 리스트
+        """
+        if method not in self._PARALLEL_METHODS:
+            raise ValueError(f"병렬 처리를 지원하지 않는 메서드입니다: {method}")
+        
+        func = getattr(self, method)
+        if len(documents) <= 1:
+            return [func(pages, file_name) for pages, file_name in documents]
+        
+        logger.info(f"📚 {len(documents)}개 문서 병렬 처리 시작: {method} (최대 {max_workers}개 동시)")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda doc: func(*doc), documents))
+    
+    # OpenAI Batch API 한 배치당 최대 요청 수
+    _BATCH_MAX_REQUESTS = 50000
+    _BATCH_DONE_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+    
+    def submit_batch(self, requests: List[Dict[str, Any]]) -> str:
+        """
+        Chat Completions 요청들을 OpenAI Batch API로 제출합니다. (실시간 응답이 필요 없는 대량 작업용, 비용 50%)
+        
+        Args:
+            requests: {"custom_id": str, "body": chat.completions 요청 본문} 리스트
+            
+        Returns:
+            배치 ID
+        """
+        if getattr(self.client, 'batches', None) is None:
+            raise RuntimeError("설치된 openai 패키지가 Batch API를 지원하지 않습니다. openai를 업그레이드해주세요.")
+        if len(requests) > self._BATCH_MAX_REQUESTS:
+            raise ValueError(f"배치당 최대 {self._BATCH_MAX_REQUESTS}개 요청까지 제출할 수 있습니다: {len(requests)}")
+        
+        lines = [
+            _json_bytes({
+                "custom_id": request["custom_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request["body"]
+            })
+            for request in requests
+        ]
+        batch_file = self.client.files.create(
+            file=("batch_input.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"📦 배치 제출 완료: {batch.id} ({len(requests)}개 요청)")
+        return batch.id
+    
+    def poll_batch(self, batch_id: str, interval: float = 30, timeout: Optional[float] = None) -> Dict[str, Optional[str]]:
+        """
+        배치가 끝날 때까지 기다린 뒤 결과를 반환합니다.
+        
+        Args:
+            batch_id: submit_batch가 반환한 배치 ID
+            interval: 상태 확인 간격 (초)
+            timeout: 최대 대기 시간 (초, None이면 무제한)
+            
+        Returns:
+            custom_id -> 응답 텍스트 (실패한 요청은 None)
+        """
+        started = time.time()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in self._BATCH_DONE_STATUSES:
+                break
+            if timeout is not None and time.time() - started > timeout:
+                raise TimeoutError(f"배치 {batch_id} 대기 시간 초과 (상태: {batch.status})")
+            time.sleep(interval)
+        
+        logger.info(f"📦 배치 {batch_id} 종료: {batch.status}")
+        results = {}
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).content.splitlines():
+                if not line.strip():
+                    continue
+                item = _json_loads(line)
+                response = item.get('response') or {}
+                try:
+                    results[item['custom_id']] = response['body']['choices'][0]['message']['content']
+                except (KeyError, IndexError, TypeError):
+                    results[item['custom_id']] = None
+        return results
+    
+    def summarize_batch(self, jobs: List[Tuple[List[Dict[str, Any]], str]], poll_interval: float = 30) -> List[str]:
+        """
+        여러 문서를 Batch API로 요약합니다. (summarize_extracted_text와 같은 프롬프트, 입력 순서대로 반환)
+        
+        Args:
+            jobs: (pages, file_name) 튜플 리스트
+            poll_interval: 배치 상태 확인 간격 (초)
+        """
+        requests = []
+        for i, (pages, file_name) in enumerate(jobs):
+            raw_text = self._smart_truncate_text(self._dedupe_text(self._combine_extracted_text(pages)), max_input_tokens=100000)
+            requests.append({
+                "custom_id": f"summary-{i}",
+                "body": {
+                    "model": self.model,
+                    "messages": self._create_summary_messages(raw_text, file_name),
+                    "temperature": 0.3
+                }
+            })
+        
+        batch_ids = [
+            self.submit_batch(requests[start:start + self._BATCH_MAX_REQUESTS])
+            for start in range(0, len(requests), self._BATCH_MAX_REQUESTS)
+        ]
+        contents = {}
+        for batch_id in batch_ids:
+            contents.update(self.poll_batch(batch_id, interval=poll_interval))
+        
+        summaries = []
+        for i, (pages, file_name) in enumerate(jobs):
+            content = contents.get(f"summary-{i}")
+            if content:
+                summaries.append(self._create_summary_header(file_name, len(pages)) + content.strip())
+            else:
+                logger.warning(f"배치 요약 실패, 기본 텍스트 포맷팅 사용: {file_name}")
+                summaries.append(self._fallback_formatting(pages, file_name))
+        return summaries
+    
+    _COMBINED_CACHE_SIZE = 4
+    
+    @staticmethod
+    def _has_page_text(pages: List[Dict[str, Any]]) -> bool:
+        """텍스트(또는 OCR 텍스트)가 있는 페이지가 하나라도 있는지 (첫 페이지에서 바로 끝나는 경우가 대부분)"""
+        return isinstance(pages, list) and any(
+            isinstance(page, dict) and (page.get('text', '').strip() or page.get('ocr_text', '').strip())
+            for page in pages
+        )
+    
+    def _combine_extracted_text(self, pages: List[Dict[str, Any]]) -> str:
+        """모든 페이지의 텍스트를 합치기 (전체 내용 보존, 같은 pages 리스트는 캐시 재사용)"""
+        # 타입 안전성 확인
+        if not isinstance(pages, list):
+            logger.error(f"Expected list, got {type(pages)}")
+            return ""
+        
+        # 캐시에 pages 참조를 함께 보관하므로 id가 다른 객체에 재사용될 수 없음
+        cached = self._combined_cache.get(id(pages))
+        if cached is not None and cached[0] is pages:
+            return cached[1]
+        
+        parts = []
+        seen_pages = {}  # 페이지 내용 해시 -> 처음 등장한 페이지 번호
+        empty_pages = []
+        total_pages = len(pages)
+        logger.info(f"GPT 텍스트 조합 시작: 총 {total_pages} 페이지")
+        
+        for i, page in enumerate(pages):
+            # 각 페이지가 딕셔너리인지 확인
+            if not isinstance(page, dict):
+                logger.error(f"Page {i} is not dict: {type(page)}")
+                continue
+                
+            page_num = page.get('page_number', i+1)
+            text = page.get('text', '').strip()
+            ocr_text = page.get('ocr_text', '').strip()
+            
+            # 텍스트가 없는 페이지는 페이지 구분 없이 마지막에 한 줄로 모아 표시
+            if not text and not ocr_text:
+                empty_pages.append(str(page_num))
+                continue
+            
+            # 해약환급금 관련 페이지 특별 표시
+            is_surrender_page = any(keyword in text for keyword in _SURRENDER_PAGE_KEYWORDS)
+            page_marker = f"\n\n=== 페이지 {page_num}/{total_pages} {'[해약환급금 관련]' if is_surrender_page else ''} ===\n"
+            parts.append(page_marker)
+            
+            if is_surrender_page:
+                logger.info(f"해약환급금 관련 페이지 {page_num} GPT 텍스트에 포함")
+            
+            # 앞 페이지와 내용이 완전히 같으면 (반복되는 안내문 등) 참조만 남겨 토큰 절약
+            page_hash = hashlib.blake2b(f"{text}\0{ocr_text}".encode('utf-8'), digest_size=8).hexdigest()
+            if page_hash in seen_pages:
+                parts.append(f"[이 페이지는 페이지 {seen_pages[page_hash]}과 동일]\n")
+                continue
+            seen_pages[page_hash] = page_num
+            
+            # 기본 텍스트 추가 (더 많은 내용 포함)
+            if text:
+                parts.append(text + "\n")
+            
+            # OCR 텍스트 추가 (구분하여 표시, 기본 텍스트와 같으면 생략)
+            if ocr_text and ocr_text != text:
+                if text:
+                    parts.append("\n[OCR로 추가 추출된 텍스트]\n")
+                parts.append(ocr_text + "\n")
+        
+        if empty_pages:
+            parts.append(f"\n\n[페이지 {','.join(empty_pages)}: 텍스트 없음]\n")
+        
+        all_text = "".join(parts)
+        logger.info(f"전체 텍스트 길이: {len(all_text)} 자, 총 {total_pages} 페이지")
+        
+        if len(self._combined_cache) >= self._COMBINED_CACHE_SIZE:
+            self._combined_cache.pop(next(iter(self._combined_cache)), None)
+        self._combined_cache[id(pages)] = (pages, all_text)
+        return all_text
+    
+    def _create_formatting_prompt(self, raw_text: str, file_name: str, page_count: int) -> str:
+        """GPT 포맷팅용 프롬프트 생성"""
+        return f"""
+다음은 PDF "{file_name}"에서 OCR로 추출한 원본 텍스트입니다.
+내용을 요약하지 말고, 읽기 쉽게 정리만 해주세요.
+
+문서 정보:
+- 파일명: {file_name}
+- 페이지 수: {page_count}
+
+원본 텍스트:
+{raw_text}  # 전체 텍스트 포함
+
+정리 요구사항:
+1. 내용을 절대 요약하지 마세요 - 모든 정보를 보존
+2. 구조화된 형태로 재구성 (제목, 목록, 표 등)
+3. 오타나 OCR 오류는 자연스럽게 수정
+4. 문단과 섹션을 명확히 구분
+5. 마크다운 형식 사용 (제목: ##, 목록: -, 강조: **)
+6. 중요한 정보는 굵게 표시
+7. 한국어는 자연스럽게, 영어는 원문 유지
+
+결과 형식:
+# 문서 제목 (파일명 기반)
+
+## 개요
+[문서의 기본 정보]
+
+## 주요 내용
+[구조화된 전체 내용]
+"""
+    
+    def _add_document_metadata(self, formatted_text: str, file_name: str, page_count: int) -> str:
+        """문서 메타데이터 추가"""
+        metadata = _document_header("📄 PDF 문서 정리 결과", file_name, page_count, "처리 시간", "🤖 정리 방식: GPT API 사용")
+        return metadata + formatted_text
+    
+    def _fallback_formatting(self, pages: List[Dict[str, Any]], file_name: str) -> str:
+        """GPT 실패 시 기본 포맷팅"""
+        header = _document_header("📄 PDF 텍스트 추출 결과 (기본 모드)", file_name, len(pages), "처리 시간", "⚠️  GPT API 사용 불가 - 기본 포맷 적용")
+        parts = [header]
+        
+        # 페이지별 텍스트 추가
+        for i, page in enumerate(pages):
+            # 각 페이지가 딕셔너리인지 확인
+            if not isinstance(page, dict):
+                continue
+                
+            page_num = page.get('page_number', i+1)
+            text = page.get('text', '')
+            ocr_text = page.get('ocr_text', '')
+            
+            parts.append(f"\n## 페이지 {page_num}\n")
+            parts.append("-" * 20 + "\n")
+            
+            if text.strip():
+                parts.append(text.strip() + "\n\n")
+            
+            if ocr_text.strip():
+                parts.append("**[OCR 텍스트]**\n")
+                parts.append(ocr_text.strip() + "\n\n")
+        
+        return "".join(parts)
+    
+    def analyze_for_comparison(self, pages: List[Dict[str, Any]], file_name: str) -> str:
+        """
+        상품 비교용 핵심 정보 추출 및 분석
+        
+        Args:
+            pages: PDF 페이지 데이터 리스트
+            file_name: PDF 파일명
+            
+        Returns:
+            비교 분석에 특화된 구조화된 정보
+        """
+        try:
+            # 텍스트가 있는 페이지가 하나도 없으면 텍스트 조합 없이 바로 종료
+            if not self._has_page_text(pages):
+                return "❌ 분석할 텍스트가 없습니다."
+            
+            raw_text = self._combine_extracted_text(pages)
+            
+            # 토큰 제한 고려한 스마트 절단 (비교 분석용 - 전체 보존)
+            smart_text = self._smart_truncate_text(self._dedupe_text(raw_text), max_input_tokens=80000)
+            
+            # 비교 분석용 특화 프롬프트 (문서별 내용은 user 메시지 뒤쪽에)
+            messages = [
+                {
+                    "role": "system",
+                    "content": _COMPARISON_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f'다음은 보험 상품 문서 "{file_name}"에서 추출한 텍스트입니다.\n'
+                        "이 상품을 다른 상품과 비교하기 위한 핵심 정보를 체계적으로 분석해주세요.\n"
+                        f"결과 제목의 [파일명]은 {file_name} 입니다.\n\n"
+                        f"추출된 텍스트:\n{smart_text}"
+                    )
+                }
+            ]
+            
+            response = self._safe_api_call(
+                messages=messages,
+                max_tokens=None,  # 출력 상한 없이 모델이 자연스럽게 종료
+                retries=5,
+                delay=2,
+                semantic_key=('analyze_for_comparison', smart_text)
+            )
+            
+            if response is None:
+                # GPT 실패 시 기본 텍스트 정리 시도
+                logger.warning("GPT API 실패, 기본 텍스트 포맷팅 사용")
+                return self._fallback_formatting(pages, file_name)
+            
+            analysis = response.choices[0].message.content.strip()
+            
+            # 메타데이터 추가
+            metadata = _document_header("📊 상품 비교 분석 결과", file_name, len(pages), "분석 시간", "🎯 분석 목적: 상품 비교용 핵심 정보 추출")
+            
+            return metadata + analysis
+            
+        except Exception as e:
+            logger.error(f"상품 비교 분석 중 오류: {e}")
+            return f"❌ 비교 분석 생성 중 오류 발생: {str(e)}"
+    
+    def analyze_products_comparison(self, pages1: List[Dict[str, Any]], file1_name: str, 
+                                    pages2: List[Dict[str, Any]], file2_name: str, 
+                                    custom_prompt: str = "",
+                                    required_coverages: Optional[List[str]] = None) -> str:
+        """
+        두 보험상품의 직접적인 비교 분석을 수행합니다.
+        
+        Args:
+            pages1: 첫 번째 상품 페이지 데이터
+            file1_name: 첫 번째 상품 파일명
+            pages2: 두 번째 상품 페이지 데이터
+            file2_name: 두 번째 상품 파일명
+            
+        Returns:
+            두 상품의 종합적인 비교 분석 결과
+        """
+        try:
+            if not self._has_page_text(pages1) or not self._has_page_text(pages2):
+                return "❌ 비교할 텍스트가 충분하지 않습니다."
+            
+            # 두 상품의 텍스트 추출
+            text1 = self._combine_extracted_text(pages1)
+            text2 = self._combine_extracted_text(pages2)
+            
+            # 금액 단위 정규화 (두 상품 모두)
+            normalized_text1 = self._normalize_currency_units(text1)
+            normalized_text2 = self._normalize_currency_units(text2)
+            
+            # 토큰 제한 고려한 스마트 절단 (두 상품 모두)
+            smart_text1 = self._smart_truncate_text(self._dedupe_text(normalized_text1), max_input_tokens=40000)
+            smart_text2 = self._smart_truncate_text(self._dedupe_text(normalized_text2), max_input_tokens=40000)
+            
+            pages1_count = len(pages1)
+            pages2_count = len(pages2)
+            product1_label = file1_name or "상품 A"
+            product2_label = file2_name or "상품 B"
+            
+            # 표 데이터 추출 및 주입
+            table_data1 = self._extract_table_data_from_pages(pages1)
+            table_data2 = self._extract_table_data_from_pages(pages2)
+            
+            # 필수 담보 지침
+            required_coverages = required_coverages or []
+
+            # 1단계: 담보 리스트 추출 (일관성 확보를 위해 먼저 추출)
+            # 주석: 담보 리스트를 먼저 추출하여 순서를 고정하지만, 실패 시에도 프롬프트에서 순서 강제
+            coverage_list = self._extract_coverage_list(smart_text1, smart_text2, product1_label, product2_label)
+            
+            user_instruction = ""
+            if custom_prompt:
+                user_instruction = f"""
+🚨 **사용자 특별 요청사항**:
+{custom_prompt}
+
+위 요청사항을 반드시 우선적으로 고려하여 분석을 진행해주세요.
+"""
+            
+            required_coverage_section = ""
+            if required_coverages:
+                coverage_lines = "\n".join(f"- {coverage}" for coverage in required_coverages)
+                required_coverage_section = (
+                    "🚨 **반드시 표에 포함해야 하는 담보 목록**:\n"
+                    f"{coverage_lines}\n\n"
+                    "위 담보는 문서에 해당 정보가 없어도 표에 행을 추가하고 값은 '해당 없음'으로 명시하세요.\n"
+                )
+            
+            # 추출된 담보 리스트 섹션
+            coverage_list_section = ""
+            if coverage_list:
+                coverage_list_section = f"""
+🚨 **추출된 담보 리스트 (매우 중요 - 반드시 이 순서대로 표시하세요)**:
+
+{coverage_list}
+
+⚠️ **중요**: 위 담보 리스트는 두 문서에서 추출한 모든 담보 항목입니다.
+반드시 위 순서대로 표에 나열하세요. 순서를 절대 변경하지 마세요.
+문서에 없는 담보는 '해당 없음'으로 표시하되, 위 순서는 반드시 유지하세요.
+"""
+            else:
+                # 담보 리스트 추출 실패 시 프롬프트에 담보 순서 강조
+                coverage_list_section = """
+🚨 **담보 항목 순서 (매우 중요 - 반드시 이 순서대로 표시하세요)**:
+다음 순서를 정확히 준수하여 담보를 나열하세요:
+
+**카테고리 1: 기본계약 관련**
+1. 기본계약(상해후유장해)
+2. 보험료납입면제대상담보
+
+**카테고리 2: 상해 관련 담보**
+3. 골절진단담보
+4. 화상진단담보
+5. 상해입원일당(1-180일)담보
+6. 상해입원일당(1-180일, 중환자실)담보
+7. 상해입원일당(1-30일)담보
+8. 상해수술 II (1-5종)(1종)담보
+9. 상해수술 II (1-5종)(2종)담보
+10. 상해수술 II (1-5종)(3종)담보
+11. 상해수술 II (1-5종)(4종)담보
+12. 상해수술 II (1-5종)(5종)담보
+13. 상해통원수술 II 담보
+14. 상해흉터성형수술 II 담보
+15. 상해입원수술 II 담보
 
-## 3. 리모델링 전용 가입담보 ({product2_label}만 제공)  
-| 보장 항목 | 보장 내용 요약 | {product1_label} 가입 여부 | {product1_label} 가입금액 | {product2_label} 납입기간/만기 | {product2_label} 가입금액 | {product2_label} 보험료 |
------------|----------------|----------------|----------------|----------------|----------------|----------------|
-| [담보명] | [설명] | 해당 없음 | 해당 없음 | [기간 - 예: 20년납30세만기, 30년납100세만기 등 상품 문서의 원본 그대로 표기] | [금액]원 ⚠️ 반드시 원 단위로만 표기 (천원, 만원 단위 사용 금지) | [금액]원 |
+**카테고리 3: 질병 관련 담보**
+16. 질병입원일당 II (1-180일)담보
+17. 질병입원일당 II (1-180일, 중환자실)담보
+18. 질병수술담보
 
-🚨 **최종 확인 (매우 중요 - 반드시 준수하세요)**: 
-- 출력은 **오직 위 3개의 표 섹션만** 출력하세요:
-  1. 요약 비교표 (상품 기본정보) - **섹션 헤더(## 1. 요약 비교표)와 표를 반드시 포함하세요.**
-  2. 공통 가입담보 비교 - **섹션 헤더(## 2. 공통 가입담보 비교)와 표를 반드시 포함하세요.**
-  3. 리모델링 전용 가입담보 - **섹션 헤더(## 3. 리모델링 전용 가입담보)와 표를 반드시 포함하세요.**
-- 위 3개 표 섹션의 **섹션 헤더와 표는 반드시 포함하세요.**
-- 위 3개 표 섹션 이후에 **어떤 내용도 추가하지 마세요.**
-- 표의 셀 내용과 섹션 헤더를 제외한 **모든 텍스트, 문단, 설명을 절대 작성하지 마세요.**
-- "만기 구조 및 납입기간에 따른 보장 지속성 차이", "리모델링 상품 분석", "고객 입장에서의 합리적인 선택", "초기 비용 대비 장기 가치 평가" 등의 섹션을 절대 작성하지 마세요.
-- "상품 A는...", "리모델링 상품은...", "물가상승률", "재가입", "재갱신", "보장 지속성", "장기 가치", "보험료가", "만기가", "초기 비용", "장기적으로" 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요.
-- 표 이외의 추가 설명, 요약, 결론, 분석, 비교 설명 섹션을 절대 작성하지 마세요.
-- **3개 표 섹션의 헤더와 표만 출력하고, 그 외 부가 설명 텍스트는 절대 출력하지 마세요.**
+**카테고리 4: 암 관련 담보**
+19. 암진단 II (유사암제외)담보
+20. 유사암진단 II 담보
 
+**카테고리 5: 심혈관/뇌혈관 질환 담보**
+21. 심혈관질환(특정 I,I49제외)진단담보
+22. 심혈관질환(I49)진단담보
+23. 뇌혈관질환(I)진단담보
+
+**카테고리 6: 기타 특수 담보**
+24. 특정감염병 II 입원일당(1-30일)담보
+25. 기타 특수 질환 담보
 
+⚠️ 위 순서를 정확히 준수하여 담보를 나열하세요. 순서를 절대 변경하지 마세요.
 """
 
+            prompt = _PRODUCTS_COMPARISON_PROMPT_TEMPLATE.substitute(
+                user_instruction=user_instruction,
+                required_coverage_section=required_coverage_section.strip(),
+                coverage_list_section=coverage_list_section,
+                product1_label=product1_label, product2_label=product2_label,
+                table_data1=table_data1, table_data2=table_data2,
+                file1_name=file1_name, file2_name=file2_name,
+                pages1_count=pages1_count, pages2_count=pages2_count,
+                smart_text1=smart_text1, smart_text2=smart_text2
+            )
+
             messages = [
                 {
                     "role": "system",
-                    "content": "당신은 보험상품 비교 분석 전문가입니다. 두 상품을 비교하여 3개 표 섹션(1. 요약 비교표, 2. 공통 가입담보 비교, 3. 리모델링 전용 가입담보)의 헤더와 표만 출력하세요. 🚨 매우 중요: 1) **표 데이터를 최우선으로 사용하세요.** 표 데이터에 있는 모든 숫자는 정확히 그대로 사용하세요. 모든 금액과 숫자는 원본 문서의 정확한 값을 그대로 사용하고, 절대 반올림하거나 수정하지 마세요. 숫자를 반올림하거나 근사치로 변경하지 마세요. (예: 1,270원은 절대 1,000원이나 1,300원으로 변경하지 마세요) 천 단위 구분 기호(쉼표)를 정확히 유지하세요. (예: 1,270원, 4,380원, 2,405원) 2) 금액 표기 시 '천원', '만원', '억원' 같은 단위를 절대 사용하지 말고, 반드시 숫자만 계산하여 '원' 단위로만 표기하세요 (예: '1,000천원' → '1,000,000원', '20만원' → '200,000원', '5백만원' → '5,000,000원'). 변환 시에도 정확한 숫자를 사용하세요. 3) 만기기간은 상품 문서에 있는 그대로 표기하고(예: '100세 만기', '20년납100세만기'), 차이점은 반드시 '-'로 표기하세요. 4) 담보 항목은 반드시 사용자 프롬프트에 정의된 순서대로 표시하세요. 순서를 절대 변경하지 마세요. 5) 🚨 절대 중요: 출력은 오직 3개의 표 섹션만 출력하세요 - 1. 요약 비교표(## 1. 요약 비교표 헤더 포함), 2. 공통 가입담보 비교(## 2. 공통 가입담보 비교 헤더 포함), 3. 리모델링 전용 가입담보(## 3. 리모델링 전용 가입담보 헤더 포함). 위 3개 표 섹션의 헤더와 표는 반드시 포함하세요. 위 3개 표 섹션 이외의 추가 섹션, 문단, 텍스트를 절대 작성하지 마세요. '만기 구조 및 납입기간에 따른 보장 지속성 차이', '리모델링 상품 분석', '고객 입장에서의 합리적인 선택', '초기 비용 대비 장기 가치 평가' 등의 섹션을 절대 작성하지 마세요. '상품 A는...', '리모델링 상품은...', '물가상승률', '재가입', '재갱신', '보장 지속성', '장기 가치', '보험료가', '만기가', '초기 비용', '장기적으로' 등의 키워드가 포함된 설명 문단을 절대 작성하지 마세요. 표의 셀 내용과 섹션 헤더를 제외한 모든 텍스트, 문단, 설명, 분석, 비교 설명을 절대 작성하지 마세요. 3개 표 섹션의 헤더와 표만 출력하고 그 외 부가 설명 텍스트는 절대 출력하지 마세요. 전문용어는 표의 셀 내용에만 괄호로 간단히 설명을 추가하세요."
+                    "content": _PRODUCTS_COMPARISON_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -1247,10 +2463,11 @@ class GPTSummarizer:
             
             response = self._safe_api_call(
                 messages=messages,
-                max_tokens=8000,  # 종합 비교 분석을 위해 더 큰 토큰 할당
-                retries=3,
+                max_tokens=None,  # 출력 상한 없이 모델이 자연스럽게 종료
+                retries=5,
                 delay=2,
-                temperature=0.0  # 일관성 있는 결과를 위해 temperature 0으로 설정
+                temperature=0.0,  # 일관성 있는 결과를 위해 temperature 0으로 설정
+                stream=True  # 긴 비교표 생성 중에도 연결이 끊기지 않도록 조각 단위로 수신
             )
             
             if response is None:
@@ -1260,23 +2477,18 @@ class GPTSummarizer:
             
             analysis = response.choices[0].message.content.strip()
             
-            # 디버깅: GPT 응답 로깅
-            logger.info(f"📊 GPT 응답 샘플 (처음 500자): {analysis[:500]}")
+            # 디버깅: GPT 응답 로깅 (INFO가 꺼져 있으면 슬라이스/포맷 생략)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("📊 GPT 응답 샘플 (처음 500자): %s", analysis[:500])
             
             # 금액 단위 정규화 적용 (천원, 만원, 억원 → 원 단위로 변환)
             analysis = self._normalize_currency_units(analysis)
             
             # 메타데이터 추가
-            from datetime import datetime
-            metadata = f"""🔍 보험상품 종합 비교 분석 결과
-{'='*60}
-
-📁 {product1_label}: {file1_name} ({pages1_count}페이지)
-📁 {product2_label}: {file2_name} ({pages2_count}페이지)
-
-{'='*60}
-
-"""
+            metadata = _PRODUCTS_COMPARISON_HEADER.format(
+                product1_label=product1_label, file1_name=file1_name, pages1_count=pages1_count,
+                product2_label=product2_label, file2_name=file2_name, pages2_count=pages2_count
+            )
             
             return metadata + analysis
             
@@ -1391,7 +2603,8 @@ class GPTSummarizer:
                 return ""
             
             coverage_list = response.choices[0].message.content.strip()
-            logger.info(f"📋 추출된 담보 리스트 (처음 1000자): {coverage_list[:1000]}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("📋 추출된 담보 리스트 (처음 1000자): %s", coverage_list[:1000])
             
             return coverage_list
             
@@ -1403,28 +2616,19 @@ class GPTSummarizer:
                            pages2: List[Dict[str, Any]], file2_name: str) -> str:
         """GPT 분석 실패 시 기본 비교 형태로 조합"""
         try:
-            # 개별 분석 수행
-            analysis1 = self.analyze_for_comparison(pages1, file1_name)
-            analysis2 = self.analyze_for_comparison(pages2, file2_name)
+            # 개별 분석 수행 (두 상품 동시 호출)
+            analysis1, analysis2 = self.process_documents_parallel(
+                [(pages1, file1_name), (pages2, file2_name)],
+                method='analyze_for_comparison',
+                max_workers=2
+            )
             product1_label = file1_name or "상품 A"
             product2_label = file2_name or "상품 B"
 
-            return f"""# 🔍 기본 비교 분석 (GPT 분석 실패 시 대체)
-
-## 📊 {product1_label} 분석
-{analysis1}
-
----
-
-## 📊 {product2_label} 분석  
-{analysis2}
-
----
-
-## ⚠️ 알림
-GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
-상세한 비교를 위해서는 다시 시도해주세요.
-"""
+            return _FALLBACK_COMPARISON_TEMPLATE.substitute(
+                product1_label=product1_label, analysis1=analysis1,
+                product2_label=product2_label, analysis2=analysis2
+            )
             
         except Exception as e:
             logger.error(f"Fallback 비교 분석 중 오류: {e}")
@@ -1442,14 +2646,11 @@ GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
             해약환급금 관련 상세 정보
         """
         try:
-            raw_text = self._combine_extracted_text(pages)
-            
-            if not raw_text.strip():
+            if not self._has_page_text(pages):
                 return "❌ 분석할 텍스트가 없습니다."
             
-            # 해약환급금 관련 텍스트만 필터링
-            surrender_keywords = ['해약환급금', '환급금', '해약', '환급', '경과기간', '납입보험료']
-            surrender_text = self._extract_surrender_related_text(raw_text, surrender_keywords)
+            # 해약환급금 관련 텍스트만 필터링 (전체 텍스트를 합치지 않고 페이지에서 바로 줄 단위로)
+            surrender_text = self._extract_surrender_related_text(self._iter_lines(pages))
             
             if not surrender_text.strip():
                 return "❌ 해약환급금 관련 정보를 찾을 수 없습니다."
@@ -1512,8 +2713,8 @@ GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
             
             response = self._safe_api_call(
                 messages=messages,
-                max_tokens=6000,
-                retries=3,
+                max_tokens=None,  # 출력 상한 없이 모델이 자연스럽게 종료
+                retries=5,
                 delay=2
             )
             
@@ -1523,17 +2724,7 @@ GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
             analysis = response.choices[0].message.content.strip()
             
             # 메타데이터 추가
-            from datetime import datetime
-            metadata = f"""💰 해약환급금 특화 분석 결과
-{'='*50}
-
-📁 파일명: {file_name}
-📑 페이지 수: {len(pages)}
-
-
-{'='*50}
-
-"""
+            metadata = _SURRENDER_HEADER.format(file_name=file_name, page_count=len(pages))
             
             return metadata + analysis
             
@@ -1541,42 +2732,49 @@ GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
             logger.error(f"해약환급금 분석 중 오류: {e}")
             return f"❌ 해약환급금 분석 생성 중 오류 발생: {str(e)}"
     
-    def _extract_surrender_related_text(self, text: str, keywords: List[str]) -> str:
-        """해약환급금 관련 텍스트만 추출"""
-        lines = text.split('\n')
-        surrender_lines = []
-        
-        for line in lines:
-            if any(keyword in line for keyword in keywords):
-                surrender_lines.append(line)
-                # 주변 컨텍스트도 포함 (표 구조 보존)
-                if '|' in line or any(char.isdigit() for char in line):
-                    surrender_lines.append(line)
-        
-        return '\n'.join(surrender_lines)
+    def _extract_surrender_related_text(self, lines: Iterable[str]) -> str:
+        """해약환급금 관련 줄만 추출 (키워드 검사는 컴파일된 정규식 한 번으로)"""
+        search = _SURRENDER_LINE_RE.search
+        return '\n'.join(line for line in lines if search(line))
+    
+    @staticmethod
+    def _iter_lines(pages: List[Dict[str, Any]]) -> Iterator[str]:
+        """
+        페이지 텍스트를 줄 단위로 차례로 반환 (_combine_extracted_text처럼 전체 문자열을 만들지 않음)
+        
+        페이지 구분 줄과 OCR 텍스트(기본 텍스트와 다를 때만)를 _combine_extracted_text와 같은 순서로 포함
+        """
+        total_pages = len(pages)
+        for i, page in enumerate(pages):
+            if not isinstance(page, dict):
+                continue
+            text = page.get('text', '').strip()
+            ocr_text = page.get('ocr_text', '').strip()
+            if not text and not ocr_text:
+                continue
+            
+            is_surrender_page = any(keyword in text for keyword in _SURRENDER_PAGE_KEYWORDS)
+            yield f"=== 페이지 {page.get('page_number', i+1)}/{total_pages} {'[해약환급금 관련]' if is_surrender_page else ''} ==="
+            if text:
+                yield from text.splitlines()
+            if ocr_text and ocr_text != text:
+                yield from ocr_text.splitlines()
     
     def _extract_table_data_from_pages(self, pages: List[Dict[str, Any]]) -> str:
         """페이지에서 표 데이터 추출 (개선된 해약환급금 표 파싱)"""
         try:
-            import sys
-            import os
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            
-            try:
-                from parsing.table_parser import TableParser
-                parser = TableParser()
-            except ImportError as e:
-                logger.error(f"TableParser import 실패: {e}")
+            if _TABLE_PARSER is None:
                 return "표 데이터 추출 실패 (모듈 import 오류)"
             
             table_data = []
             
             for page in pages:
                 page_text = page.get('text', '')
-                if page_text:
+                # 표 시작 키워드가 없는 페이지는 줄 단위 파싱 없이 건너뜀
+                if page_text and any(keyword in page_text for keyword in _SURRENDER_TABLE_START_KEYWORDS):
                     # 해약환급금 표 파싱
                     try:
-                        surrender_table = parser.parse_surrender_value_table(page_text)
+                        surrender_table = _TABLE_PARSER.parse_surrender_value_table(page_text)
                         if surrender_table:
                             table_data.extend(surrender_table)
                     except Exception as e:
@@ -1590,21 +2788,23 @@ GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
             logger.info(f"표 데이터 {len(table_data)}개 추출됨")
             
             # 표 데이터를 구조화된 형태로 변환
-            formatted_data = []
-            for item in table_data:
-                if item.get('type') == 'data':
-                    columns = item.get('columns', [])
-                    amounts = item.get('amounts', [])
-                    
-                    if len(columns) >= 6:  # 경과기간, 납입보험료, 적립부분환급금, 보장부분환급금, 환급금(합계), 환급률
-                        formatted_data.append({
-                            "period": columns[0] if len(columns) > 0 else "",
-                            "premium": columns[1] if len(columns) > 1 else "",
-                            "surrender_amount": columns[4] if len(columns) > 4 else "",
-                            "surrender_rate": columns[5] if len(columns) > 5 else "",
-                            "amounts": amounts
-                        })
-                        logger.info(f"해약환급금 데이터 추가: {columns[0]} - {columns[4]}원 ({columns[5]})")
+            # 경과기간, 납입보험료, 적립부분환급금, 보장부분환급금, 환급금(합계), 환급률 6열이 모두 있는 행만 사용
+            formatted_data = [
+                {
+                    "period": columns[0],
+                    "premium": columns[1],
+                    "surrender_amount": columns[4],
+                    "surrender_rate": columns[5],
+                    "amounts": item.get('amounts', [])
+                }
+                for item in table_data
+                if item.get('type') == 'data'
+                for columns in (item.get('columns', []),)
+                if len(columns) >= 6
+            ]
+            if logger.isEnabledFor(logging.DEBUG):
+                for row in formatted_data:
+                    logger.debug(f"해약환급금 데이터 추가: {row['period']} - {row['surrender_amount']}원 ({row['surrender_rate']})")
             
             logger.info(f"구조화된 표 데이터 {len(formatted_data)}개 생성됨")
             return str(formatted_data)
@@ -1625,152 +2825,29 @@ GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
             상세 정보 제공에 특화된 종합 분석
         """
         try:
-            raw_text = self._combine_extracted_text(pages)
-            
-            if not raw_text.strip():
+            # 텍스트가 있는 페이지가 하나도 없으면 텍스트 조합 없이 바로 종료
+            if not self._has_page_text(pages):
                 return "❌ 분석할 텍스트가 없습니다."
             
+            raw_text = self._combine_extracted_text(pages)
+            
             # 토큰 제한 고려한 스마트 절단 (상세 분석용 - 전체 보존)
-            smart_text = self._smart_truncate_text(raw_text, max_input_tokens=80000)
+            smart_text = self._smart_truncate_text(self._dedupe_text(raw_text), max_input_tokens=80000)
             
-            # 상세 분석용 특화 프롬프트
-            prompt = f"""
-다음은 보험 상품 문서 "{file_name}"에서 추출한 전체 텍스트입니다.
-고객이 이 상품을 자세히 이해할 수 있도록 상세하고 실용적인 정보를 제공해주세요.
-
-추출된 텍스트:
-{smart_text}
-
-상세 분석 요구사항:
-1. **종합 상품 개요**
-   - 상품의 핵심 가치와 목적
-   - 누구를 위한 상품인지
-   - 이 상품의 철학과 설계 개념
-
-2. **완전한 보장 구조**
-   - 기본 보장 상세 설명
-   - 모든 특약 보장 내용 (중요도 순)
-   - 보장 제외 사항 및 주의사항
-   - 각 보장별 실제 활용 예시
-
-3. **보험료 구조 분석** 🚨 모든 금액은 원본 그대로 표기
-   - 보험료 산출 기준 (정확한 금액으로 예: 92,540원)
-   - 연령별, 성별 차이 (구체적 금액)
-   - 보험료 할인/할증 요인
-   - 갱신 조건 및 보험료 변동
-   
-   💡 **금액 표기 원칙**: 원본에서 92,540원이면 92,540원 그대로, 절대 반올림 금지
-
-4. **가입 조건 및 절차**
-   - 가입 가능 연령 및 조건
-   - 건강 고지 의무 사항
-   - 필요 서류 및 절차
-   - 가입 후 주의사항
-
-5. **실전 활용 가이드**
-   - 보험금 청구 절차
-   - 자주 발생하는 사고별 보상 범위
-   - 보험금 지급 제외 사례
-   - 고객이 알아두면 좋은 팁
-
-6. **장단점 심층 분석**
-   - 이 상품의 명확한 장점
-   - 한계나 아쉬운 점
-   - 다른 상품과의 차별점
-   - 개선 제안
-
-7. **생애주기별 활용법**
-   - 연령대별 활용 전략
-   - 가족 상황별 최적 설계
-   - 다른 보험과의 조합 방법
-
-8. **수치 정보 완전 정리**
-   - 모든 보험료 정보 테이블
-   - 해약환급금 상세 표
-   - 갱신 보험료 변동 예시
-   - 보장 금액별 비교표
-
-결과 형식:
-# 📖 [{file_name}] 완전 분석 가이드
-
-## 🎯 상품 철학 및 핵심 가치
-[이 상품이 추구하는 가치와 설계 철학]
-
-## 🏗️ 완전한 보장 구조
-### 🛡️ 기본 보장 (주계약)
-[상세한 기본 보장 설명]
-
-### ⭐ 특약 보장 완전 가이드
-[모든 특약을 중요도순으로 상세 설명]
-
-### ⚠️ 보장 제외 및 주의사항
-[고객이 반드시 알아야 할 제외 사항]
-
-## 💰 보험료 구조 완전 분석
-### 📊 보험료 산출 기준
-[보험료 결정 요소들]
-
-### 📈 갱신 및 변동 조건
-[보험료 변동 가능성]
-
-## 📋 가입 가이드
-### ✅ 가입 조건
-[상세한 가입 자격 및 조건]
-
-### 📝 필요 절차
-[단계별 가입 과정]
-
-## 🔧 실전 활용 매뉴얼
-### 💊 보험금 청구 가이드
-[실제 청구 시 필요한 모든 정보]
-
-### 📚 사례별 보상 범위
-[구체적인 상황별 보상 예시]
-
-## ⚖️ 장단점 완전 분석
-### ✅ 명확한 장점
-[이 상품의 확실한 강점들]
-
-### ⚠️ 한계 및 개선점
-[솔직한 아쉬운 점들]
-
-## 🎯 생애주기별 활용 전략
-### 👶 연령대별 전략
-[각 연령에서의 최적 활용법]
-
-### 👨‍👩‍👧‍👦 가족 상황별 설계
-[가족 구성에 따른 맞춤 전략]
-
-## 📊 완전한 수치 정보
-### 💰 보험료 상세표
-[모든 보험료 정보를 표로 정리]
-
-### 📈 해약환급금 표
-[경과 기간별 상세 환급 정보]
-
-### 🔄 갱신 보험료 예시
-[갱신 시 보험료 변동 예측]
-
-## 💡 전문가 조언
-[이 상품을 고려할 때 반드시 알아둘 점들]
-"""
-
-            messages = [
-                {
-                    "role": "system",
-                    "content": "당신은 보험상품 상세 분석 전문가입니다. 고객이 상품을 완전히 이해하고 현명한 선택을 할 수 있도록 상세하고 실용적인 정보를 제공해주세요. 모든 내용을 포함하되 이해하기 쉽게 설명해주세요. 🚨 중요: 모든 금액과 숫자는 원본 문서의 정확한 값을 그대로 사용하고, 절대 반올림하거나 수정하지 마세요."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
+            # 구조화 출력 우선 (출력 토큰 절감), 실패하면 기존 마크다운 생성으로 진행
+            if _DETAIL_STRUCTURED_ENABLED:
+                analysis = self._analyze_for_detail_structured(smart_text, file_name)
+                if analysis is not None:
+                    return self._create_detail_header(file_name, len(pages)) + analysis
+            
+            messages = self._create_detail_messages(smart_text, file_name)
             
             response = self._safe_api_call(
                 messages=messages,
-                max_tokens=8000,  # 상세 분석이므로 더 많은 토큰 할당
-                retries=3,
-                delay=2
+                max_tokens=None,  # 출력 상한 없이 모델이 자연스럽게 종료
+                retries=5,
+                delay=2,
+                semantic_key=('analyze_for_detail', smart_text)
             )
             
             if response is None:
@@ -1780,22 +2857,92 @@ GPT 비교 분석에 실패하여 기본 개별 분석을 제공합니다.
             
             analysis = response.choices[0].message.content.strip()
             
-            # 메타데이터 추가
-            from datetime import datetime
-            metadata = f"""📖 상품 상세 분석 결과
-{'='*50}
-
-📁 파일명: {file_name}
-📑 페이지 수: {len(pages)}
-⏰ 분석 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-🎯 분석 목적: 상품 상세 정보 제공
-
-{'='*50}
-
-"""
-            
-            return metadata + analysis
+            return self._create_detail_header(file_name, len(pages)) + analysis
             
         except Exception as e:
             logger.error(f"상품 상세 분석 중 오류: {e}")
             return f"❌ 상세 분석 생성 중 오류 발생: {str(e)}"
+    
+    def _analyze_for_detail_structured(self, smart_text: str, file_name: str) -> Optional[str]:
+        """
+        상세 분석을 JSON 스키마로 받아 로컬에서 마크다운으로 조립
+        
+        Returns:
+            마크다운 분석 결과, 호출/파싱 실패 시 None
+        """
+        messages = [
+            {"role": "system", "content": _DETAIL_STRUCTURED_SYSTEM_PROMPT},
+            self._create_detail_messages(smart_text, file_name)[1]
+        ]
+        response = self._safe_api_call(
+            messages=messages,
+            max_tokens=_DETAIL_STRUCTURED_MAX_TOKENS,
+            retries=5,
+            delay=2,
+            semantic_key=('analyze_for_detail_structured', smart_text),
+            response_format=_DETAIL_RESPONSE_FORMAT
+        )
+        if response is None:
+            logger.warning("구조화 상세 분석 실패, 마크다운 생성으로 재시도")
+            return None
+        
+        if getattr(response.choices[0], 'finish_reason', None) == 'length':
+            # 출력 상한에 걸려 JSON이 잘림 - 이 호출은 버려지고 마크다운 생성으로 한 번 더 호출됨
+            logger.warning(f"구조화 상세 분석이 출력 상한({_DETAIL_STRUCTURED_MAX_TOKENS} 토큰)에 걸림, 마크다운 생성으로 재시도")
+            return None
+        
+        try:
+            payload = _json_loads(response.choices[0].message.content)
+        except (TypeError, ValueError) as e:
+            # 출력 상한 도달 등으로 JSON이 잘린 경우
+            logger.warning(f"구조화 상세 분석 결과 파싱 실패, 마크다운 생성으로 재시도: {e}")
+            return None
+        
+        return _render_detail_markdown(payload, file_name)
+    
+    def _create_detail_messages(self, smart_text: str, file_name: str) -> List[Dict[str, str]]:
+        """analyze_for_detail용 메시지 생성 (일반/스트리밍 공용)"""
+        # 상세 분석용 특화 프롬프트
+        # 고정 지침은 system 메시지(앞쪽)에, 문서별 내용은 user 메시지(뒤쪽)에 두어 OpenAI 프롬프트 프리픽스 캐시 활용
+        messages = [
+            {
+                "role": "system",
+                "content": _DETAIL_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": (
+                    f'다음은 보험 상품 문서 "{file_name}"에서 추출한 전체 텍스트입니다.\n'
+                    "고객이 이 상품을 자세히 이해할 수 있도록 상세하고 실용적인 정보를 제공해주세요.\n"
+                    f"결과 제목의 [파일명]은 {file_name} 입니다.\n\n"
+                    f"추출된 텍스트:\n{smart_text}"
+                )
+            }
+        ]
+        return messages
+    
+    def _create_detail_header(self, file_name: str, page_count: int) -> str:
+        """상세 분석 결과 앞에 붙는 문서 메타데이터"""
+        metadata = _document_header("📖 상품 상세 분석 결과", file_name, page_count, "분석 시간", "🎯 분석 목적: 상품 상세 정보 제공")
+        return metadata
+    
+    def analyze_for_detail_stream(self, pages: List[Dict[str, Any]], file_name: str):
+        """
+        analyze_for_detail의 스트리밍 버전 (생성되는 대로 부분 결과를 반환)
+        
+        Args:
+            pages: PDF 페이지 데이터 리스트
+            file_name: PDF 파일명
+            
+        Yields:
+            분석 결과 조각 (모두 이어 붙이면 analyze_for_detail 결과와 같은 형식)
+        """
+        if not self._has_page_text(pages):
+            yield "❌ 분석할 텍스트가 없습니다."
+            return
+        
+        raw_text = self._combine_extracted_text(pages)
+        
+        smart_text = self._smart_truncate_text(self._dedupe_text(raw_text), max_input_tokens=80000)
+        messages = self._create_detail_messages(smart_text, file_name)
+        yield from self._stream_api_call(messages, self._create_detail_header(file_name, len(pages)), pages, file_name)